@@ -0,0 +1,3 @@
+"""
+AdultingOS Backend Benchmarks Package
+"""
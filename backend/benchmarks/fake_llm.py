@@ -0,0 +1,102 @@
+"""
+A fake Ollama server for load tests: answers /api/chat after a configurable delay.
+
+It runs a real uvicorn server on a loopback port in a background thread, so
+the assistant's pooled HTTP client is exercised exactly as in production,
+minus the model. Streaming requests get the reply as a few NDJSON chunks.
+
+    with FakeLLMServer(latency_ms=200) as server:
+        os.environ["OLLAMA_BASE_URL"] = server.url
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+def make_app(latency_ms: float = 100.0, reply: str = "This is a canned reply from the fake model.") -> Callable:
+    """ASGI app implementing the subset of the Ollama API that LLMClient uses."""
+    delay = latency_ms / 1000.0
+
+    async def app(scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["path"] != "/api/chat":
+            await _respond(send, 404, b'{"error":"not found"}')
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        stream = json.loads(body or b"{}").get("stream", False)
+
+        await asyncio.sleep(delay)
+        if not stream:
+            payload = {"message": {"role": "assistant", "content": reply}, "done": True}
+            await _respond(send, 200, json.dumps(payload).encode())
+            return
+
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")]})
+        words = reply.split(" ")
+        for i, word in enumerate(words):
+            chunk = {"message": {"role": "assistant", "content": word + (" " if i < len(words) - 1 else "")},
+                     "done": False}
+            await send({"type": "http.response.body", "body": json.dumps(chunk).encode() + b"\n", "more_body": True})
+        await send({"type": "http.response.body", "body": b'{"done":true}\n', "more_body": False})
+
+    return app
+
+
+async def _respond(send: Callable, status: int, body: bytes) -> None:
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+class FakeLLMServer:
+    """Serves ``make_app(...)`` on 127.0.0.1 (port 0 picks a free one) while the context is open."""
+
+    def __init__(self, latency_ms: float = 100.0, port: int = 0) -> None:
+        self.latency_ms = latency_ms
+        self.port = port
+        self._server: Optional[Any] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "FakeLLMServer":
+        import uvicorn
+
+        config = uvicorn.Config(make_app(self.latency_ms), host="127.0.0.1", port=self.port,
+                                log_level="error", lifespan="on")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Fake LLM server failed to start")
+            time.sleep(0.01)
+        self.port = self._server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=10)
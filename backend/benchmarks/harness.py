@@ -0,0 +1,209 @@
+"""
+Shared pieces of the benchmark suite: timing, deterministic data, result files
+and the baseline comparison.
+
+Result files are plain JSON: ``{"meta": {...}, "results": {name: {...}}}``.
+Each result has a ``kind``:
+- ``time``: wall time of one run of a micro-benchmark (``median_ms`` and spread)
+- ``load``: an in-process load test (``p50_ms``/``p95_ms``/``p99_ms``, ``rps``, ``errors``)
+"""
+from __future__ import annotations
+
+import gc
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+Result = Dict[str, Any]
+
+_CATEGORIES = ("finance", "health", "home", "career", "admin")
+_TAGS = ("urgent", "bills", "weekly", "family", "paperwork", "errands", "annual", "car")
+_WORDS = ("pay", "rent", "renew", "passport", "book", "dentist", "file", "taxes", "call", "landlord",
+          "insurance", "cancel", "gym", "budget", "review", "lease", "order", "groceries", "visa", "bank")
+
+
+def task_records(n: int, seed: int = 1234) -> List[Dict[str, Any]]:
+    """``n`` realistic task dicts, identical for the same seed on every machine."""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    records = []
+    for i in range(n):
+        title = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(2, 5))).capitalize()
+        records.append({
+            "id": f"bench-{i:06d}",
+            "title": title,
+            "description": " ".join(rng.choice(_WORDS) for _ in range(rng.randint(0, 12))) or None,
+            "category": rng.choice(_CATEGORIES),
+            "due_date": (start + timedelta(hours=rng.randint(0, 24 * 365))).isoformat() if rng.random() < 0.7 else None,
+            "priority": rng.randint(1, 5),
+            "completed": rng.random() < 0.3,
+            "tags": rng.sample(_TAGS, rng.randint(0, 3)),
+        })
+    return records
+
+
+def measure(fn: Callable[[], Any], repeat: int = 5, warmup: int = 1,
+            setup: Optional[Callable[[], Any]] = None) -> Result:
+    """
+    Time ``fn()`` ``repeat`` times after ``warmup`` untimed calls. ``setup`` runs
+    before every call, outside the timing. A full collection before each run keeps
+    garbage from one run from being charged to the next.
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        fn()
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "kind": "time",
+        "runs": repeat,
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "max_ms": max(samples),
+        "stdev_ms": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def save(path: str, meta: Dict[str, Any], results: Dict[str, Result]) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# (field, higher_is_better) compared for each kind of result
+_COMPARED = {
+    "time": (("median_ms", False),),
+    "load": (("p95_ms", False), ("rps", True)),
+}
+
+# (field, higher_is_better) kept from the better of two runs by best_of
+_BEST = {
+    "time": (("median_ms", False), ("min_ms", False)),
+    "load": (("p50_ms", False), ("p95_ms", False), ("p99_ms", False), ("rps", True)),
+}
+
+
+def compare(baseline: Dict[str, Result], current: Dict[str, Result], tolerance: float = 0.25,
+            min_delta_ms: float = 0.5, load_tolerance: Optional[float] = None) -> Tuple[List[str], List[str]]:
+    """
+    Compare two ``results`` mappings. Returns ``(regressions, notes)``.
+
+    A metric regresses when it is worse than the baseline by more than
+    ``tolerance`` (relative; ``load_tolerance`` for load tests, whose tail
+    latencies swing more) and, for times, by more than ``min_delta_ms`` so
+    that sub-millisecond jitter on tiny benchmarks cannot fail a run. Any
+    load-test errors are a regression regardless of the baseline.
+    """
+    regressions: List[str] = []
+    notes: List[str] = []
+    for name in sorted(current):
+        result = current[name]
+        if result.get("errors"):
+            regressions.append(f"{name}: {result['errors']} failed requests")
+        base = baseline.get(name)
+        if base is None:
+            notes.append(f"{name}: not in baseline")
+            continue
+        for field, higher_is_better in _COMPARED.get(result["kind"], ()):
+            old, new = base.get(field), result.get(field)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            allowed = load_tolerance if result["kind"] == "load" and load_tolerance is not None else tolerance
+            if worse > allowed and (higher_is_better or new - old > min_delta_ms):
+                regressions.append(f"{name}: {field} {old:.3f} -> {new:.3f} ({change:+.0%})")
+    missing = len(set(baseline) - set(current))
+    if missing:
+        notes.append(f"{missing} baseline benchmark(s) not run")
+    return regressions, notes
+
+
+def best_of(first: Dict[str, Result], second: Dict[str, Result]) -> Dict[str, Result]:
+    """
+    Merge two runs of the same benchmarks, keeping the better value of each
+    timing (a slowdown has to show up in both to count). The higher count of
+    failed requests is kept: errors are never noise.
+    """
+    merged: Dict[str, Result] = {}
+    for name, result in first.items():
+        other = second.get(name)
+        if other is None:
+            merged[name] = result
+            continue
+        best = dict(result)
+        for field, higher_is_better in _BEST.get(result["kind"], ()):
+            if field in result and field in other:
+                best[field] = (max if higher_is_better else min)(result[field], other[field])
+        if "errors" in result:
+            best["errors"] = max(result["errors"], other.get("errors", 0))
+        merged[name] = best
+    return merged
+
+
+def print_results(results: Dict[str, Result], baseline: Optional[Dict[str, Result]] = None,
+                  out=sys.stdout) -> None:
+    baseline = baseline or {}
+    for name in sorted(results):
+        r = results[name]
+        base = baseline.get(name, {})
+        if r["kind"] == "time":
+            delta = _delta(base.get("median_ms"), r["median_ms"])
+            print(f"  {name:<44} {r['median_ms']:10.3f} ms  ±{r['stdev_ms']:.3f}{delta}", file=out)
+        else:
+            delta = _delta(base.get("p95_ms"), r["p95_ms"])
+            print(f"  {name:<44} p50 {r['p50_ms']:7.2f}  p95 {r['p95_ms']:7.2f}  p99 {r['p99_ms']:7.2f} ms"
+                  f"  {r['rps']:8.1f} req/s  errors {r['errors']}{delta}", file=out)
+
+
+def _delta(old: Optional[float], new: float) -> str:
+    return f"  ({(new - old) / old:+.0%} vs baseline)" if old else ""
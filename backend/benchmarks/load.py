@@ -0,0 +1,163 @@
+"""
+In-process load tests: concurrent requests through the ASGI app, no server.
+
+Requests go through ``httpx.ASGITransport`` straight into ``backend.main.app``
+(middleware, routing, validation, threadpool hops and all), so the numbers are
+the app's own overhead without socket or proxy noise. The assistant talks to a
+``FakeLLMServer`` with a fixed latency (or, with ``provider="replay"``, to the
+in-process replay provider, which skips the HTTP pool entirely), so
+``/assistant/chat`` measures how the app behaves while waiting on a model:
+``p50`` should sit just above the fake latency, and throughput should scale
+with concurrency.
+
+Scenarios (``load.<name>``):
+- ``tasks.list`` / ``tasks.get`` / ``tasks.create``: /tasks against a seeded in-memory store
+- ``tasks.list.not_modified`` / ``tasks.changes``: a polling client with nothing new
+  (the list revalidated with If-None-Match, and a delta sync from the current version)
+- ``chat.onboarding``: /chat turns spread over many session ids
+- ``assistant.chat``: /assistant/chat LLM turns (cache bypassed)
+- ``assistant.command``: /assistant/chat slash-command (``/task search``)
+"""
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from unittest import mock
+
+from backend.benchmarks.fake_llm import FakeLLMServer
+from backend.benchmarks.harness import Result, percentile, task_records
+
+# (method, path, json body[, headers]) for the i-th request of a scenario
+RequestFactory = Callable[[int], Tuple[Any, ...]]
+
+LIST_PATH = "/tasks/?limit=50&completed=false"
+
+
+async def run_load(app: Callable, make_request: RequestFactory, requests: int, concurrency: int,
+                   expected_status: int = 200) -> Result:
+    """Send ``requests`` requests from ``concurrency`` workers and summarize their latencies."""
+    import httpx
+
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def worker() -> None:
+            nonlocal next_index, errors
+            while next_index < requests:
+                i = next_index
+                next_index += 1
+                method, path, body, *headers = make_request(i)
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body, headers=headers[0] if headers else None)
+                    ok = response.status_code == expected_status
+                except Exception:  # noqa: BLE001 - count it and keep the load going
+                    ok = False
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += not ok
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "kind": "load",
+        "requests": requests,
+        "concurrency": concurrency,
+        "rps": requests / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1],
+        "errors": errors,
+    }
+
+
+def _client(**overrides: Any):
+    from backend.src.assistant.client import LLMClient
+    from backend.src.settings import Settings
+
+    settings = dataclasses.replace(Settings(), replay_record=False, **overrides)
+    with mock.patch("backend.src.assistant.client.get_settings", return_value=settings):
+        return LLMClient()
+
+
+@contextmanager
+def fake_llm(provider: str, latency_ms: float) -> Iterator[Any]:
+    """An LLMClient whose every reply takes ``latency_ms``: via a fake Ollama server or the replay provider."""
+    if provider == "replay":
+        yield _client(model_provider="replay", replay_cassette_path=None, replay_latency_ms=latency_ms,
+                      replay_tokens_per_second=0)
+        return
+    with FakeLLMServer(latency_ms=latency_ms) as server:
+        yield _client(model_provider="ollama", ollama_base_url=server.url)
+
+
+async def _poll_state(app: Callable) -> Dict[str, Any]:
+    """The list ETag and store version a client holds right after a full sync."""
+    import httpx
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        version = (await client.get("/tasks/changes?since=0")).json()["data"]["version"]
+        etag = (await client.get(LIST_PATH)).headers["etag"]
+    return {"etag": etag, "version": version}
+
+
+def run(requests: int = 2000, concurrency: int = 32, seed_tasks: int = 1000,
+        llm_latency_ms: float = 50.0, llm_requests: Optional[int] = None,
+        provider: str = "ollama") -> Dict[str, Result]:
+    from backend.main import app
+    from backend.src.assistant import router as assistant
+    from backend.src.models import Task
+    from backend.src.repository import create_repository, set_repository
+
+    repo = create_repository("memory")
+    repo.replace_all([Task(**r) for r in task_records(seed_tasks)])
+    set_repository(repo)
+    new_task = {"title": "Pay rent", "category": "finance", "priority": 2, "tags": ["bills"]}
+    sessions = max(1, requests // 5)
+
+    # What an up-to-date polling client sends back, filled in once the app is up.
+    poll: Dict[str, Any] = {}
+    scenarios: List[Tuple[str, RequestFactory, int]] = [
+        ("tasks.list", lambda i: ("GET", LIST_PATH, None), requests),
+        ("tasks.list.not_modified", lambda i: ("GET", LIST_PATH, None, {"If-None-Match": poll["etag"]}), requests),
+        ("tasks.changes", lambda i: ("GET", f"/tasks/changes?since={poll['version']}", None), requests),
+        ("tasks.get", lambda i: ("GET", f"/tasks/bench-{i % seed_tasks:06d}", None), requests),
+        ("tasks.create", lambda i: ("POST", "/tasks/", new_task), requests),
+        ("chat.onboarding", lambda i: ("POST", "/chat", {"text": "yes", "session_id": f"bench-{i % sessions}"}),
+         requests),
+        ("assistant.command", lambda i: ("POST", "/assistant/chat", {"message": "/task search renew passport"}),
+         requests),
+        ("assistant.chat", lambda i: ("POST", "/assistant/chat",
+                                      {"message": f"What should I do first today? ({i})", "use_cache": False}),
+         llm_requests or requests // 4),
+    ]
+
+    results: Dict[str, Result] = {}
+    previous_llm = assistant._llm
+    try:
+        with fake_llm(provider, llm_latency_ms) as llm:
+            assistant._llm = llm
+
+            async def run_all() -> None:
+                poll.update(await _poll_state(app))
+                for name, make_request, count in scenarios:
+                    status = 304 if name == "tasks.list.not_modified" else 200
+                    # A short untimed warm-up so first-use costs (imports, pools) stay out of the numbers.
+                    await run_load(app, make_request, min(count, concurrency), concurrency, status)
+                    results[f"load.{name}"] = await run_load(app, make_request, count, concurrency, status)
+                await assistant.close_llm()
+
+            asyncio.run(run_all())
+    finally:
+        assistant._llm = previous_llm
+        set_repository(None)
+    results["load.assistant.chat"]["llm_latency_ms"] = llm_latency_ms
+    return results
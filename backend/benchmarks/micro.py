@@ -0,0 +1,272 @@
+"""
+Micro-benchmarks for the hot paths behind /tasks and the assistant's tools.
+
+- ``store.<backend>.save.<n>`` / ``load.<n>``: the assistant's ``_save_tasks``
+  (full rewrite) and ``_load_tasks`` against each task repository; ``load_cold``
+  also reopens the store from disk first, as a fresh worker would
+- ``command.*``: ``_handle_command`` parsing and dispatch (``/task add`` with
+  every flag, ``/task list`` and ``/task search`` over ``n`` tasks)
+- ``store.journal.put.x<w>.threads<t>``: ``w`` single-task puts (as concurrent
+  ``/task add`` calls make them) spread over ``t`` threads; grouped commits
+  should make this get faster, not slower, as ``t`` grows
+- ``reminders.schedule.<n>`` / ``reschedule.x1000.<n>``: filling the due-date
+  reminder heap with ``n`` tasks, then moving 1000 due dates with ``n`` pending
+- ``response.*.<n>``: encoding a page of ``n`` tasks as a /tasks response body,
+  the old way (``format_response`` of ``task.dict()``s, then ``jsonable_encoder``
+  and ``JSONResponse``), with ``task_json`` from scratch, and with its cache warm
+- ``knowledge.{build,load}.<corpus>`` / ``search.x100.<corpus>``: indexing the
+  docs knowledge base, opening the index, and 100 retrievals; ``docs`` is the
+  shipped docs/, ``<n>`` a synthetic corpus of ``n`` short chunks (up to 10k)
+- ``benefits.evaluate.x1000``: screening 1000 single onboarding profiles;
+  ``benefits.{encode,batch,loop}.<n>``: encoding ``n`` profiles as a matrix,
+  scoring it in one NumPy batch, and the same profiles one at a time
+- ``validate.*.<n>``: building ``Task`` models from dicts and from JSON lines
+
+Backend modules are imported inside the functions so that ``run.py`` can fix the
+environment (task store, session store) before the app's config is read.
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List
+
+from backend.benchmarks.harness import Result, measure, task_records
+
+STORES = ("memory", "journal", "sqlite")
+
+
+def _open_store(store: str, directory: str):
+    from backend.src.repository import InMemoryTaskRepository, JournalTaskRepository, SQLiteTaskRepository
+
+    if store == "memory":
+        return InMemoryTaskRepository()
+    if store == "journal":
+        return JournalTaskRepository(os.path.join(directory, "tasks.json"), os.path.join(directory, "tasks.journal"))
+    return SQLiteTaskRepository(os.path.join(directory, "tasks.db"))
+
+
+def bench_stores(sizes: Iterable[int], repeat: int, stores: Iterable[str] = STORES) -> Dict[str, Result]:
+    from backend.src.assistant.tools import _load_tasks, _save_tasks
+    from backend.src.models import Task
+    from backend.src.repository import set_repository
+
+    results: Dict[str, Result] = {}
+    for n in sizes:
+        tasks = [Task(**r) for r in task_records(n)]
+        for store in stores:
+            directory = tempfile.mkdtemp(prefix="adultingos-bench-")
+            repo = _open_store(store, directory)
+            set_repository(repo)
+            try:
+                results[f"store.{store}.save.{n}"] = measure(lambda: _save_tasks(tasks), repeat)
+                results[f"store.{store}.load.{n}"] = measure(_load_tasks, repeat)
+                if store != "memory":
+                    def reopen() -> None:
+                        nonlocal repo
+                        repo.close()
+                        repo = _open_store(store, directory)
+                        set_repository(repo)
+
+                    results[f"store.{store}.load_cold.{n}"] = measure(_load_tasks, repeat, setup=reopen)
+            finally:
+                set_repository(None)
+                repo.close()
+                shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def bench_concurrent_writes(repeat: int, writes: int = 256, threads: Iterable[int] = (1, 8, 32)) -> Dict[str, Result]:
+    from backend.src.models import Task
+
+    tasks = [Task(**r) for r in task_records(writes)]
+    results: Dict[str, Result] = {}
+    for t in threads:
+        directory = tempfile.mkdtemp(prefix="adultingos-bench-")
+        repo = _open_store("journal", directory)
+        try:
+            with ThreadPoolExecutor(max_workers=t) as pool:
+                results[f"store.journal.put.x{writes}.threads{t}"] = measure(
+                    lambda: list(pool.map(repo.put, tasks)), repeat, setup=lambda: repo.replace_all([])
+                )
+        finally:
+            repo.close()
+            shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def bench_commands(sizes: Iterable[int], repeat: int, batch: int = 200) -> Dict[str, Result]:
+    from backend.src.assistant.router import _extract_flag, _handle_command
+    from backend.src.models import Task
+    from backend.src.repository import InMemoryTaskRepository, set_repository
+
+    add = '/task add "Renew passport" --desc "Book the appointment first" --cat admin --due 2025-12-31 --priority 2 --tags travel,paperwork'
+    flags = add[add.index(" --"):]
+
+    def batched(fn: Callable[[], object]) -> Callable[[], None]:
+        def loop() -> None:
+            for _ in range(batch):
+                fn()
+        return loop
+
+    results: Dict[str, Result] = {}
+    repo = InMemoryTaskRepository()
+    set_repository(repo)
+    try:
+        results[f"command.extract_flags.x{batch}"] = measure(
+            batched(lambda: [_extract_flag(flags, f) for f in ("--desc", "--cat", "--due", "--priority", "--tags")]), repeat
+        )
+        results[f"command.add.x{batch}"] = measure(batched(lambda: _handle_command(add)), repeat, setup=lambda: repo.replace_all([]))
+        for n in sizes:
+            repo.replace_all([Task(**r) for r in task_records(n)])
+            results[f"command.list.{n}"] = measure(lambda: _handle_command("/task list"), repeat)
+            results[f"command.search.{n}"] = measure(lambda: _handle_command("/task search renew passport"), repeat)
+    finally:
+        set_repository(None)
+    return results
+
+
+def bench_reminders(sizes: Iterable[int], repeat: int, batch: int = 1000) -> Dict[str, Result]:
+    from datetime import datetime, timedelta
+
+    from backend.src.models import Task
+    from backend.src.reminders import ReminderScheduler
+
+    start = datetime.now() + timedelta(days=1)
+    results: Dict[str, Result] = {}
+    for n in sizes:
+        tasks = [Task(**dict(r, due_date=start + timedelta(minutes=i), completed=False))
+                 for i, r in enumerate(task_records(n))]
+        moved = [t.model_copy(update={"due_date": t.due_date + timedelta(hours=1)}) for t in tasks[:batch]]
+        scheduler = ReminderScheduler()
+
+        def fill() -> None:
+            nonlocal scheduler
+            scheduler = ReminderScheduler()
+            for task in tasks:
+                scheduler.on_put(task)
+
+        def reschedule() -> None:
+            for task in moved:
+                scheduler.on_put(task)
+
+        results[f"reminders.schedule.{n}"] = measure(fill, repeat)
+        results[f"reminders.reschedule.x{batch}.{n}"] = measure(reschedule, repeat, setup=fill)
+    return results
+
+
+def bench_responses(sizes: Iterable[int], repeat: int) -> Dict[str, Result]:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    from backend.src.models import Task
+    from backend.src.task_json import TaskJSONCache, envelope_response
+    from backend.src.utils import format_response
+
+    results: Dict[str, Result] = {}
+    for n in sizes:
+        tasks = [Task(**r) for r in task_records(n)]
+        cold, warm = TaskJSONCache(0), TaskJSONCache(n)
+        warm.dumps_many(tasks)
+        results[f"response.format_response.{n}"] = measure(
+            lambda: JSONResponse(jsonable_encoder(format_response([t.dict() for t in tasks]))), repeat)
+        results[f"response.task_json.{n}"] = measure(lambda: envelope_response(cold.dumps_many(tasks)), repeat)
+        results[f"response.task_json_cached.{n}"] = measure(lambda: envelope_response(warm.dumps_many(tasks)), repeat)
+    return results
+
+
+def bench_knowledge(sizes: Iterable[int], repeat: int, queries: int = 100) -> Dict[str, Result]:
+    from backend.src.assistant.knowledge import KnowledgeBase, build_index
+    from backend.src.settings import get_settings
+
+    results: Dict[str, Result] = {}
+    directory = tempfile.mkdtemp(prefix="adultingos-bench-")
+    try:
+        corpora = [("docs", get_settings().docs_dir, 800, ["How do I apply for a Pell Grant?", "tax credits",
+                                                            "health savings account", "what is the frontend built with"])]
+        for n in (n for n in sizes if n <= 10000):
+            records = task_records(n)
+            docs_dir = os.path.join(directory, f"docs-{n}")
+            os.makedirs(docs_dir)
+            # One file per 1000 tasks, one short paragraph (chunk) per task.
+            for start in range(0, n, 1000):
+                with open(os.path.join(docs_dir, f"part-{start:06d}.txt"), "w", encoding="utf-8") as f:
+                    f.write("\n\n".join(f"{r['title']}. {r['description'] or ''}" for r in records[start:start + 1000]))
+            corpora.append((str(n), docs_dir, 60, [r["title"] for r in records[:queries]]))
+        for name, docs_dir, chunk_chars, texts in corpora:
+            path = os.path.join(directory, f"{name}.index")
+            texts = (texts * queries)[:queries]
+            results[f"knowledge.build.{name}"] = measure(lambda: build_index(docs_dir, path, chunk_chars), repeat)
+            results[f"knowledge.load.{name}"] = measure(lambda: KnowledgeBase(path), repeat)
+            kb = KnowledgeBase(path)
+            results[f"knowledge.search.x{queries}.{name}"] = measure(lambda: [kb.search(t) for t in texts], repeat)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def benefit_profiles(n: int, seed: int = 1234) -> List[Dict[str, object]]:
+    """``n`` onboarding-like profiles: typed and free-text answers, some left unanswered."""
+    rng = random.Random(seed)
+    choices = {
+        "is_student": [True, False, "yes", "no", "I'm not a student"],
+        "rent_or_own": ["rent", "own", "I rent", "I own my place"],
+        "is_married": [True, False, "single", "married"],
+        "has_student_loans": [True, False],
+        "has_hdhp": [True, False],
+    }
+    profiles: List[Dict[str, object]] = []
+    for _ in range(n):
+        profile: Dict[str, object] = {field: rng.choice(values) for field, values in choices.items()
+                                      if rng.random() < 0.8}
+        if rng.random() < 0.9:
+            income = rng.randint(0, 200) * 1000
+            profile["income"] = income if rng.random() < 0.7 else f"${income:,}"
+        profiles.append(profile)
+    return profiles
+
+
+def bench_benefits(sizes: Iterable[int], repeat: int, batch: int = 1000) -> Dict[str, Result]:
+    from backend.src.eligibility import _numpy, rules
+
+    results: Dict[str, Result] = {}
+    singles = benefit_profiles(batch, seed=99)
+    results[f"benefits.evaluate.x{batch}"] = measure(lambda: [rules.evaluate(p) for p in singles], repeat)
+    for n in sizes:
+        profiles = benefit_profiles(n)
+        if _numpy() is not None:
+            matrix = rules.encode_batch(profiles)
+            results[f"benefits.encode.{n}"] = measure(lambda: rules.encode_batch(profiles), repeat)
+            results[f"benefits.batch.{n}"] = measure(lambda: rules.evaluate_batch(matrix), repeat)
+        results[f"benefits.loop.{n}"] = measure(lambda: [rules.evaluate(p) for p in profiles], repeat)
+    return results
+
+
+def bench_validation(sizes: Iterable[int], repeat: int) -> Dict[str, Result]:
+    from backend.src.models import Task
+
+    results: Dict[str, Result] = {}
+    for n in sizes:
+        records = task_records(n)
+        lines: List[str] = [json.dumps(r) for r in records]
+        results[f"validate.dict.{n}"] = measure(lambda: [Task(**r) for r in records], repeat)
+        results[f"validate.json.{n}"] = measure(lambda: [Task.model_validate_json(line) for line in lines], repeat)
+    return results
+
+
+def run(sizes: Iterable[int], repeat: int = 5) -> Dict[str, Result]:
+    sizes = list(sizes)
+    results: Dict[str, Result] = {}
+    results.update(bench_validation(sizes, repeat))
+    results.update(bench_commands(sizes, repeat))
+    results.update(bench_stores(sizes, repeat))
+    results.update(bench_concurrent_writes(repeat))
+    results.update(bench_reminders(sizes, repeat))
+    results.update(bench_responses(sizes, repeat))
+    results.update(bench_knowledge(sizes, repeat))
+    results.update(bench_benefits(sizes, repeat))
+    return results
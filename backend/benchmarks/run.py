@@ -0,0 +1,140 @@
+"""
+Backend benchmark suite: micro-benchmarks plus in-process load tests, compared
+against a stored baseline.
+
+Usage (from the repo root):
+    python -m backend.benchmarks.run                      # full suite, compare to baseline.json
+    python -m backend.benchmarks.run --quick              # 1k tasks and fewer requests
+    python -m backend.benchmarks.run --suite load --llm-latency-ms 200
+    python -m backend.benchmarks.run --suite load --llm-provider replay
+    python -m backend.benchmarks.run --update-baseline    # accept the current numbers
+
+Results are written to ``--output`` (``backend/benchmarks/results/latest.json``
+by default). Every result also present in the baseline is compared; the exit
+status is 1 if any of them is slower than the baseline by more than
+``--tolerance`` (``--load-tolerance`` for load-test latencies and throughput)
+or if a load test saw failed requests. A suite that looks slower is run
+again (``--retries``) and the better number of each benchmark is kept, so a
+slowdown has to show up in every run to count.
+Baselines are only meaningful on the machine that recorded them, so record
+one per CI runner.
+
+The run always uses the in-memory task store for the app and temporary files
+for the store benchmarks; it never touches ``backend/data``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List, Tuple
+
+from backend.benchmarks import harness
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "results", "latest.json")
+
+
+def _isolate_environment() -> None:
+    # Read by backend.config at import time, so this must run before the app is imported.
+    os.environ["TASK_STORE"] = "memory"
+    os.environ.pop("SESSION_STORE_PATH", None)
+
+
+def _sizes(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--suite", choices=("all", "micro", "load"), default="all")
+    parser.add_argument("--sizes", type=_sizes, default=[1000, 10000, 100000], help="task counts, comma-separated")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per micro-benchmark (median is reported)")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per load scenario")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients per load scenario")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="latency of the fake LLM provider")
+    parser.add_argument("--llm-provider", choices=("ollama", "replay"), default="ollama",
+                        help="fake Ollama server over HTTP, or the in-process replay provider")
+    parser.add_argument("--quick", action="store_true", help="1k tasks, 3 repeats, 500 requests")
+    parser.add_argument("--baseline", default=harness.BASELINE_PATH, help="baseline results to compare against")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write this run's results")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--load-tolerance", type=float, default=0.5,
+                        help="allowed load-test p95/throughput change vs baseline")
+    parser.add_argument("--retries", type=int, default=2, help="re-runs of a suite that looks slower than baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="write this run's results as the new baseline")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.sizes, args.repeat, args.requests = [1000], 3, 500
+
+    _isolate_environment()
+    from backend.benchmarks import load, micro
+
+    def run_suite(suite: str) -> Dict[str, harness.Result]:
+        if suite == "micro":
+            return micro.run(args.sizes, args.repeat)
+        return load.run(args.requests, args.concurrency, llm_latency_ms=args.llm_latency_ms,
+                        provider=args.llm_provider)
+
+    suites = ("micro", "load") if args.suite == "all" else (args.suite,)
+    by_suite = {suite: run_suite(suite) for suite in suites}
+
+    baseline = harness.load(args.baseline) if os.path.exists(args.baseline) else None
+    base_results = baseline["results"] if baseline else {}
+
+    def compare(results: Dict[str, harness.Result]) -> Tuple[List[str], List[str]]:
+        if baseline is None:
+            return [], []
+        return harness.compare(base_results, results, args.tolerance, load_tolerance=args.load_tolerance)
+
+    if baseline is not None and not args.update_baseline:
+        for _ in range(args.retries):
+            slower = [suite for suite, results in by_suite.items() if compare(results)[0]]
+            if not slower:
+                break
+            for suite in slower:
+                print(f"{suite} looks slower than baseline; running it again", file=sys.stderr)
+                by_suite[suite] = harness.best_of(by_suite[suite], run_suite(suite))
+
+    results: Dict[str, harness.Result] = {}
+    for suite_results in by_suite.values():
+        results.update(suite_results)
+    meta = harness.environment()
+    meta["args"] = {k: v for k, v in vars(args).items()
+                    if k not in ("baseline", "output", "json", "tolerance", "load_tolerance", "retries",
+                                 "update_baseline")}
+    harness.save(args.output, meta, results)
+    regressions, notes = compare(results)
+
+    if args.json:
+        print(json.dumps({"meta": meta, "results": results, "regressions": regressions}, indent=2, sort_keys=True))
+    else:
+        harness.print_results(results, base_results)
+        print(f"results written to {os.path.relpath(args.output)}")
+        if baseline is None:
+            if not args.update_baseline:
+                print(f"no baseline at {os.path.relpath(args.baseline)}; run with --update-baseline to record one")
+        elif (baseline["meta"].get("machine"), baseline["meta"].get("python")) != (meta["machine"], meta["python"]):
+            print("warning: baseline was recorded on a different machine or Python version", file=sys.stderr)
+        if baseline is not None and baseline["meta"].get("args") != meta["args"]:
+            print("warning: baseline was recorded with different options; compare like with like", file=sys.stderr)
+        for note in notes:
+            print(f"  note: {note}")
+
+    if args.update_baseline:
+        harness.save(args.baseline, meta, results)
+        print(f"baseline updated: {os.path.relpath(args.baseline)}")
+        return 0
+    if regressions:
+        print(f"REGRESSION: {len(regressions)} benchmark(s) slower than baseline "
+              f"(tolerance {args.tolerance:.0%}, load {args.load_tolerance:.0%})",
+              file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
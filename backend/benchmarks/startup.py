@@ -0,0 +1,146 @@
+"""
+Cold-start benchmark for the backend (what a fresh serverless instance pays).
+
+Each run starts a new interpreter, so nothing is shared between runs:
+- import-time breakdown: ``python -X importtime -c "import backend.main"``,
+  reported as the slowest top-level packages and backend modules
+- time to first response: import the app and serve ``GET /tasks/`` through
+  the ASGI interface (no server, no sockets), timed from process start
+
+Usage:
+    python -m backend.benchmarks.startup [--runs 5] [--budget-ms 1500] [--json]
+
+With ``--budget-ms`` the exit status is 1 when the median time to first
+response exceeds the budget, so CI can hold the line.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Runs in the child interpreter; prints one JSON line of timings.
+_FIRST_RESPONSE = r"""
+import asyncio, json, time
+t0 = time.perf_counter()
+from backend.main import app
+t1 = time.perf_counter()
+
+async def first_request():
+    status = []
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/tasks/", "raw_path": b"/tasks/", "root_path": "",
+        "query_string": b"", "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 1), "server": ("localhost", 80),
+    }
+    await app(scope, receive, send)
+    return status[0]
+
+status = asyncio.run(first_request())
+t2 = time.perf_counter()
+print(json.dumps({"status": status, "import_ms": (t1 - t0) * 1000, "first_response_ms": (t2 - t0) * 1000}))
+"""
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    # Measure code paths, not disk state: keep tasks in memory for the run.
+    env.setdefault("TASK_STORE", "memory")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def import_breakdown() -> Tuple[float, List[Tuple[str, float]]]:
+    """Total import time of backend.main plus (module, cumulative ms) for the heaviest entries."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.main"],
+        cwd=REPO_ROOT, env=_child_env(), capture_output=True, text=True, check=True,
+    )
+    total = 0.0
+    entries: List[Tuple[str, float]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        ms = int(cumulative) / 1000
+        if name == "backend.main":
+            total = ms
+        elif "." not in name or name.startswith("backend."):
+            entries.append((name, ms))
+    entries.sort(key=lambda e: e[1], reverse=True)
+    return total, entries
+
+
+def first_response() -> Dict[str, float]:
+    """Spawn a fresh interpreter and time import + first request (plus interpreter startup)."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", _FIRST_RESPONSE],
+        cwd=REPO_ROOT, env=_child_env(), capture_output=True, text=True, check=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process_ms"] = wall_ms
+    return result
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to start (median is reported)")
+    parser.add_argument("--top", type=int, default=12, help="modules to list in the import breakdown")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if median time to first response exceeds this")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args(argv)
+
+    totals, breakdowns, responses = [], [], []
+    for _ in range(args.runs):
+        total, entries = import_breakdown()
+        totals.append(total)
+        breakdowns.append(dict(entries))
+        responses.append(first_response())
+
+    names = sorted({name for b in breakdowns for name in b}, key=lambda n: -statistics.median(b.get(n, 0.0) for b in breakdowns))
+    top = [(name, statistics.median(b.get(name, 0.0) for b in breakdowns)) for name in names[: args.top]]
+    summary = {
+        "runs": args.runs,
+        "import_backend_main_ms": statistics.median(totals),
+        "import_ms": statistics.median(r["import_ms"] for r in responses),
+        "first_response_ms": statistics.median(r["first_response_ms"] for r in responses),
+        "process_ms": statistics.median(r["process_ms"] for r in responses),
+        "status": responses[-1]["status"],
+        "top_imports_ms": dict(top),
+    }
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"median of {args.runs} cold starts")
+        print(f"  import backend.main        {summary['import_ms']:8.1f} ms")
+        print(f"  time to first response     {summary['first_response_ms']:8.1f} ms  (GET /tasks/ -> {summary['status']})")
+        print(f"  process start to response  {summary['process_ms']:8.1f} ms")
+        print("slowest imports (cumulative)")
+        for name, ms in top:
+            print(f"  {name:<40} {ms:8.1f} ms")
+
+    if args.budget_ms is not None and summary["first_response_ms"] > args.budget_ms:
+        print(f"over budget: {summary['first_response_ms']:.1f} ms > {args.budget_ms:.1f} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,22 +3,53 @@ Main file for the AdultingOS backend.
 Configured for Vercel serverless deployment.
 """
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import inspect
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Optional
 import os
 
+from backend.src import config, metrics
+from backend.src.eligibility import ELIGIBLE, rules as benefit_rules
+from backend.src.sessions import SessionStore
+
 # --- Data Models ---
 class ChatMessage(BaseModel):
     """Represents a message from the user."""
     text: str
+    # Returned by the first reply; send it back to continue the same conversation
+    session_id: Optional[str] = Field(None, max_length=128)
 
 # --- Application Setup ---
+# Startup/cleanup callbacks registered by optional components (e.g. pooled LLM connections)
+startup_hooks = []
+shutdown_hooks = []
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    for hook in startup_hooks:
+        result = hook()
+        if inspect.isawaitable(result):
+            await result
+    yield
+    for hook in shutdown_hooks:
+        try:
+            result = hook()
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            pass
+
+
 app = FastAPI(
     title="AdultingOS API",
     description="API for the AdultingOS application.",
     version="0.1.0",
     root_path="/api" if os.environ.get("VERCEL") else "",
+    lifespan=lifespan,
 )
 
 # CORS (allow frontend during dev)
@@ -33,10 +64,17 @@ try:
 except Exception:
     pass
 
+# Latency/status/in-flight per route; added last so it wraps everything else
+if config.ENABLE_METRICS:
+    app.add_middleware(metrics.MetricsMiddleware)
+
 # Routers
 try:
-    from backend.src.assistant.router import router as assistant_router
+    from backend.src.assistant.router import router as assistant_router, close_llm, conversations, load_docs
     app.include_router(assistant_router)
+    startup_hooks.append(load_docs)
+    shutdown_hooks.append(close_llm)
+    shutdown_hooks.append(conversations.close)
 except Exception:
     # Keep API usable even if assistant optional deps missing
     pass
@@ -47,19 +85,30 @@ try:
 except Exception:
     pass
 
-# --- In-memory storage for conversation state and user profile ---
-# NOTE: This is a temporary solution for the MVP. In a real application, this would be a database.
-conversation_state = {
-    "question_index": 0,
-    "questions": [
-        {"id": "is_student", "text": "Are you currently a student?"},
-        {"id": "income", "text": "What is your approximate annual income?"},
-        {"id": "rent_or_own", "text": "Do you rent or own your home?"},
-        {"id": "is_married", "text": "Are you married or single?"},
-    ],
-}
+try:
+    from backend.src.benefits import router as benefits_router
+    app.include_router(benefits_router)
+except Exception:
+    pass
+
+# Due-date reminders: a background scheduler fed by task writes
+if config.ENABLE_NOTIFICATIONS:
+    from backend.src.reminders import ReminderScheduler, create_sink
+    reminders = ReminderScheduler(create_sink(config.REMINDER_SINK, config.REMINDER_WEBHOOK_URL))
+    startup_hooks.append(reminders.start)
+    shutdown_hooks.append(reminders.stop)
 
-user_profile = {}
+# --- Onboarding conversation ---
+ONBOARDING_QUESTIONS = [
+    {"id": "is_student", "text": "Are you currently a student?"},
+    {"id": "income", "text": "What is your approximate annual income?"},
+    {"id": "rent_or_own", "text": "Do you rent or own your home?"},
+    {"id": "is_married", "text": "Are you married or single?"},
+]
+
+# Each client's progress and answers, keyed by session id
+sessions = SessionStore(config.SESSION_MAX, config.SESSION_TTL_SECONDS, config.SESSION_STORE_PATH)
+shutdown_hooks.append(sessions.close)
 
 # --- API Endpoints ---
 
@@ -72,28 +121,50 @@ def read_root():
     return {"message": "Welcome to the AdultingOS API!"}
 
 
+if config.ENABLE_METRICS:
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics():
+        """
+        Prometheus scrape endpoint.
+        """
+        return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.post("/chat")
 def chat(message: ChatMessage):
     """
     Handles the chatbot conversation.
     Receives a message from the user and returns a response.
+    A message without a (known) session_id starts a new onboarding session.
     """
-    global conversation_state, user_profile
-
-    # Get the current question
-    question_index = conversation_state["question_index"]
-    questions = conversation_state["questions"]
-
-    # Store the user's answer
-    if question_index > 0:
-        previous_question = questions[question_index - 1]
-        user_profile[previous_question["id"]] = message.text
-
-    # If there are more questions, ask the next one
-    if question_index < len(questions):
-        next_question = questions[question_index]
-        conversation_state["question_index"] += 1
-        return {"text": next_question["text"], "sender": "bot"}
-    else:
-        # End of the conversation
-        return {"text": "Thank you for completing your profile!", "sender": "bot"}
\ No newline at end of file
+    with sessions.checkout(message.session_id) as session:
+        # Get the current question
+        question_index = session.question_index
+        questions = ONBOARDING_QUESTIONS
+
+        # Store the user's answer (question_index runs one past the last question once
+        # onboarding is complete, so later messages don't overwrite the final answer)
+        if 0 < question_index <= len(questions):
+            previous_question = questions[question_index - 1]
+            session.profile[previous_question["id"]] = message.text
+
+        # If there are more questions, ask the next one
+        if question_index < len(questions):
+            next_question = questions[question_index]
+            session.question_index += 1
+            return {"text": next_question["text"], "sender": "bot", "session_id": session.session_id}
+        else:
+            # End of the conversation: screen the answers for benefits programs
+            # (the same result for every message after the last answer)
+            session.question_index = len(questions) + 1
+            matches = benefit_rules.matches(session.profile)
+            eligible = [m.name for m in matches if m.status == ELIGIBLE]
+            text = "Thank you for completing your profile!"
+            if eligible:
+                text += " You may qualify for: " + ", ".join(eligible) + "."
+            return {
+                "text": text,
+                "sender": "bot",
+                "session_id": session.session_id,
+                "benefits": [m.to_dict() for m in matches],
+            }
\ No newline at end of file
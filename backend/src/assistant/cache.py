@@ -0,0 +1,185 @@
+"""
+Response cache for deterministic LLM prompts.
+
+Replies are keyed on a hash of provider, model, temperature and the normalized
+message list. A bounded in-memory LRU with a TTL sits in front of an optional
+SQLite tier, so repeat questions survive restarts and are shared across workers.
+
+Anything with the same ``get``/``set``/``stats`` methods can be passed to
+``LLMClient(cache=...)`` instead; async ``aget``/``aset`` are used when present.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+# Expired entries are purged from SQLite at most this often.
+PURGE_INTERVAL_SECONDS = 60.0
+
+
+def _normalize(content: str) -> str:
+    return _WHITESPACE.sub(" ", content).strip().casefold()
+
+
+def cache_key(provider: str, model: str, temperature: float, messages: List[Dict[str, str]]) -> str:
+    payload = {
+        "provider": provider,
+        "model": model,
+        "temperature": temperature,
+        "messages": [[m.get("role", ""), _normalize(m.get("content", ""))] for m in messages],
+    }
+    raw = json.dumps(payload, separators=(",", ":"), sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU + TTL cache with an optional on-disk SQLite tier.
+
+    The memory tier and the SQLite connection have separate locks, so a slow
+    commit never holds up lookups that the LRU can answer. ``aget``/``aset``
+    answer from memory inline and run the SQLite side in a worker thread, for
+    callers on the event loop.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl_seconds: float = 3600.0, sqlite_path: Optional[str] = None) -> None:
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._next_purge = 0.0
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            # Several workers share the file: WAL keeps readers off the writer's lock,
+            # and a writer waits for another worker's commit instead of failing.
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA busy_timeout=5000")
+            self._db.executescript(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS idx_response_cache_expires_at ON response_cache (expires_at);"
+            )
+            self._db.commit()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._get_memory(key)
+        return value if value is not None else self._get_disk(key)
+
+    def set(self, key: str, value: str) -> None:
+        expires_at = self._set_memory(key, value)
+        self._set_disk(key, value, expires_at)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """``get`` for the event loop: a memory hit returns inline, SQLite is read in a worker thread."""
+        value = self._get_memory(key)
+        if value is not None:
+            return value
+        if self._db is None:
+            return self._get_disk(key)  # just counts the miss
+        return await asyncio.to_thread(self._get_disk, key)
+
+    async def aset(self, key: str, value: str) -> None:
+        """``set`` for the event loop: the LRU is updated inline, SQLite is written in a worker thread."""
+        expires_at = self._set_memory(key, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._set_disk, key, value, expires_at)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        with self._db_lock:
+            if self._db is not None:
+                self._db.execute("DELETE FROM response_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+            }
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # ----- tiers -----
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        """The value from the LRU (counted as a hit), or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _get_disk(self, key: str) -> Optional[str]:
+        """After a memory miss: the value from SQLite (kept in the LRU), or None counted as a miss."""
+        now = time.time()
+        row = None
+        with self._db_lock:
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+                ).fetchone()
+        with self._lock:
+            if row is not None and row[1] > now:
+                self._remember(key, row[0], row[1])
+                self.hits += 1
+                self.disk_hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def _set_memory(self, key: str, value: str) -> float:
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, value, expires_at)
+        return expires_at
+
+    def _set_disk(self, key: str, value: str, expires_at: float) -> None:
+        now = time.time()
+        with self._db_lock:
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            if now >= self._next_purge:
+                self._next_purge = now + PURGE_INTERVAL_SECONDS
+                self._db.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+            self._db.commit()
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
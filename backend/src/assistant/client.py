@@ -1,67 +1,476 @@
 """
-LLM client abstraction with OpenAI and Ollama backends.
+LLM client abstraction with OpenAI, Ollama and offline replay backends.
 Keeps a clean interface for sending chat messages.
+
+Each client owns long-lived, pooled HTTP connections per provider so
+assistant turns reuse warm TCP/TLS connections instead of reconnecting.
+Replacing ``client.settings`` with different limits, timeouts or API key
+closes those pools and builds new ones on the next call.
+`chat` is the blocking API; `achat` is its async twin for use on the event loop,
+and `astream` yields the reply incrementally as the provider produces tokens.
+All three consult the response cache (see cache.py) unless `use_cache=False`,
+and identical concurrent `chat`/`achat` calls are coalesced into one provider
+request (see singleflight.py). Every call is reported to ``hooks`` (by default
+the Prometheus metrics in metrics.py) with its latency, sizes and outcome.
+
+Provider SDKs and HTTP libraries are imported when a client first needs them,
+so importing this module (and the app) stays cheap on a cold start.
+
+``MODEL_PROVIDER=replay`` answers from a recorded cassette without any network
+(see replay.py); ``REPLAY_RECORD=true`` records a real provider's replies into one.
 """
 from __future__ import annotations
 
-from typing import List, Dict, Literal, Any, cast
-import requests
+import asyncio
+import importlib.util
+import json
+import logging
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Callable, List, Dict, Literal, Any, Optional
 
-try:
-    # OpenAI Python SDK v1.x
-    from openai import OpenAI  # type: ignore
-except Exception:  # pragma: no cover - optional dependency
-    OpenAI = None  # type: ignore
+if TYPE_CHECKING:
+    import httpx
+    import requests
 
-from backend.src.settings import get_settings
+from backend.src.assistant.cache import ResponseCache, cache_key
+from backend.src.assistant.replay import Cassette, ReplayProvider
+from backend.src.assistant.singleflight import AsyncSingleFlight, SingleFlight
+from backend.src.metrics import LLMCall, record_llm_call
+from backend.src.settings import Settings, get_settings
 
 Role = Literal["system", "user", "assistant"]
 
+TEMPERATURE = 0.2
+
+logger = logging.getLogger(__name__)
+
+LLMHook = Callable[[LLMCall], None]
+
+
+def default_cache(settings: Settings) -> Optional[ResponseCache]:
+    if settings.response_cache_size <= 0:
+        return None
+    return ResponseCache(
+        maxsize=settings.response_cache_size,
+        ttl_seconds=settings.response_cache_ttl_seconds,
+        sqlite_path=settings.response_cache_path,
+    )
+
+
 class LLMClient:
-    def __init__(self) -> None:
+    def __init__(self, cache: Optional[ResponseCache] = None, hooks: Optional[List[LLMHook]] = None) -> None:
         self.settings = get_settings()
         self._provider = self.settings.model_provider
+        self.cache = cache if cache is not None else default_cache(self.settings)
+        # Called after every call (including cache hits); must be cheap and must not raise.
+        self.hooks: List[LLMHook] = list(hooks) if hooks is not None else [record_llm_call]
+        self._openai_client: Optional[Any] = None
+        self._session: Optional[requests.Session] = None
+        # The settings the open pools were built with; see _check_pool_settings.
+        self._pool_settings: Optional[tuple] = None
+        # Async clients are bound to the event loop they were created on.
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_openai_client: Optional[Any] = None
+        self._async_http: Optional[httpx.AsyncClient] = None
+        self._async_pool_settings: Optional[tuple] = None
+        self._inflight = SingleFlight()
+        self._ainflight = AsyncSingleFlight()
+        self._replay: Optional[ReplayProvider] = None
+        # Replies from a real provider are appended here in record mode.
+        self.recorder: Optional[Cassette] = None
+
+        if self._provider == "replay":
+            self._replay = ReplayProvider(
+                Cassette(self.settings.replay_cassette_path),
+                latency_ms=self.settings.replay_latency_ms,
+                tokens_per_second=self.settings.replay_tokens_per_second,
+                reply_tokens=self.settings.replay_reply_tokens,
+            )
+        elif self.settings.replay_record:
+            if not self.settings.replay_cassette_path:
+                raise RuntimeError("REPLAY_RECORD needs REPLAY_CASSETTE (the file to record into).")
+            self.recorder = Cassette(self.settings.replay_cassette_path)
 
-        if self._provider == "openai" and OpenAI is None:
+        # Only check that the optional SDK is installed; importing it is deferred to the first call.
+        if self._provider == "openai" and importlib.util.find_spec("openai") is None:
             raise RuntimeError("OpenAI SDK not installed. Add `openai` to requirements and pip install.")
 
         if self._provider == "openai" and not self.settings.openai_api_key:
             raise RuntimeError("OPENAI_API_KEY is not set.")
 
-    def chat(self, messages: List[Dict[str, str]]) -> str:
+    def chat(self, messages: List[Dict[str, str]], use_cache: bool = True) -> str:
         """
         Send a list of messages: [{role: system|user|assistant, content: str}, ...]
         Returns assistant text content.
         """
+        key = self._request_key(messages)
+        cached = self._cached(key, messages, use_cache)
+        if cached is not None:
+            return cached
+        # Identical concurrent requests share one provider call.
+        return self._inflight.do(
+            key, lambda: self._remember(key, self._observed_chat(messages), use_cache), timeout=self._wait_timeout()
+        )
+
+    async def achat(self, messages: List[Dict[str, str]], use_cache: bool = True) -> str:
+        """Async variant of `chat`; cancelling the awaiting task aborts the request."""
+        key = self._request_key(messages)
+        cached = await self._acached(key, messages, use_cache)
+        if cached is not None:
+            return cached
+        await self._check_async_loop()
+
+        async def fetch() -> str:
+            start = time.perf_counter()
+            try:
+                reply = await self._achat(messages)
+            except Exception as e:
+                self._report(messages, start, error=e)
+                raise
+            self._report(messages, start, reply=reply)
+            return await self._aremember(key, reply, use_cache)
+
+        return await self._ainflight.do(key, fetch, timeout=self._wait_timeout())
+
+    async def astream(self, messages: List[Dict[str, str]], use_cache: bool = True) -> AsyncIterator[str]:
+        """Yield the assistant reply in chunks as the provider streams it."""
+        key = self._request_key(messages)
+        cached = await self._acached(key, messages, use_cache)
+        if cached is not None:
+            yield cached
+            return
+        chunks: List[str] = []
+        start = time.perf_counter()
+        try:
+            async for chunk in self._astream(messages):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            self._report(messages, start, error=e)
+            raise
+        reply = "".join(chunks)
+        self._report(messages, start, reply=reply)
+        # Only complete replies are cached; a cancelled stream never gets here.
+        await self._aremember(key, reply, use_cache)
+
+    def _cached(self, key: str, messages: List[Dict[str, str]], use_cache: bool) -> Optional[str]:
+        cached = self.cache.get(key) if use_cache and self.cache is not None else None
+        if cached is not None:
+            self._report(messages, time.perf_counter(), reply=cached, cached=True)
+        return cached
+
+    async def _acached(self, key: str, messages: List[Dict[str, str]], use_cache: bool) -> Optional[str]:
+        """``_cached`` without blocking the event loop on a disk-backed cache."""
+        if not use_cache or self.cache is None:
+            return None
+        aget = getattr(self.cache, "aget", None)
+        cached = await aget(key) if aget is not None else self.cache.get(key)
+        if cached is not None:
+            self._report(messages, time.perf_counter(), reply=cached, cached=True)
+        return cached
+
+    def _observed_chat(self, messages: List[Dict[str, str]]) -> str:
+        start = time.perf_counter()
+        try:
+            reply = self._chat(messages)
+        except Exception as e:
+            self._report(messages, start, error=e)
+            raise
+        self._report(messages, start, reply=reply)
+        return reply
+
+    def _report(
+        self,
+        messages: List[Dict[str, str]],
+        start: float,
+        reply: str = "",
+        error: Optional[BaseException] = None,
+        cached: bool = False,
+    ) -> None:
+        seconds = time.perf_counter() - start
+        if self.recorder is not None and error is None and not cached and reply:
+            self.recorder.record(messages, reply, self._provider, self.model, seconds)
+        if not self.hooks:
+            return
+        call = LLMCall(
+            provider=self._provider,
+            model=self.model,
+            seconds=seconds,
+            prompt_chars=sum(len(m.get("content") or "") for m in messages),
+            response_chars=len(reply),
+            error=error,
+            cached=cached,
+        )
+        for hook in self.hooks:
+            try:
+                hook(call)
+            except Exception:  # noqa: BLE001 - instrumentation must never break a reply
+                logger.exception("LLM hook failed")
+
+    def _request_key(self, messages: List[Dict[str, str]]) -> str:
+        return cache_key(self._provider, self.model, TEMPERATURE, messages)
+
+    def _remember(self, key: str, reply: str, use_cache: bool) -> str:
+        if use_cache and reply and self.cache is not None:
+            self.cache.set(key, reply)
+        return reply
+
+    async def _aremember(self, key: str, reply: str, use_cache: bool) -> str:
+        if use_cache and reply and self.cache is not None:
+            aset = getattr(self.cache, "aset", None)
+            if aset is not None:
+                await aset(key, reply)
+            else:
+                self.cache.set(key, reply)
+        return reply
+
+    def _wait_timeout(self) -> float:
+        # Followers wait as long as the leader's own request may take.
+        return self.settings.llm_connect_timeout_seconds + self.settings.llm_timeout_seconds
+
+    @property
+    def model(self) -> str:
+        if self._provider == "replay":
+            return "replay"
+        return self.settings.openai_model if self._provider == "openai" else self.settings.ollama_model
+
+    def _chat(self, messages: List[Dict[str, str]]) -> str:
         if self._provider == "openai":
             return self._openai_chat(messages)
         elif self._provider == "ollama":
             return self._ollama_chat(messages)
+        elif self._replay is not None:
+            return self._replay.chat(messages)
+        else:
+            raise ValueError(f"Unknown model provider: {self._provider}")
+
+    async def _achat(self, messages: List[Dict[str, str]]) -> str:
+        if self._provider == "openai":
+            return await self._openai_achat(messages)
+        elif self._provider == "ollama":
+            return await self._ollama_achat(messages)
+        elif self._replay is not None:
+            return await self._replay.achat(messages)
+        else:
+            raise ValueError(f"Unknown model provider: {self._provider}")
+
+    async def _astream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        if self._provider == "openai":
+            stream = self._openai_astream(messages)
+        elif self._provider == "ollama":
+            stream = self._ollama_astream(messages)
+        elif self._replay is not None:
+            stream = self._replay.astream(messages)
         else:
             raise ValueError(f"Unknown model provider: {self._provider}")
+        async for chunk in stream:
+            yield chunk
+
+    def close(self) -> None:
+        """Release pooled connections (called on app shutdown)."""
+        if self.cache is not None:
+            self.cache.close()
+        self._close_pools()
+
+    def _close_pools(self) -> None:
+        if self._openai_client is not None:
+            self._openai_client.close()
+            self._openai_client = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    async def aclose(self) -> None:
+        """Release both the async and the blocking connection pools."""
+        await self._close_async_pools(self._async_loop)
+        self._async_loop = None
+        self.close()
+
+    # ----- pooled connections -----
+
+    def _http_timeout(self) -> httpx.Timeout:
+        import httpx
+
+        return httpx.Timeout(self.settings.llm_timeout_seconds, connect=self.settings.llm_connect_timeout_seconds)
+
+    def _http_limits(self) -> httpx.Limits:
+        import httpx
+
+        return httpx.Limits(
+            max_connections=self.settings.llm_pool_size,
+            max_keepalive_connections=self.settings.llm_pool_size,
+            keepalive_expiry=self.settings.llm_keepalive_seconds,
+        )
+
+    def _pool_key(self) -> tuple:
+        s = self.settings
+        return (
+            s.openai_api_key,
+            s.llm_pool_size,
+            s.llm_keepalive_seconds,
+            s.llm_connect_timeout_seconds,
+            s.llm_timeout_seconds,
+        )
+
+    def _check_pool_settings(self) -> None:
+        key = self._pool_key()
+        if self._pool_settings != key:
+            # Limits, timeouts or the API key changed: close the pools built with the old ones.
+            if self._pool_settings is not None:
+                self._close_pools()
+            self._pool_settings = key
+
+    def _get_openai_client(self) -> Any:
+        self._check_pool_settings()
+        if self._openai_client is None:
+            import httpx
+            from openai import OpenAI  # type: ignore
+
+            self._openai_client = OpenAI(
+                api_key=self.settings.openai_api_key,
+                timeout=self._http_timeout(),
+                http_client=httpx.Client(limits=self._http_limits(), timeout=self._http_timeout()),
+            )
+        return self._openai_client
+
+    def _get_session(self) -> requests.Session:
+        self._check_pool_settings()
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.settings.llm_pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._session = session
+        return self._session
+
+    async def _check_async_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        key = self._pool_key()
+        if self._async_loop is loop and self._async_pool_settings == key:
+            return
+        old_loop, self._async_loop, self._async_pool_settings = self._async_loop, loop, key
+        if old_loop is not loop:
+            self._ainflight = AsyncSingleFlight()
+        # Pools from another (possibly closed) loop can't be reused; close them and start fresh.
+        await self._close_async_pools(old_loop)
+
+    async def _close_async_pools(self, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Close the async clients, whose connections belong to ``loop``."""
+        closers = []
+        if self._async_openai_client is not None:
+            closers.append(self._async_openai_client.close)
+            self._async_openai_client = None
+        if self._async_http is not None:
+            closers.append(self._async_http.aclose)
+            self._async_http = None
+        for close in closers:
+            try:
+                if loop is not None and loop is not asyncio.get_running_loop() and loop.is_running():
+                    # The owning loop still runs in another thread: close the connections there.
+                    asyncio.run_coroutine_threadsafe(close(), loop)
+                else:
+                    await close()
+            except RuntimeError:
+                # A closed loop can't run the transports' close callbacks; their sockets go with the pool.
+                logger.debug("LLM connection pool from a closed event loop not closed cleanly", exc_info=True)
+
+    async def _get_async_openai_client(self) -> Any:
+        await self._check_async_loop()
+        if self._async_openai_client is None:
+            import httpx
+            from openai import AsyncOpenAI  # type: ignore
+
+            self._async_openai_client = AsyncOpenAI(
+                api_key=self.settings.openai_api_key,
+                timeout=self._http_timeout(),
+                http_client=httpx.AsyncClient(limits=self._http_limits(), timeout=self._http_timeout()),
+            )
+        return self._async_openai_client
+
+    async def _get_async_http(self) -> httpx.AsyncClient:
+        await self._check_async_loop()
+        if self._async_http is None:
+            import httpx
+
+            self._async_http = httpx.AsyncClient(limits=self._http_limits(), timeout=self._http_timeout())
+        return self._async_http
+
+    # ----- providers -----
 
     def _openai_chat(self, messages: List[Dict[str, str]]) -> str:
-        # Cast to satisfy static analysis; runtime guard ensures OpenAI is available
-        OpenAIClient = cast(Any, OpenAI)
-        client = OpenAIClient(api_key=self.settings.openai_api_key)
+        client = self._get_openai_client()
         resp = client.chat.completions.create(
             model=self.settings.openai_model,
             messages=messages,
-            temperature=0.2,
+            temperature=TEMPERATURE,
         )
         return resp.choices[0].message.content or ""
 
-    def _ollama_chat(self, messages: List[Dict[str, str]]) -> str:
-        url = f"{self.settings.ollama_base_url}/api/chat"
-        payload = {
+    async def _openai_achat(self, messages: List[Dict[str, str]]) -> str:
+        client = await self._get_async_openai_client()
+        resp = await client.chat.completions.create(
+            model=self.settings.openai_model,
+            messages=messages,
+            temperature=TEMPERATURE,
+        )
+        return resp.choices[0].message.content or ""
+
+    async def _openai_astream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        client = await self._get_async_openai_client()
+        stream = await client.chat.completions.create(
+            model=self.settings.openai_model,
+            messages=messages,
+            temperature=TEMPERATURE,
+            stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def _ollama_payload(self, messages: List[Dict[str, str]], stream: bool = False) -> Dict[str, Any]:
+        return {
             "model": self.settings.ollama_model,
             "messages": messages,
-            "stream": False,
-            "options": {"temperature": 0.2},
+            "stream": stream,
+            "options": {"temperature": TEMPERATURE},
         }
-        r = requests.post(url, json=payload, timeout=120)
+
+    def _ollama_chat(self, messages: List[Dict[str, str]]) -> str:
+        url = f"{self.settings.ollama_base_url}/api/chat"
+        timeout = (self.settings.llm_connect_timeout_seconds, self.settings.llm_timeout_seconds)
+        r = self._get_session().post(url, json=self._ollama_payload(messages), timeout=timeout)
         r.raise_for_status()
-        data = r.json()
+        return self._ollama_reply(r.json())
+
+    async def _ollama_achat(self, messages: List[Dict[str, str]]) -> str:
+        url = f"{self.settings.ollama_base_url}/api/chat"
+        http = await self._get_async_http()
+        r = await http.post(url, json=self._ollama_payload(messages))
+        r.raise_for_status()
+        return self._ollama_reply(r.json())
+
+    async def _ollama_astream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        url = f"{self.settings.ollama_base_url}/api/chat"
+        payload = self._ollama_payload(messages, stream=True)
+        http = await self._get_async_http()
+        async with http.stream("POST", url, json=payload) as r:
+            r.raise_for_status()
+            # Ollama streams one JSON object per line, ending with {"done": true}.
+            async for line in r.aiter_lines():
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                content = (data.get("message") or {}).get("content")
+                if content:
+                    yield content
+                if data.get("done"):
+                    break
+
+    @staticmethod
+    def _ollama_reply(data: Dict[str, Any]) -> str:
         if "message" in data and "content" in data["message"]:
             return data["message"]["content"]
         if "messages" in data and data["messages"]:
@@ -0,0 +1,222 @@
+"""
+Server-side conversation memory for /assistant/chat.
+
+Clients send the new message and the ``conversation_id`` from the previous
+reply instead of resending the whole history, so the request size stays flat
+as a conversation grows. Each conversation keeps its most recent messages in a
+fixed-size ring buffer of ``(role, content)`` tuples; older messages fall off
+the end (the prompt builder summarizes whatever it cannot fit anyway).
+
+Conversations sit in a bounded LRU that also drops any conversation idle for
+longer than the TTL. With an SQLite file the file is the source of truth
+instead, so conversations survive restarts and several workers can share them:
+``open`` reads the window from it, and ``append`` takes the next sequence
+number and inserts the new messages (one row each) in a single ``BEGIN
+IMMEDIATE`` transaction, so turns from different workers add to a conversation
+rather than overwrite each other. Rows that have scrolled out of the window are
+deleted as new ones arrive.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+Turn = Tuple[str, str]
+
+# Expired conversations are purged from SQLite at most this often.
+PURGE_INTERVAL_SECONDS = 60.0
+
+
+class Conversation:
+    __slots__ = ("conversation_id", "user_id", "turns", "seq", "last_seen")
+
+    def __init__(self, conversation_id: str, user_id: Optional[str], max_turns: int,
+                 turns: Iterable[Turn] = (), seq: int = 0, last_seen: float = 0.0) -> None:
+        self.conversation_id = conversation_id
+        self.user_id = user_id
+        self.turns: Deque[Turn] = deque(turns, maxlen=max_turns)
+        # Messages ever appended; the sequence number of the next one in SQLite.
+        self.seq = seq
+        self.last_seen = last_seen
+
+    def window(self) -> List[Dict[str, str]]:
+        return [{"role": role, "content": content} for role, content in self.turns]
+
+
+class ConversationStore:
+    """Thread-safe LRU of conversation windows with idle-TTL eviction, or shared SQLite tables."""
+
+    def __init__(self, max_conversations: int = 10000, max_turns: int = 40,
+                 idle_ttl_seconds: float = 86400.0, path: Optional[str] = None) -> None:
+        self.max_conversations = max_conversations
+        self.max_turns = max_turns
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._lock = threading.Lock()
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._next_purge = 0.0
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=30.0)
+            self._db.executescript(
+                "CREATE TABLE IF NOT EXISTS conversations ("
+                " conversation_id TEXT PRIMARY KEY, user_id TEXT, seq INTEGER NOT NULL, last_seen REAL NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS idx_conversations_last_seen ON conversations (last_seen);"
+                "CREATE TABLE IF NOT EXISTS conversation_messages ("
+                " conversation_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL,"
+                " PRIMARY KEY (conversation_id, seq)) WITHOUT ROWID;"
+            )
+            self._db.commit()
+        self.created = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def persistent(self) -> bool:
+        """Whether calls may touch SQLite (and so belong off the event loop)."""
+        return self._db is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._conversations)
+
+    def open(self, conversation_id: Optional[str] = None, user_id: Optional[str] = None) -> Tuple[str, List[Dict[str, str]]]:
+        """
+        The id and current message window of ``conversation_id``. A missing,
+        unknown or expired id, or one that belongs to a different ``user_id``,
+        starts a new conversation with a fresh id.
+        """
+        conversation_id, window, _ = self.open_window(conversation_id, user_id)
+        return conversation_id, window
+
+    def open_window(self, conversation_id: Optional[str] = None,
+                    user_id: Optional[str] = None) -> Tuple[str, List[Dict[str, str]], int]:
+        """``open``, plus the sequence number of the window's first message (it grows as the ring slides)."""
+        now = time.time()
+        with self._lock:
+            if self._db is not None:
+                conversation = self._load(conversation_id, now) if conversation_id else None
+            else:
+                conversation = self._get(conversation_id, now)
+            if conversation is None or (conversation.user_id and conversation.user_id != user_id):
+                conversation = self._create(uuid.uuid4().hex, user_id)
+            # Keeps the LRU ordered by last_seen, which _expire relies on.
+            conversation.last_seen = now
+            return conversation.conversation_id, conversation.window(), conversation.seq - len(conversation.turns)
+
+    def append(self, conversation_id: str, turns: Iterable[Turn], user_id: Optional[str] = None) -> None:
+        """Add messages to the end of the window (recreating the conversation if it expired meanwhile)."""
+        turns = list(turns)
+        now = time.time()
+        with self._lock:
+            if self._db is not None:
+                self._insert(conversation_id, turns, user_id, now)
+                return
+            conversation = self._get(conversation_id, now) or self._create(conversation_id, user_id)
+            conversation.turns.extend(turns)
+            conversation.seq += len(turns)
+            conversation.last_seen = now
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "active": len(self._conversations),
+                "created": self.created,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # ----- internals (called with the lock held) -----
+
+    def _get(self, conversation_id: Optional[str], now: float) -> Optional[Conversation]:
+        self._expire(now)
+        if not conversation_id:
+            return None
+        conversation = self._conversations.get(conversation_id)
+        if conversation is not None:
+            self._conversations.move_to_end(conversation_id)
+        return conversation
+
+    def _create(self, conversation_id: str, user_id: Optional[str]) -> Conversation:
+        conversation = Conversation(conversation_id, user_id, self.max_turns, last_seen=time.time())
+        self.created += 1
+        if self._db is None:
+            self._remember(conversation)
+        return conversation
+
+    def _remember(self, conversation: Conversation) -> None:
+        self._conversations[conversation.conversation_id] = conversation
+        while len(self._conversations) > self.max_conversations:
+            self._conversations.popitem(last=False)
+            self.evictions += 1
+
+    def _expire(self, now: float) -> None:
+        # Least recently used first, so stop at the first conversation that is still fresh.
+        cutoff = now - self.idle_ttl_seconds
+        while self._conversations:
+            oldest = next(iter(self._conversations.values()))
+            if oldest.last_seen > cutoff:
+                break
+            self._conversations.popitem(last=False)
+            self.expirations += 1
+
+    def _load(self, conversation_id: str, now: float) -> Optional[Conversation]:
+        row = self._db.execute(
+            "SELECT user_id, seq, last_seen FROM conversations WHERE conversation_id = ?", (conversation_id,)
+        ).fetchone()
+        if row is None or row[2] <= now - self.idle_ttl_seconds:
+            return None
+        rows = self._db.execute(
+            "SELECT role, content FROM conversation_messages WHERE conversation_id = ? ORDER BY seq DESC LIMIT ?",
+            (conversation_id, self.max_turns),
+        ).fetchall()
+        return Conversation(conversation_id, row[0], self.max_turns, reversed(rows), row[1], row[2])
+
+    def _insert(self, conversation_id: str, turns: List[Turn], user_id: Optional[str], now: float) -> None:
+        cid = conversation_id
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute(
+                "SELECT user_id, seq, last_seen FROM conversations WHERE conversation_id = ?", (cid,)
+            ).fetchone()
+            if row is None or row[2] <= now - self.idle_ttl_seconds:
+                # A fresh conversation; drop anything left under this id by an expired one.
+                self._db.execute("DELETE FROM conversation_messages WHERE conversation_id = ?", (cid,))
+                owner, first_seq = user_id, 0
+            else:
+                owner, first_seq = row[0], row[1]
+            seq = first_seq + len(turns)
+            self._db.execute(
+                "INSERT OR REPLACE INTO conversations (conversation_id, user_id, seq, last_seen) VALUES (?, ?, ?, ?)",
+                (cid, owner, seq, now),
+            )
+            self._db.executemany(
+                "INSERT INTO conversation_messages (conversation_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                [(cid, first_seq + i, role, content) for i, (role, content) in enumerate(turns)],
+            )
+            self._db.execute(
+                "DELETE FROM conversation_messages WHERE conversation_id = ? AND seq < ?",
+                (cid, seq - self.max_turns),
+            )
+            if now >= self._next_purge:
+                self._next_purge = now + PURGE_INTERVAL_SECONDS
+                cutoff = now - self.idle_ttl_seconds
+                self._db.execute(
+                    "DELETE FROM conversation_messages WHERE conversation_id IN "
+                    "(SELECT conversation_id FROM conversations WHERE last_seen <= ?)",
+                    (cutoff,),
+                )
+                self._db.execute("DELETE FROM conversations WHERE last_seen <= ?", (cutoff,))
+        except BaseException:
+            self._db.rollback()
+            raise
+        self._db.commit()
@@ -0,0 +1,629 @@
+"""
+Append-only task store behind the default ("journal") task repository.
+
+Layout on disk:
+- a JSON snapshot (``tasks.json``) holding the full task list as of the last compaction,
+  written one task per line so it can be streamed in and out with bounded memory
+- a journal (``tasks.journal``) of newline-delimited mutation records appended since then
+
+Each record carries the full task state (``put``) or a tombstone (``del``), so replaying
+the journal on top of the snapshot is idempotent. That keeps crash recovery simple:
+a torn last line is dropped, and a crash in the middle of a compaction just replays
+records that are already in the new snapshot.
+
+Records are also numbered: the writer stamps each with the next change number
+(``v``) while it holds the exclusive lock, and compaction carries the latest
+number over in a ``ver`` record at the head of the emptied journal. Every
+process replaying the files therefore agrees on ``TaskJournal.version``, which
+is the number of the change being applied whenever a listener is called.
+
+Parsed tasks stay in memory between calls. Every access compares a cheap
+``os.stat`` signature (inode, size, mtime) of both files with the one recorded
+after our last load or write, and only touches the file contents when another
+writer changed them: a grown journal replays just its new tail, anything else
+triggers a full reload.
+
+Several workers can share the files. Writers take an exclusive advisory lock on
+``tasks.lock``, catch up with whatever other processes wrote, then append (or
+compact) and release it; reads that have to touch the files take it shared, so
+they never see a compaction half done. Within one process, concurrent writes
+are grouped: the first writer to arrive leads, and every mutation queued by the
+time it holds the lock goes out in the same write and fsync, so throughput
+grows with concurrency instead of paying one fsync per write.
+"""
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from backend.src.models import Task
+
+try:
+    import fcntl
+except ImportError:  # e.g. Windows: writers are only coordinated within one process
+    fcntl = None  # type: ignore[assignment]
+
+# How long a queued writer waits for its group's leader before flushing itself.
+FOLLOWER_TIMEOUT_SECONDS = 1.0
+
+
+def task_to_dict(task: Task) -> Dict[str, Any]:
+    item = task.model_dump() if hasattr(task, "model_dump") else task.dict()  # pydantic v2|v1
+    if isinstance(item.get("due_date"), datetime):
+        item["due_date"] = item["due_date"].isoformat()
+    return item
+
+
+def task_from_dict(item: Dict[str, Any]) -> Optional[Task]:
+    """Build a Task from stored JSON, or None if the entry is invalid."""
+    try:
+        if isinstance(item.get("due_date"), str):
+            try:
+                item["due_date"] = datetime.fromisoformat(item["due_date"]).replace(tzinfo=None)
+            except Exception:
+                item["due_date"] = None
+        return Task(**item)
+    except ValidationError:
+        # Skip invalid entries rather than crashing
+        return None
+
+
+def iter_snapshot(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the items of a snapshot one at a time.
+    Snapshots written by write_snapshot have one item per line and are streamed;
+    anything else (e.g. an older pretty-printed file) falls back to json.load.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if f.readline().strip() == "[":
+            yielded = 0
+            try:
+                for line in f:
+                    line = line.strip()
+                    if line == "]":
+                        return
+                    yield json.loads(line.rstrip(","))
+                    yielded += 1
+                return
+            except json.JSONDecodeError:
+                if yielded:
+                    return  # truncated or damaged tail; keep what was readable
+        # Not one item per line (e.g. an older pretty-printed file): parse it whole.
+        f.seek(0)
+        try:
+            raw = json.load(f)
+        except json.JSONDecodeError:
+            raw = []
+    yield from raw
+
+
+def write_snapshot_lines(f, items: Iterable[Dict[str, Any]]) -> None:
+    """Write ``items`` as a JSON array with one compact item per line."""
+    f.write("[")
+    sep = "\n"
+    for item in items:
+        f.write(sep)
+        f.write(json.dumps(item, separators=(",", ":")))
+        sep = ",\n"
+    f.write("\n]\n")
+
+
+_FileSig = Optional[Tuple[int, int, int]]
+
+
+def _file_sig(path: str) -> _FileSig:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _fd_sig(fd: int) -> _FileSig:
+    st = os.fstat(fd)
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _fsync_dir(path: str) -> None:
+    # Make the rename itself durable; not supported on every platform (e.g. Windows).
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class FileLock:
+    """
+    Advisory ``flock`` on ``path``, shared by every process that opens the store.
+
+    Re-entrant (nested holds are no-ops) but not thread-safe on its own: callers
+    serialize threads with their own lock around it.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fd: Optional[int] = None
+        self._depth = 0
+        self._exclusive = False
+        self._kept = False
+
+    @contextlib.contextmanager
+    def hold(self, exclusive: bool = True) -> Iterator[None]:
+        if self._depth and exclusive and not self._exclusive:
+            raise RuntimeError("Cannot upgrade a shared lock to an exclusive one.")
+        if not self._depth:
+            self._acquire(exclusive)
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if not self._depth:
+                self._release()
+
+    def try_hold(self) -> bool:
+        """
+        Take the lock exclusively unless another process holds it, and keep it
+        until ``close`` (e.g. to elect one process for a job). True while held.
+        """
+        if self._kept:
+            return True
+        if self._depth:
+            raise RuntimeError("try_hold() cannot nest inside hold().")
+        try:
+            self._acquire(True, blocking=False)
+        except BlockingIOError:
+            return False
+        self._depth = 1
+        self._kept = True
+        return True
+
+    def close(self) -> None:
+        if self._kept:
+            self._kept = False
+            self._depth = 0
+            self._release()
+        if self._fd is not None and not self._depth:
+            os.close(self._fd)
+            self._fd = None
+
+    def _acquire(self, exclusive: bool, blocking: bool = True) -> None:
+        self._exclusive = exclusive
+        if fcntl is None:
+            return
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        fcntl.flock(self._fd, flags if blocking else flags | fcntl.LOCK_NB)
+
+    def _release(self) -> None:
+        if fcntl is not None and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+class _Commit:
+    """Mutations from one write call, waiting to be flushed with its group."""
+
+    __slots__ = ("ops", "results", "error", "done")
+
+    def __init__(self, ops: List[Tuple[str, Any]]) -> None:
+        self.ops = ops
+        self.results: List[Optional[Task]] = []
+        self.error: Optional[BaseException] = None
+        self.done = False
+
+
+class JournalListener:
+    """
+    Receives every change applied to a TaskJournal's in-memory state, including
+    other writers' appends; a full (re)load is one reset followed by the tasks.
+    """
+
+    def on_reset(self) -> None:
+        pass
+
+    def on_put(self, task: Task) -> None:
+        pass
+
+    def on_delete(self, task_id: str) -> None:
+        pass
+
+
+class TaskJournal:
+    """
+    Snapshot + append-only journal with an in-memory id -> offset index.
+
+    Adds and updates append one record (O(1) I/O), grouped with any concurrent
+    writes into one fsync. Once the journal holds ``compact_every`` superseded
+    records, it is folded into a fresh snapshot. ``group_commit_ms`` makes the
+    first writer of a group wait that long for others to join it (concurrent
+    writes are grouped without it too). ``hits``/``misses`` count accesses
+    served from memory vs. from disk; ``commits``/``committed`` count flushes
+    and the mutations they carried. A new store numbers its first change
+    ``first_version``.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: str,
+        journal_path: Optional[str] = None,
+        compact_every: int = 1000,
+        listener: Optional[JournalListener] = None,
+        lock: Optional[threading.RLock] = None,
+        lock_path: Optional[str] = None,
+        group_commit_ms: float = 0.0,
+        first_version: int = 1,
+    ) -> None:
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or os.path.splitext(snapshot_path)[0] + ".journal"
+        self.compact_every = compact_every
+        self.group_commit_seconds = group_commit_ms / 1000.0
+        self.first_version = first_version
+        self.listener = listener or JournalListener()
+        # Callers that keep derived state (e.g. secondary indexes) can share the lock.
+        self._lock = lock or threading.RLock()
+        self._file_lock = FileLock(lock_path or os.path.splitext(snapshot_path)[0] + ".lock")
+        self._pending: List[_Commit] = []
+        self._pending_cond = threading.Condition()
+        self._leading = False
+        self._loaded = False
+        self._tasks: Dict[str, Task] = {}
+        # id -> byte offset of the task's latest journal record (-1 = only in the snapshot)
+        self._index: Dict[str, int] = {}
+        self._records = 0
+        self._dead = 0
+        self._journal_size = 0
+        self._snapshot_sig: _FileSig = None
+        self._journal_sig: _FileSig = None
+        # Number of the latest change applied, the same in every process sharing the files.
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.commits = 0
+        self.committed = 0
+
+    # ----- reads -----
+
+    def all(self) -> List[Task]:
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._tasks.values())
+
+    def get(self, task_id: str) -> Optional[Task]:
+        with self._lock:
+            self._ensure_loaded()
+            return self._tasks.get(task_id)
+
+    @property
+    def tasks(self) -> Dict[str, Task]:
+        """The live id -> Task mapping as of the last refresh (read-only for callers)."""
+        return self._tasks
+
+    def refresh(self) -> None:
+        """Pick up changes made by other writers (a stat() call when there are none)."""
+        with self._lock:
+            self._ensure_loaded()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._ensure_loaded()
+            return {
+                "tasks": len(self._tasks),
+                "journal_records": self._records,
+                "dead_records": self._dead,
+                "journal_bytes": self._journal_size,
+                "cache_hits": self.hits,
+                "cache_misses": self.misses,
+                "commits": self.commits,
+                "committed": self.committed,
+            }
+
+    # ----- writes -----
+
+    def put(self, task: Task) -> Task:
+        if not task.id:
+            raise ValueError("Task must have an id before it is stored.")
+        (stored,) = self._submit([("put", task)])
+        return stored
+
+    def put_many(self, tasks: List[Task]) -> None:
+        """Append several tasks with a single write and fsync."""
+        if any(not t.id for t in tasks):
+            raise ValueError("Task must have an id before it is stored.")
+        if not tasks:
+            return
+        self._submit([("put", t) for t in tasks])
+
+    def delete(self, task_id: str) -> Optional[Task]:
+        (deleted,) = self._submit([("del", task_id)])
+        return deleted
+
+    def replace_all(self, tasks: Iterable[Task]) -> None:
+        """Overwrite the whole store with ``tasks`` (atomic snapshot, empty journal)."""
+        with self._lock, self._file_lock.hold():
+            self._ensure_loaded()
+            self._tasks = {t.id: t for t in tasks if t.id}
+            # A change of its own, so readers at the old version know to start over.
+            self.version = self._next_version(self.version)
+            self.listener.on_reset()
+            for task in self._tasks.values():
+                self.listener.on_put(task)
+            self._compact()
+
+    def compact(self) -> None:
+        """Fold the journal into a new snapshot, written atomically."""
+        with self._lock, self._file_lock.hold():
+            self._ensure_loaded()
+            self._compact()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file_lock.close()
+
+    # ----- group commit -----
+
+    def _submit(self, ops: List[Tuple[str, Any]]) -> List[Optional[Task]]:
+        """
+        Queue ``ops`` and return their results once they are durable.
+
+        The first writer to find no group forming leads the next one: it waits
+        ``group_commit_ms``, takes the lock and flushes everything queued by
+        then. The others wait for it, and only flush themselves if it takes
+        longer than FOLLOWER_TIMEOUT_SECONDS (e.g. because the caller already
+        holds the shared lock the leader is waiting for).
+        """
+        commit = _Commit(ops)
+        with self._pending_cond:
+            self._pending.append(commit)
+            leader = not self._leading
+            if leader:
+                self._leading = True
+            else:
+                self._pending_cond.wait_for(
+                    lambda: commit.done, timeout=self.group_commit_seconds + FOLLOWER_TIMEOUT_SECONDS
+                )
+        if leader and self.group_commit_seconds:
+            time.sleep(self.group_commit_seconds)
+        if not commit.done:
+            with self._lock:
+                with self._pending_cond:
+                    batch, self._pending = self._pending, []
+                    # Writers arriving from now on form the next group.
+                    self._leading = False
+                if batch:
+                    self._flush(batch)
+        if commit.error is not None:
+            raise commit.error
+        return commit.results
+
+    def _flush(self, batch: List[_Commit]) -> None:
+        """Write every mutation in ``batch`` with one append and fsync (lock held)."""
+        try:
+            with self._file_lock.hold():
+                self._ensure_loaded()
+                # Deletes of missing tasks write nothing, so track presence through the batch.
+                present: Dict[str, bool] = {}
+                records: List[Dict[str, Any]] = []
+                version = self.version
+                for commit in batch:
+                    for op, value in commit.ops:
+                        if op == "put":
+                            present[value.id] = True
+                            version = self._next_version(version)
+                            records.append({"op": "put", "v": version, "task": task_to_dict(value)})
+                        elif present.get(value, value in self._tasks):
+                            present[value] = False
+                            version = self._next_version(version)
+                            records.append({"op": "del", "v": version, "id": value})
+                offsets = iter(self._append(records)) if records else iter(())
+                versions = iter(record["v"] for record in records)
+                for commit in batch:
+                    for op, value in commit.ops:
+                        if op == "put":
+                            self._apply_put(value, next(offsets), next(versions))
+                            commit.results.append(value)
+                        elif value in self._tasks:
+                            commit.results.append(self._apply_delete(value, next(versions)))
+                            next(offsets)
+                        else:
+                            commit.results.append(None)
+                self.commits += 1
+                self.committed += len(records)
+                self._maybe_compact()
+        except BaseException as exc:
+            # Every writer in the group re-raises it from _submit, this one included.
+            for commit in batch:
+                commit.error = exc
+        finally:
+            with self._pending_cond:
+                for commit in batch:
+                    commit.done = True
+                self._pending_cond.notify_all()
+
+    # ----- internals -----
+
+    def _ensure_loaded(self) -> None:
+        """Serve from memory unless the files changed since we last saw them."""
+        if self._loaded and (
+            _file_sig(self.snapshot_path) == self._snapshot_sig and _file_sig(self.journal_path) == self._journal_sig
+        ):
+            self.hits += 1
+            return
+        self.misses += 1
+        # Shared, so a writer in another process cannot compact under us (no-op if we are the writer).
+        with self._file_lock.hold(exclusive=False):
+            snapshot_sig = _file_sig(self.snapshot_path)
+            journal_sig = _file_sig(self.journal_path)
+            if (
+                self._loaded
+                and snapshot_sig == self._snapshot_sig
+                and journal_sig is not None
+                and self._journal_sig is not None
+                and journal_sig[0] == self._journal_sig[0]
+                and journal_sig[1] >= self._journal_size
+            ):
+                # Another writer appended records: replay only the new tail.
+                self._journal_size = self._replay(self._journal_size)
+                self._journal_sig = journal_sig if journal_sig[1] == self._journal_size else _file_sig(self.journal_path)
+            else:
+                self._load()
+
+    def _load(self) -> None:
+        # Rebuilt quietly, then reported as a reset at the final version followed by the tasks.
+        listener, self.listener = self.listener, JournalListener()
+        try:
+            self._tasks = {}
+            self._index = {}
+            self._records = 0
+            self._dead = 0
+            self.version = 0
+            self._snapshot_sig = _file_sig(self.snapshot_path)
+            if self._snapshot_sig is not None:
+                for item in iter_snapshot(self.snapshot_path):
+                    task = task_from_dict(item)
+                    if task is not None and task.id:
+                        self._tasks[task.id] = task
+                        self._index[task.id] = -1
+            self._journal_size = self._replay(0)
+            self._journal_sig = _file_sig(self.journal_path)
+            self._loaded = True
+        finally:
+            self.listener = listener
+        listener.on_reset()
+        for task in self._tasks.values():
+            listener.on_put(task)
+
+    def _replay(self, start: int) -> int:
+        """
+        Apply journal records from byte ``start``; returns the end of the last complete record.
+        Anything after it is a torn write (or one still in progress), which the next
+        append cuts off once it holds the exclusive lock.
+        """
+        if not os.path.exists(self.journal_path):
+            return 0
+        offset = start
+        with open(self.journal_path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self._apply_record(record, offset)
+                offset += len(line)
+        return offset
+
+    def _apply_record(self, record: Dict[str, Any], offset: int) -> None:
+        op = record.get("op")
+        version = record.get("v", 0)
+        if op == "put":
+            task = task_from_dict(record.get("task") or {})
+            if task is not None and task.id:
+                self._apply_put(task, offset, version)
+                return
+        elif op == "del":
+            if record.get("id") in self._tasks:
+                self._apply_delete(record["id"], version)
+                return
+        elif op == "ver":
+            self.version = max(self.version, version)
+            return
+        # Unknown or invalid records still occupy journal space.
+        self._records += 1
+        self._dead += 1
+
+    def _apply_put(self, task: Task, offset: int, version: int = 0) -> None:
+        if self._index.get(task.id, -1) >= 0:
+            self._dead += 1
+        self._tasks[task.id] = task
+        self._index[task.id] = offset
+        self._records += 1
+        # Records written before changes were numbered carry none.
+        self.version = version or self.version
+        self.listener.on_put(task)
+
+    def _apply_delete(self, task_id: str, version: int = 0) -> Task:
+        if self._index.get(task_id, -1) >= 0:
+            self._dead += 1
+        self.version = version or self.version
+        deleted = self._tasks.pop(task_id)
+        self._index.pop(task_id, None)
+        # The tombstone is only needed until the next compaction.
+        self._records += 1
+        self._dead += 1
+        self.listener.on_delete(task_id)
+        return deleted
+
+    def _append(self, records: List[Dict[str, Any]]) -> List[int]:
+        """Append records in one write + fsync; returns each record's offset (exclusive lock held)."""
+        offsets: List[int] = []
+        lines: List[bytes] = []
+        offset = self._journal_size
+        for record in records:
+            line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+            offsets.append(offset)
+            lines.append(line)
+            offset += len(line)
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        with open(self.journal_path, "ab") as f:
+            if _fd_sig(f.fileno())[1] > self._journal_size:
+                # Partial write from a crash: cut it off so new records start on a clean line.
+                f.truncate(self._journal_size)
+            f.write(b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+            sig = _fd_sig(f.fileno())
+        self._journal_size = offset
+        # Without fcntl another process may have appended too: forget the signature so the next access reloads.
+        self._journal_sig = sig if sig[1] == self._journal_size else None
+        return offsets
+
+    def _maybe_compact(self) -> None:
+        if self._dead >= self.compact_every:
+            self._compact()
+
+    def _compact(self) -> None:
+        self._write_snapshot(task_to_dict(t) for t in self._tasks.values())
+        # The snapshot is durable now; replaying the old journal on top of it would be
+        # harmless, so truncating it last is crash-safe. Only the change number survives.
+        head = (json.dumps({"op": "ver", "v": self.version}, separators=(",", ":")) + "\n").encode("utf-8")
+        with open(self.journal_path, "wb") as f:
+            f.write(head)
+            f.flush()
+            os.fsync(f.fileno())
+            self._journal_sig = _fd_sig(f.fileno())
+        self._snapshot_sig = _file_sig(self.snapshot_path)
+        self._index = {tid: -1 for tid in self._tasks}
+        self._records = 0
+        self._dead = 0
+        self._journal_size = len(head)
+
+    def _next_version(self, version: int) -> int:
+        return version + 1 if version else self.first_version
+
+    def _write_snapshot(self, items: Iterable[Dict[str, Any]]) -> None:
+        directory = os.path.dirname(self.snapshot_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            write_snapshot_lines(f, items)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        _fsync_dir(directory)
@@ -0,0 +1,350 @@
+"""
+Retrieval over the docs/ knowledge base, for grounded assistant answers.
+
+``build_index`` splits every text file in the docs directory into chunks of a
+few paragraphs and writes a BM25 index to one binary file. For each hashed
+term bucket the file holds the chunks containing that term and the term's BM25
+weight in each (CSR layout: bucket offsets, chunk ids, weights), followed by
+the chunk texts. A query sums the weights in its terms' posting lists and
+keeps the top k, so it only touches chunks that share a word with it.
+
+Opening an index maps the file and parses only the short JSON list of source
+files. Postings are read straight from the mapping, and chunk texts are
+decoded only for the hits returned. NumPy, when installed, scores queries with
+long posting lists in one ``bincount``; shorter ones (and every query without
+NumPy) are summed in pure Python over memoryviews of the same arrays. NumPy is
+imported on first use, not with the app.
+
+The index records the size and mtime of the docs it was built from, and
+``load_knowledge_base`` rebuilds it when they change.
+
+Build it ahead of time (or let the first query do it) with::
+
+    python -m backend.src.assistant.knowledge [--docs DIR] [--index PATH]
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Files indexed from the docs directory.
+DOC_SUFFIXES = (".txt", ".md")
+# Target chunk length; paragraphs are packed together up to it.
+CHUNK_CHARS = 800
+# Term hash buckets (a power of two); collisions only nudge scores.
+HASH_BUCKETS = 1 << 16
+# Queries touching fewer postings than this are summed in pure Python even with NumPy,
+# whose per-call overhead only pays off on longer posting lists.
+VECTORIZE_MIN_POSTINGS = 512
+# BM25 parameters.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_MAGIC = b"AOSDOCS1"
+# magic, buckets, chunks, postings, text bytes, meta bytes. Then, in native byte order (the
+# index is a local build artifact, not an interchange format): bucket offsets u32[buckets+1],
+# chunk ids u32[postings], weights f32[postings], source of each chunk u32[chunks], text
+# offsets u32[chunks+1], the UTF-8 chunk texts and the JSON meta.
+_HEADER = struct.Struct("=8sIIIII")
+_WORD = re.compile(r"\w+")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+# Words too common to say anything about a chunk.
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be been before being but by can could did do
+does for from get got had has have hello hey hi how i if in into is it its just me more most
+my no not now of ok okay on or our out please should so some than thanks that the their
+them then there these they this to too up very was we were what when where which who why
+will with would yes you your
+""".split())
+
+
+# numpy once resolved, or False when it is not installed
+_np: Any = None
+
+
+def _numpy() -> Any:
+    global _np
+    if _np is None:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = False
+    return _np or None
+
+
+class Hit:
+    __slots__ = ("source", "text", "score")
+
+    def __init__(self, source: str, text: str, score: float) -> None:
+        self.source = source
+        self.text = text
+        self.score = score
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"source": self.source, "text": self.text, "score": self.score}
+
+
+def terms(text: str) -> List[str]:
+    return [w for w in _WORD.findall(text.casefold()) if w not in STOPWORDS]
+
+
+def _bucket(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8")) & (HASH_BUCKETS - 1)
+
+
+def chunk_text(text: str, max_chars: int = CHUNK_CHARS) -> List[str]:
+    """Split ``text`` at paragraph (or, for long paragraphs, line) breaks into chunks of about ``max_chars``."""
+    pieces: List[str] = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+        else:
+            pieces.extend(line.strip() for line in paragraph.splitlines())
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if not piece:
+            continue
+        if current and len(current) + len(piece) + 2 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _doc_files(docs_dir: str) -> List[str]:
+    if not os.path.isdir(docs_dir):
+        return []
+    return sorted(name for name in os.listdir(docs_dir)
+                  if name.lower().endswith(DOC_SUFFIXES) and os.path.isfile(os.path.join(docs_dir, name)))
+
+
+def fingerprint(docs_dir: str) -> List[List[Any]]:
+    """(name, size, mtime) of every indexed file; an index built from other values is stale."""
+    result = []
+    for name in _doc_files(docs_dir):
+        st = os.stat(os.path.join(docs_dir, name))
+        result.append([name, st.st_size, st.st_mtime_ns])
+    return result
+
+
+def build_index(docs_dir: str, index_path: str, chunk_chars: int = CHUNK_CHARS) -> int:
+    """Chunk and index every doc in ``docs_dir`` into ``index_path``; returns the number of chunks."""
+    sources = fingerprint(docs_dir)
+    chunks: List[Tuple[str, str]] = []
+    for name, _, _ in sources:
+        with open(os.path.join(docs_dir, name), "r", encoding="utf-8", errors="replace") as f:
+            chunks.extend((name, chunk) for chunk in chunk_text(f.read(), chunk_chars))
+
+    counts = [Counter(_bucket(t) for t in terms(text)) for _, text in chunks]
+    lengths = [sum(c.values()) for c in counts]
+    avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+    postings: Dict[int, List[Tuple[int, float]]] = defaultdict(list)
+    for chunk_id, counter in enumerate(counts):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[chunk_id] / avg_length)
+        for bucket, tf in counter.items():
+            postings[bucket].append((chunk_id, tf * (BM25_K1 + 1) / (tf + norm)))
+
+    n = len(chunks)
+    offsets = array("I", [0]) * (HASH_BUCKETS + 1)
+    ids, weights = array("I"), array("f")
+    for bucket in range(HASH_BUCKETS):
+        entries = postings.get(bucket, ())
+        if entries:
+            idf = math.log(1 + (n - len(entries) + 0.5) / (len(entries) + 0.5))
+            for chunk_id, weight in entries:
+                ids.append(chunk_id)
+                weights.append(idf * weight)
+        offsets[bucket + 1] = len(ids)
+
+    source_ids = {name: i for i, (name, _, _) in enumerate(sources)}
+    chunk_sources = array("I", [source_ids[name] for name, _ in chunks])
+    texts = [text.encode("utf-8") for _, text in chunks]
+    text_offsets = array("I", [0])
+    for text in texts:
+        text_offsets.append(text_offsets[-1] + len(text))
+    blob = b"".join(texts)
+    meta = json.dumps({"sources": sources}, ensure_ascii=False).encode("utf-8")
+    directory = os.path.dirname(os.path.abspath(index_path))
+    os.makedirs(directory, exist_ok=True)
+    # Written aside and renamed, so processes that have the old index mapped keep reading it.
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".docs-index-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, HASH_BUCKETS, n, len(ids), len(blob), len(meta)))
+            for section in (offsets, ids, weights, chunk_sources, text_offsets):
+                f.write(section.tobytes())
+            f.write(blob)
+            f.write(meta)
+            # mkstemp creates the file 0600; the index is readable by every user, like any other build output.
+            os.fchmod(f.fileno(), 0o644)
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return n
+
+
+class KnowledgeBase:
+    """A built index, memory-mapped read-only."""
+
+    def __init__(self, index_path: str) -> None:
+        self.path = index_path
+        with open(index_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        if self._map is None or size < _HEADER.size:
+            raise ValueError(f"Not a docs index: {index_path}")
+        magic, buckets, n, postings, text_len, meta_len = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or buckets != HASH_BUCKETS:
+            raise ValueError(f"Not a docs index (or an older format): {index_path}")
+        offsets_at = _HEADER.size
+        ids_at = offsets_at + 4 * (buckets + 1)
+        weights_at = ids_at + 4 * postings
+        sources_at = weights_at + 4 * postings
+        texts_at = sources_at + 4 * n
+        blob_at = texts_at + 4 * (n + 1)
+        meta_at = blob_at + text_len
+        if size != meta_at + meta_len:
+            raise ValueError(f"Truncated docs index: {index_path}")
+        self.sources: List[List[Any]] = json.loads(self._map[meta_at:])["sources"]
+        self._n = n
+        self._blob_at = blob_at
+        # Memoryviews for reading an item at a time (faster than NumPy at that), arrays for bulk scoring.
+        view = memoryview(self._map)
+        self._offsets = view[offsets_at:ids_at].cast("I")
+        self._ids = view[ids_at:weights_at].cast("I")
+        self._weights = view[weights_at:sources_at].cast("f")
+        self._chunk_sources = view[sources_at:texts_at].cast("I")
+        self._text_offsets = view[texts_at:blob_at].cast("I")
+        np = self._np = _numpy()
+        if np is not None:
+            self._id_array = np.frombuffer(self._map, dtype=np.uint32, count=postings, offset=ids_at)
+            self._weight_array = np.frombuffer(self._map, dtype=np.float32, count=postings, offset=weights_at)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def chunk(self, i: int) -> Tuple[str, str]:
+        """(source file, text) of chunk ``i``."""
+        start = self._blob_at + self._text_offsets[i]
+        end = self._blob_at + self._text_offsets[i + 1]
+        return self.sources[self._chunk_sources[i]][0], self._map[start:end].decode("utf-8")
+
+    def search(self, query: str, k: int = 3) -> List[Hit]:
+        """The ``k`` best chunks for ``query`` by BM25, best first; chunks sharing no word with it never match."""
+        buckets = sorted({_bucket(t) for t in terms(query)})
+        if not buckets or k <= 0 or not self._n:
+            return []
+        offsets = self._offsets
+        spans = [(offsets[b], offsets[b + 1]) for b in buckets]
+        np = self._np
+        if np is not None and sum(e - s for s, e in spans) >= VECTORIZE_MIN_POSTINGS:
+            ids = np.concatenate([self._id_array[s:e] for s, e in spans])
+            weights = np.concatenate([self._weight_array[s:e] for s, e in spans])
+            scores = np.bincount(ids, weights=weights, minlength=self._n)
+            top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+            ranked = sorted(((float(scores[i]), int(i)) for i in top if scores[i] > 0), key=lambda p: (-p[0], p[1]))
+        else:
+            totals: Dict[int, float] = defaultdict(float)
+            ids, weights = self._ids, self._weights
+            for s, e in spans:
+                for i in range(s, e):
+                    totals[ids[i]] += weights[i]
+            ranked = heapq.nsmallest(k, ((score, i) for i, score in totals.items()), key=lambda p: (-p[0], p[1]))
+        return [Hit(*self.chunk(i), score) for score, i in ranked]
+
+
+def load_knowledge_base(docs_dir: str, index_path: str) -> Optional[KnowledgeBase]:
+    """
+    Open the index at ``index_path``, (re)building it first if ``docs_dir`` changed.
+    None if there are no docs, or no index and it cannot be written.
+    """
+    current = fingerprint(docs_dir)
+    if not current:
+        return None
+    if os.path.exists(index_path):
+        try:
+            kb = KnowledgeBase(index_path)
+            if kb.sources == current:
+                return kb
+        except (ValueError, OSError):
+            pass
+    try:
+        build_index(docs_dir, index_path)
+    except OSError as e:
+        logger.warning("docs index %s could not be built: %s", index_path, e)
+        return None
+    return KnowledgeBase(index_path)
+
+
+def format_context(hits: Sequence[Hit], max_chars: int) -> str:
+    """Hits as a system message for the prompt, best first, cut at ``max_chars``."""
+    parts = ["Relevant excerpts from the AdultingOS knowledge base (use them if they help):"]
+    used = len(parts[0])
+    for hit in hits:
+        part = f"[{hit.source}]\n{hit.text}"
+        if used + len(part) + 2 > max_chars:
+            part = part[: max(0, max_chars - used - 2)].rstrip()
+            if len(part) <= len(hit.source) + 3:
+                break
+        parts.append(part)
+        used += len(part) + 2
+    return "\n\n".join(parts) if len(parts) > 1 else ""
+
+
+_kb: Optional[KnowledgeBase] = None
+_kb_checked = False
+_kb_lock = threading.Lock()
+
+
+def get_knowledge_base() -> Optional[KnowledgeBase]:
+    """The shared knowledge base from settings, loaded (or built) on first use. None without docs."""
+    global _kb, _kb_checked
+    if not _kb_checked:
+        with _kb_lock:
+            if not _kb_checked:
+                from backend.src.settings import get_settings
+
+                settings = get_settings()
+                _kb = load_knowledge_base(settings.docs_dir, settings.docs_index_path)
+                _kb_checked = True
+    return _kb
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    from backend.src.settings import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Build the docs retrieval index.")
+    parser.add_argument("--docs", default=settings.docs_dir, help="directory of .txt/.md docs")
+    parser.add_argument("--index", default=settings.docs_index_path, help="index file to write")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    n = build_index(args.docs, args.index)
+    print(f"indexed {n} chunks from {len(fingerprint(args.docs))} docs into {args.index} "
+          f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
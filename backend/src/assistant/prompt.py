@@ -0,0 +1,212 @@
+"""
+Token-budgeted prompt assembly for assistant turns.
+
+The prompt is the system prompt, then any retrieved context (excerpts from the
+docs knowledge base), then (if needed) a summary of the older part of the
+conversation, then as many of the most recent history turns as fit in the
+budget, then the new user message. Turns are never split: the newest turns
+are kept verbatim and everything older than the first turn that does not fit
+is folded into the summary.
+
+The summary is extractive (the gist of each older turn, newest kept when it
+must be trimmed), so building it needs no extra model call. Summaries are
+cached by the position they reach in the conversation: the conversation id and
+message sequence number for server-side conversations, so the key still
+matches after the stored window has slid past older messages, or else a
+rolling hash of the prefix they cover. The next turn extends the cached
+summary with only the turns that have since scrolled out of the prompt, and
+drops lines for messages that are no longer in the history.
+
+Token counts are estimates (about four characters per token plus a small
+per-message overhead), which is close enough for budgeting across providers.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from backend.src.assistant.cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+# Role markers and separators each message costs on top of its text.
+MESSAGE_OVERHEAD_TOKENS = 4
+# Characters of an older turn kept in its summary line.
+SUMMARY_LINE_CHARS = 160
+SUMMARY_HEADER = "Summary of the earlier conversation (oldest first):"
+
+Message = Dict[str, str]
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def message_tokens(message: Message) -> int:
+    return estimate_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+
+class PromptStats:
+    """Size of one assembled prompt, for logging and metrics."""
+
+    __slots__ = ("budget", "tokens", "context_tokens", "history_turns", "kept_turns", "summarized_turns",
+                 "summary_cached")
+
+    def __init__(self, budget: int) -> None:
+        self.budget = budget
+        self.tokens = 0
+        self.context_tokens = 0
+        self.history_turns = 0
+        self.kept_turns = 0
+        self.summarized_turns = 0
+        # The summary was a cached one, possibly extended with newly summarized turns.
+        self.summary_cached = False
+
+    @property
+    def over_budget(self) -> bool:
+        return self.tokens > self.budget
+
+
+class PromptBuilder:
+    """Builds prompts that fit ``budget_tokens``, with at most ``summary_tokens`` spent on the summary."""
+
+    def __init__(self, budget_tokens: int = 3000, summary_tokens: int = 400,
+                 cache: Optional[ResponseCache] = None) -> None:
+        self.budget_tokens = budget_tokens
+        self.summary_tokens = summary_tokens
+        self.cache = cache if cache is not None else ResponseCache(maxsize=1024)
+
+    def build(self, system_prompt: str, history: Sequence[Message], text: str, context: Optional[str] = None,
+              conversation: Optional[Tuple[str, int]] = None) -> Tuple[List[Message], PromptStats]:
+        """
+        The messages to send and their stats. ``conversation`` is the id of a
+        server-side conversation and the sequence number of ``history[0]`` in it.
+        """
+        stats = PromptStats(self.budget_tokens)
+        stats.history_turns = len(history)
+        system = {"role": "system", "content": system_prompt}
+        user = {"role": "user", "content": text}
+        # The system prompt, context and new message always go in, even if they alone exceed the budget.
+        available = self.budget_tokens - message_tokens(system) - message_tokens(user)
+        if context:
+            stats.context_tokens = message_tokens({"content": context})
+            available -= stats.context_tokens
+
+        costs = [message_tokens(m) for m in history]
+        if sum(costs) <= available:
+            kept_from = 0
+        else:
+            kept_from = _fit_suffix(costs, available - self.summary_tokens)
+
+        kept_tokens = sum(costs[kept_from:])
+        messages = [system]
+        if context:
+            messages.append({"role": "system", "content": context})
+        stats.tokens = self.budget_tokens - available + kept_tokens
+        if kept_from:
+            summary, stats.summary_cached = self._summary(history, kept_from, conversation)
+            summary = _trim_summary(summary, min(self.summary_tokens, available - kept_tokens))
+            if summary:
+                messages.append({"role": "system", "content": summary})
+                stats.tokens += message_tokens(messages[-1])
+            stats.summarized_turns = kept_from
+        messages.extend({"role": m["role"], "content": m["content"]} for m in history[kept_from:])
+        messages.append(user)
+        stats.kept_turns = len(history) - kept_from
+        logger.info(
+            "prompt: %d/%d tokens (%d context), %d history turns (%d kept, %d summarized%s)%s",
+            stats.tokens, stats.budget, stats.context_tokens, stats.history_turns, stats.kept_turns, stats.summarized_turns,
+            ", cached" if stats.summary_cached else "", ", over budget" if stats.over_budget else "",
+        )
+        return messages, stats
+
+    def _summary(self, history: Sequence[Message], end: int,
+                 conversation: Optional[Tuple[str, int]]) -> Tuple[str, bool]:
+        """Summary of ``history[:end]``, extending the longest cached prefix summary."""
+        if conversation is not None:
+            conversation_id, first_seq = conversation
+            keys = [f"prompt-summary:{conversation_id}:{first_seq + i}" for i in range(1, end + 1)]
+        else:
+            keys = _prefix_keys(history, end)
+        start, summary, cached = 0, "", False
+        for i in range(end, 0, -1):
+            found = self.cache.get(keys[i - 1])
+            if found is not None:
+                # Cached before the window slid, it may reach back past history[0].
+                start, summary, cached = i, _keep_newest_lines(found, i), True
+                break
+        if start == end:
+            return summary, cached
+        # Newest first, stopping once the summary is full: older lines would be trimmed anyway.
+        budget = self.summary_tokens - MESSAGE_OVERHEAD_TOKENS - estimate_tokens(SUMMARY_HEADER + "\n")
+        new_lines: List[str] = []
+        for message in reversed(history[start:end]):
+            line = _summary_line(message)
+            cost = estimate_tokens(line + "\n")
+            if cost > budget:
+                summary = ""
+                break
+            budget -= cost
+            new_lines.append(line)
+        # Trimming keeps the newest lines, so extending a trimmed summary gives the
+        # same result as summarizing the whole prefix again.
+        summary = _trim_summary("\n".join([summary or SUMMARY_HEADER] + new_lines[::-1]), self.summary_tokens)
+        self.cache.set(keys[end - 1], summary)
+        return summary, cached
+
+
+def _fit_suffix(costs: Sequence[int], available: int) -> int:
+    """Index of the oldest turn in the longest suffix of ``costs`` that fits in ``available``."""
+    total = 0
+    for i in range(len(costs) - 1, -1, -1):
+        total += costs[i]
+        if total > available:
+            return i + 1
+    return 0
+
+
+def _prefix_keys(history: Sequence[Message], end: int) -> List[str]:
+    """Rolling hashes: ``keys[i]`` identifies the conversation ``history[: i + 1]``."""
+    keys = []
+    digest = hashlib.sha256()
+    for message in history[:end]:
+        digest.update(message.get("role", "").encode("utf-8") + b"\x00")
+        digest.update((message.get("content") or "").encode("utf-8") + b"\x01")
+        keys.append("prompt-summary:" + digest.copy().hexdigest())
+    return keys
+
+
+def _keep_newest_lines(summary: str, count: int) -> str:
+    """``summary`` with at most its ``count`` newest lines (one per summarized message)."""
+    header, _, body = summary.partition("\n")
+    lines = body.split("\n") if body else []
+    if len(lines) <= count:
+        return summary
+    return "\n".join([header] + lines[len(lines) - count:]) if count else ""
+
+
+def _summary_line(message: Message) -> str:
+    content = " ".join((message.get("content") or "")[: SUMMARY_LINE_CHARS * 2].split())
+    if len(content) > SUMMARY_LINE_CHARS:
+        content = content[: SUMMARY_LINE_CHARS - 1].rstrip() + "…"
+    return f"- {message.get('role', 'user')}: {content}"
+
+
+def _trim_summary(summary: str, max_tokens: int) -> str:
+    """Drop the oldest summary lines until the summary message fits ``max_tokens``."""
+    if max_tokens <= MESSAGE_OVERHEAD_TOKENS or not summary:
+        return ""
+    header, _, body = summary.partition("\n")
+    lines = body.split("\n") if body else []
+    budget = max_tokens - MESSAGE_OVERHEAD_TOKENS - estimate_tokens(header + "\n")
+    kept: List[str] = []
+    for line in reversed(lines):
+        cost = estimate_tokens(line + "\n")
+        if cost > budget:
+            break
+        budget -= cost
+        kept.append(line)
+    if not kept:
+        return ""
+    return "\n".join([header] + kept[::-1])
@@ -0,0 +1,139 @@
+"""
+Offline "replay" model provider (``MODEL_PROVIDER=replay``).
+
+Replies come from a cassette of recorded exchanges, keyed by a hash of the
+normalized messages, so the same conversation always gets the same answer. A
+prompt missing from the cassette gets a synthetic reply generated from that
+hash, so it is just as deterministic. Either way the reply is paced like a real
+model: ``latency_ms`` before the first token, then ``tokens_per_second``.
+
+Cassettes are JSON lines, one exchange per line::
+
+    {"messages": [...], "reply": "...", "provider": "openai", "model": "gpt-4o-mini", "seconds": 1.84}
+
+With ``REPLAY_RECORD=true`` a client using a real provider appends every reply
+it receives to ``REPLAY_CASSETTE``; point a later run at the same file with
+``MODEL_PROVIDER=replay`` to play the traffic back without a network.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+from backend.src.assistant.cache import cache_key
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"\S+\s*")
+_WORDS = (
+    "start", "with", "the", "deadline", "that", "is", "closest", "then", "set", "a", "reminder", "for",
+    "your", "rent", "bills", "and", "paperwork", "so", "nothing", "slips", "book", "appointments", "early",
+    "keep", "receipts", "in", "one", "folder", "review", "budget", "weekly", "check", "insurance", "renewal",
+)
+
+
+def cassette_key(messages: List[Dict[str, str]]) -> str:
+    """Hash of the normalized messages; independent of the provider that recorded them."""
+    return cache_key("cassette", "", 0.0, messages)
+
+
+class Cassette:
+    """Recorded replies by message hash, loaded from and appended to a JSON-lines file."""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._replies: Dict[str, str] = {}
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def __len__(self) -> int:
+        return len(self._replies)
+
+    def get(self, messages: List[Dict[str, str]]) -> Optional[str]:
+        return self._replies.get(cassette_key(messages))
+
+    def record(self, messages: List[Dict[str, str]], reply: str, provider: str = "", model: str = "",
+               seconds: float = 0.0) -> None:
+        entry = {"messages": messages, "reply": reply, "provider": provider, "model": model,
+                 "seconds": round(seconds, 3)}
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._replies[cassette_key(messages)] = reply
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+
+    def _load(self, path: str) -> None:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    self._replies[cassette_key(entry["messages"])] = entry["reply"]
+                except (ValueError, KeyError, TypeError):
+                    # A torn last line from an interrupted recording; keep the rest.
+                    logger.warning("Skipping unreadable cassette entry %s:%d", path, line_no)
+
+
+class ReplayProvider:
+    """Serves cassette replies (or synthetic ones) with model-like latency and token pacing."""
+
+    def __init__(
+        self,
+        cassette: Optional[Cassette] = None,
+        latency_ms: float = 200.0,
+        tokens_per_second: float = 50.0,
+        reply_tokens: int = 60,
+    ) -> None:
+        self.cassette = cassette if cassette is not None else Cassette()
+        self.latency = max(latency_ms, 0.0) / 1000.0
+        self.token_interval = 1.0 / tokens_per_second if tokens_per_second > 0 else 0.0
+        self.reply_tokens = reply_tokens
+        self.replayed = 0
+        self.synthesized = 0
+
+    def reply_for(self, messages: List[Dict[str, str]]) -> str:
+        reply = self.cassette.get(messages)
+        if reply is not None:
+            self.replayed += 1
+            return reply
+        self.synthesized += 1
+        return synthesize(cassette_key(messages), self.reply_tokens)
+
+    def duration(self, reply: str) -> float:
+        """Seconds a complete reply takes: first-token latency plus one interval per token."""
+        return self.latency + self.token_interval * len(_TOKEN.findall(reply))
+
+    def chat(self, messages: List[Dict[str, str]]) -> str:
+        reply = self.reply_for(messages)
+        time.sleep(self.duration(reply))
+        return reply
+
+    async def achat(self, messages: List[Dict[str, str]]) -> str:
+        reply = self.reply_for(messages)
+        await asyncio.sleep(self.duration(reply))
+        return reply
+
+    async def astream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        reply = self.reply_for(messages)
+        await asyncio.sleep(self.latency)
+        for token in _TOKEN.findall(reply):
+            if self.token_interval:
+                await asyncio.sleep(self.token_interval)
+            yield token
+
+
+def synthesize(key: str, tokens: int) -> str:
+    """A deterministic, vaguely on-topic reply of ``tokens`` words for a message hash."""
+    rng = random.Random(key)
+    words = [rng.choice(_WORDS) for _ in range(max(tokens, 1))]
+    return " ".join(words).capitalize() + "."
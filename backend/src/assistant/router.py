@@ -1,21 +1,70 @@
 """
 FastAPI router exposing:
-- POST /assistant/chat  => chat with LLM and handle slash-commands
+- POST /assistant/chat         => chat with LLM and handle slash-commands
+- POST /assistant/chat/stream  => same, streamed as Server-Sent Events
+
+LLM turns are grounded with the docs knowledge base excerpts most relevant to
+the message (see knowledge.py); ``/docs search`` shows them directly.
 """
 from __future__ import annotations
 
-from typing import List, Optional, Literal
+import asyncio
+import json
+import threading
+from typing import Any, AsyncIterator, Awaitable, List, Optional, Literal, Tuple
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 
+from backend.src import metrics
+from backend.src.assistant.cache import ResponseCache
 from backend.src.assistant.client import LLMClient
-from backend.src.assistant.tools import list_tasks, create_task, complete_task
+from backend.src.assistant.conversations import ConversationStore
+from backend.src.assistant.knowledge import Hit, format_context, get_knowledge_base
+from backend.src.assistant.prompt import PromptBuilder
+from backend.src.assistant.tools import list_tasks, create_task, complete_task, search_tasks
+from backend.src.eligibility import ELIGIBLE, rules as benefit_rules
+from backend.src.models import Task
 from backend.src.settings import get_settings
 
 router = APIRouter()
 settings = get_settings()
-llm = LLMClient()
+
+# Created on the first LLM turn, not at import, so cold starts that only serve
+# /tasks or slash-commands never load the provider SDK.
+_llm: Optional[LLMClient] = None
+_llm_lock = threading.Lock()
+
+prompt_builder = PromptBuilder(
+    budget_tokens=settings.prompt_budget_tokens,
+    summary_tokens=settings.prompt_summary_tokens,
+    cache=ResponseCache(maxsize=settings.prompt_summary_cache_size),
+)
+
+# Recent messages per conversation, so clients send only the new one.
+conversations = ConversationStore(
+    max_conversations=settings.conversation_max,
+    max_turns=settings.conversation_turns,
+    idle_ttl_seconds=settings.conversation_ttl_seconds,
+    path=settings.conversation_store_path,
+)
+
+# How often a pending LLM call checks whether the client went away.
+DISCONNECT_POLL_SECONDS = 0.5
+# Characters of each chunk shown by /docs search.
+DOCS_EXCERPT_CHARS = 300
+# /benefits flag -> eligibility profile field
+BENEFITS_FLAGS = {
+    "--student": "is_student",
+    "--income": "income",
+    "--home": "rent_or_own",
+    "--married": "is_married",
+    "--loans": "has_student_loans",
+    "--hdhp": "has_hdhp",
+}
+BENEFITS_USAGE = "Usage: /benefits --student yes --income 35000 --home rent --married no [--loans yes] [--hdhp yes]"
 
 
 class ChatMessage(BaseModel):
@@ -26,42 +75,194 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     user_id: Optional[str] = None
     message: str
+    # Returned by the previous reply; the server remembers the conversation's recent messages.
+    conversation_id: Optional[str] = Field(None, max_length=128)
+    # Legacy clients may send the history themselves instead (used as-is, not stored).
     history: Optional[List[ChatMessage]] = None
     mode: Literal["auto", "chat_only", "tools_only"] = "auto"
+    # Set to false to skip the response cache for this request
+    use_cache: bool = True
 
 
 class ChatResponse(BaseModel):
     reply: str
+    conversation_id: Optional[str] = None
 
 
 @router.post("/assistant/chat", response_model=ChatResponse)
-def chat(req: ChatRequest) -> ChatResponse:
+async def chat(req: ChatRequest, request: Request) -> ChatResponse:
     text = req.message.strip()
 
     if text.startswith("/"):
-        reply = _handle_command(text)
-        return ChatResponse(reply=reply)
+        # Tools do blocking file I/O; keep it off the event loop.
+        reply = await run_in_threadpool(_handle_command, text)
+        return ChatResponse(reply=reply, conversation_id=req.conversation_id)
 
     if req.mode == "tools_only":
         raise HTTPException(status_code=400, detail="Tools-only mode requires a slash-command.")
 
-    messages: List[dict] = [{"role": "system", "content": settings.system_prompt}]
-    if req.history:
-        messages.extend([m.dict() for m in req.history[-8:]])
-    messages.append({"role": "user", "content": text})
+    llm = _require_llm()
+    conversation_id, history, first_seq = await _open_conversation(req)
+    messages = _build_messages(history, text, conversation_id, first_seq)
+    reply = await _cancel_on_disconnect(request, llm.achat(messages, use_cache=req.use_cache))
+    await _remember_turn(req, conversation_id, text, reply)
+    return ChatResponse(reply=reply, conversation_id=conversation_id)
+
+
+@router.post("/assistant/chat/stream")
+async def chat_stream(req: ChatRequest) -> StreamingResponse:
+    """
+    Stream the reply as SSE: ``data: {"delta": "..."}`` events, then ``event: done``
+    carrying ``{"conversation_id": ...}``. Slash-command replies arrive as a single delta.
+    """
+    text = req.message.strip()
+    conversation_id, history, first_seq = req.conversation_id, [], 0
+
+    if not text.startswith("/"):
+        if req.mode == "tools_only":
+            raise HTTPException(status_code=400, detail="Tools-only mode requires a slash-command.")
+        _require_llm()  # fail with a status code before the stream starts
+        conversation_id, history, first_seq = await _open_conversation(req)
+
+    # Starlette cancels the generator (and the provider request) if the client disconnects.
+    return StreamingResponse(
+        _stream_events(req, text, conversation_id, history, first_seq),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def get_llm() -> LLMClient:
+    """The shared LLM client, created on first use. Raises RuntimeError if the provider is misconfigured."""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                _llm = LLMClient()
+    return _llm
+
+
+async def load_docs() -> None:
+    """
+    Open the docs index off the event loop, so the first turn does not wait for it.
+    Deploys should build it beforehand (``python -m backend.src.assistant.knowledge``);
+    a missing or stale index is rebuilt here as a fallback.
+    """
+    if settings.docs_context_tokens > 0:
+        await run_in_threadpool(get_knowledge_base)
+
+
+async def close_llm() -> None:
+    """Release the client's pooled connections, if it was ever created."""
+    if _llm is not None:
+        await _llm.aclose()
+
+
+def _require_llm() -> LLMClient:
+    try:
+        return get_llm()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+async def _open_conversation(req: ChatRequest) -> Tuple[Optional[str], List[dict], int]:
+    """The conversation id, the history to build the prompt from and the sequence number of its first message."""
+    if req.history is not None and req.conversation_id is None:
+        return None, [m.model_dump() for m in req.history], 0
+    if conversations.persistent:
+        return await run_in_threadpool(conversations.open_window, req.conversation_id, req.user_id)
+    return conversations.open_window(req.conversation_id, req.user_id)
+
+
+async def _remember_turn(req: ChatRequest, conversation_id: Optional[str], text: str, reply: str) -> None:
+    if conversation_id is None:
+        return
+    turns = [("user", text), ("assistant", reply)]
+    if conversations.persistent:
+        await run_in_threadpool(conversations.append, conversation_id, turns, req.user_id)
+    else:
+        conversations.append(conversation_id, turns, req.user_id)
 
-    reply = llm.chat(messages)
-    return ChatResponse(reply=reply)
+
+def _build_messages(history: List[dict], text: str, conversation_id: Optional[str] = None,
+                    first_seq: int = 0) -> List[dict]:
+    conversation = (conversation_id, first_seq) if conversation_id is not None else None
+    messages, stats = prompt_builder.build(settings.system_prompt, history, text, context=_docs_context(text),
+                                           conversation=conversation)
+    metrics.PROMPT_TOKENS.observe(stats.tokens)
+    if stats.summarized_turns:
+        metrics.PROMPT_SUMMARIZED_TURNS.inc(amount=stats.summarized_turns)
+    return messages
+
+
+def _docs_context(text: str) -> Optional[str]:
+    """Knowledge-base excerpts relevant to ``text`` (only those scoring DOCS_MIN_SCORE or more)."""
+    if settings.docs_context_tokens <= 0:
+        return None
+    kb = get_knowledge_base()
+    if kb is None:
+        return None
+    hits = [h for h in kb.search(text, settings.docs_top_k) if h.score >= settings.docs_min_score]
+    return format_context(hits, settings.docs_context_tokens * 4) or None
+
+
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+async def _stream_events(
+    req: ChatRequest, text: str, conversation_id: Optional[str], history: List[dict], first_seq: int = 0
+) -> AsyncIterator[str]:
+    try:
+        if text.startswith("/"):
+            yield _sse({"delta": await run_in_threadpool(_handle_command, text)})
+        else:
+            chunks: List[str] = []
+            messages = _build_messages(history, text, conversation_id, first_seq)
+            async for chunk in get_llm().astream(messages, use_cache=req.use_cache):
+                chunks.append(chunk)
+                yield _sse({"delta": chunk})
+            # Only a completed reply joins the conversation; a cancelled stream never gets here.
+            await _remember_turn(req, conversation_id, text, "".join(chunks))
+    except Exception as e:  # noqa: BLE001 - headers are already sent; report in-band
+        yield _sse({"detail": str(e)}, event="error")
+        return
+    yield _sse({"conversation_id": conversation_id}, event="done")
+
+
+async def _cancel_on_disconnect(request: Request, call: Awaitable[Any]) -> Any:
+    """Await ``call``, cancelling it if the HTTP client disconnects first."""
+    task = asyncio.ensure_future(call)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                # Nobody is listening; 499 mirrors nginx's "client closed request".
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
 
 
 def _handle_command(text: str) -> str:
     parts = text.split()
+    if parts and parts[0] == "/docs":
+        return _handle_docs_command(text, parts)
+    if parts and parts[0] == "/benefits":
+        return _handle_benefits_command(text)
     if len(parts) < 2 or parts[0] != "/task":
         return (
             "Unknown command. Try:\n"
             "/task list\n"
+            "/task search <words>\n"
             "/task add \"Title\" --desc \"...\" --cat \"...\" --due 2025-12-31 --priority 2 --tags home,finance\n"
-            "/task done <task_id>"
+            "/task done <task_id>\n"
+            "/docs search <words>\n"
+            "/benefits --student yes --income 35000 --home rent --married no"
         )
 
     sub = parts[1].lower()
@@ -69,12 +270,16 @@ def _handle_command(text: str) -> str:
         tasks = list_tasks(show_completed=True)
         if not tasks:
             return "No tasks yet."
-        lines = []
-        for t in tasks:
-            status = "✔" if t.completed else "•"
-            due = f" (due {t.due_date.date()})" if t.due_date else ""
-            lines.append(f"{status} {t.title} [{t.id}] {due} [prio {t.priority}]")
-        return "\n".join(lines)
+        return "\n".join(_format_task(t) for t in tasks)
+
+    if sub == "search":
+        query = text.split(None, 2)[2] if len(parts) > 2 else ""
+        if not query.strip():
+            return "Usage: /task search <words>"
+        tasks = search_tasks(query)
+        if not tasks:
+            return f'No tasks match "{query.strip()}".'
+        return "\n".join(_format_task(t) for t in tasks)
 
     if sub == "done":
         if len(parts) < 3:
@@ -121,6 +326,47 @@ def _handle_command(text: str) -> str:
     return "Unknown /task subcommand."
 
 
+def _handle_docs_command(text: str, parts: List[str]) -> str:
+    if len(parts) < 3 or parts[1].lower() != "search":
+        return "Usage: /docs search <words>"
+    query = text.split(None, 2)[2]
+    kb = get_knowledge_base()
+    hits = kb.search(query, settings.docs_top_k) if kb is not None else []
+    if not hits:
+        return f'No docs match "{query.strip()}".'
+    return "\n\n".join(_format_hit(h) for h in hits)
+
+
+def _handle_benefits_command(text: str) -> str:
+    profile = {field: _extract_flag(text, flag) for flag, field in BENEFITS_FLAGS.items()}
+    if all(value is None for value in profile.values()):
+        return BENEFITS_USAGE
+    matches = benefit_rules.matches(profile)
+    if not matches:
+        return "No programs match that profile."
+    flags = {field: flag for flag, field in BENEFITS_FLAGS.items()}
+    lines = []
+    for m in matches:
+        if m.status == ELIGIBLE:
+            lines.append(f"✔ {m.name}: {m.summary}")
+        else:
+            lines.append(f"? {m.name}: {m.summary} (depends on {', '.join(flags[f] for f in m.missing)})")
+    return "\n".join(lines)
+
+
+def _format_hit(hit: Hit) -> str:
+    excerpt = " ".join(hit.text.split())
+    if len(excerpt) > DOCS_EXCERPT_CHARS:
+        excerpt = excerpt[:DOCS_EXCERPT_CHARS].rstrip() + "…"
+    return f"{hit.source} (score {hit.score:.1f}):\n{excerpt}"
+
+
+def _format_task(t: Task) -> str:
+    status = "✔" if t.completed else "•"
+    due = f" (due {t.due_date.date()})" if t.due_date else ""
+    return f"{status} {t.title} [{t.id}] {due} [prio {t.priority}]"
+
+
 def _extract_flag(text: str, flag: str) -> Optional[str]:
     if flag not in text:
         return None
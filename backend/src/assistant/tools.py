@@ -1,56 +1,33 @@
 """
 Deterministic tools the assistant can call via slash-commands.
-Backed by a simple JSON file so it's easy to understand and extend.
+Backed by the shared task repository (see repository.py), so tasks added here
+show up under /tasks and vice versa.
 """
 from __future__ import annotations
 
-import json
-import os
 import uuid
 from datetime import datetime
-from typing import List, Optional
-
-from pydantic import ValidationError
+from typing import Dict, Iterable, List, Optional
 
 from backend.src.models import Task
+from backend.src.repository import get_repository
+
 
+def _load_tasks() -> List[Task]:
+    return list(get_repository().iter_tasks())
 
-DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
-TASKS_FILE = os.path.join(DATA_DIR, "tasks.json")
 
-os.makedirs(DATA_DIR, exist_ok=True)
-if not os.path.exists(TASKS_FILE):
-    with open(TASKS_FILE, "w", encoding="utf-8") as f:
-        json.dump([], f)
+def _save_tasks(tasks: Iterable[Task]) -> None:
+    # Full rewrite; single-task changes go through repository.put instead.
+    get_repository().replace_all(tasks)
 
 
-def _load_tasks() -> List[Task]:
-    with open(TASKS_FILE, "r", encoding="utf-8") as f:
-        raw = json.load(f)
-    tasks: List[Task] = []
-    for item in raw:
-        try:
-            if isinstance(item.get("due_date"), str):
-                try:
-                    item["due_date"] = datetime.fromisoformat(item["due_date"]).replace(tzinfo=None)
-                except Exception:
-                    item["due_date"] = None
-            tasks.append(Task(**item))
-        except ValidationError:
-            # Skip invalid entries rather than crashing
-            continue
-    return tasks
-
-
-def _save_tasks(tasks: List[Task]) -> None:
-    serializable = []
-    for t in tasks:
-        item = t.model_dump() if hasattr(t, "model_dump") else t.dict()  # pydantic v2|v1
-        if isinstance(item.get("due_date"), datetime):
-            item["due_date"] = item["due_date"].isoformat()
-        serializable.append(item)
-    with open(TASKS_FILE, "w", encoding="utf-8") as f:
-        json.dump(serializable, f, indent=2)
+def cache_stats() -> Dict[str, int]:
+    """How often journal reads were served from memory vs. reloaded from disk (journal store only)."""
+    journal = getattr(get_repository(), "journal", None)
+    if journal is None:
+        return {"hits": 0, "misses": 0}
+    return {"hits": journal.hits, "misses": journal.misses}
 
 
 def list_tasks(show_completed: bool = True) -> List[Task]:
@@ -60,6 +37,10 @@ def list_tasks(show_completed: bool = True) -> List[Task]:
     return [t for t in tasks if not t.completed]
 
 
+def search_tasks(query: str, limit: int = 20) -> List[Task]:
+    return get_repository().search(query, limit=limit)
+
+
 def create_task(
     title: str,
     description: Optional[str] = None,
@@ -68,7 +49,6 @@ def create_task(
     priority: int = 1,
     tags: Optional[list[str]] = None,
 ) -> Task:
-    tasks = _load_tasks()
     new_task = Task(
         id=str(uuid.uuid4()),
         title=title.strip(),
@@ -79,16 +59,13 @@ def create_task(
         completed=False,
         tags=tags or [],
     )
-    tasks.append(new_task)
-    _save_tasks(tasks)
-    return new_task
+    return get_repository().put(new_task)
 
 
 def complete_task(task_id: str) -> Optional[Task]:
-    tasks = _load_tasks()
-    for t in tasks:
-        if t.id == task_id:
-            t.completed = True
-            _save_tasks(tasks)
-            return t
-    return None
+    repo = get_repository()
+    task = repo.get(task_id)
+    if task is None:
+        return None
+    copy = task.model_copy if hasattr(task, "model_copy") else task.copy  # pydantic v2|v1
+    return repo.put(copy(update={"completed": True}))
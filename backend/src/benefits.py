@@ -0,0 +1,47 @@
+"""
+Benefits endpoints: the programs AdultingOS screens for, and matching a profile against them.
+"""
+from typing import Literal, Optional
+
+from fastapi import APIRouter
+from pydantic import BaseModel, Field
+
+from backend.src.eligibility import ELIGIBLE, rules
+from backend.src.utils import format_response
+
+router = APIRouter(prefix="/benefits", tags=["benefits"])
+
+
+class BenefitsProfile(BaseModel):
+    """What is known about the user; leave out anything they have not answered."""
+    is_student: Optional[bool] = None
+    income: Optional[float] = Field(None, ge=0, description="Approximate annual income in USD")
+    rent_or_own: Optional[Literal["rent", "own"]] = None
+    is_married: Optional[bool] = None
+    has_student_loans: Optional[bool] = None
+    has_hdhp: Optional[bool] = Field(None, description="Covered by a high-deductible health plan")
+
+
+@router.get("/programs", response_model=dict)
+def list_programs():
+    """
+    Every program screened for, with the conditions (any one clause of `when`) it requires.
+    """
+    return format_response(
+        [{key: program[key] for key in ("id", "name", "summary", "when")} for program in rules.programs],
+        message=f"{len(rules.programs)} programs"
+    )
+
+
+@router.post("/match", response_model=dict)
+def match_benefits(profile: BenefitsProfile):
+    """
+    Programs the profile is eligible for, then those it may be eligible for
+    (with the missing answers that would decide them).
+    """
+    matches = rules.matches(profile.model_dump())
+    eligible = sum(1 for m in matches if m.status == ELIGIBLE)
+    return format_response(
+        [m.to_dict() for m in matches],
+        message=f"Eligible for {eligible} programs, possibly {len(matches) - eligible} more"
+    )
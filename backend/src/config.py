@@ -16,8 +16,23 @@ DEBUG = os.getenv("DEBUG", "False").lower() in ("true", "1", "t")
 HOST = os.getenv("HOST", "127.0.0.1")
 PORT = int(os.getenv("PORT", "8001"))
 
-# Database configuration (for future implementation)
+# Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+# Task store backend shared by /tasks and the assistant: "memory", "journal" or "sqlite" (uses DATABASE_URL)
+TASK_STORE = os.getenv("TASK_STORE", "journal").lower()
+# Journal store: how long (ms) the first of several concurrent writes waits for others to share
+# its fsync; writes that queue up behind a flush are grouped into the next one either way
+TASK_JOURNAL_GROUP_COMMIT_MS = float(os.getenv("TASK_JOURNAL_GROUP_COMMIT_MS", "0"))
+# Task changes kept for GET /tasks/changes; clients further behind get a reset and list again
+TASK_CHANGE_LOG_SIZE = int(os.getenv("TASK_CHANGE_LOG_SIZE", "10000"))
+# Serialized tasks kept for /tasks responses (reused until the task changes)
+TASK_JSON_CACHE_SIZE = int(os.getenv("TASK_JSON_CACHE_SIZE", "10000"))
+
+# Onboarding chat sessions: most kept in memory, idle time before they expire,
+# and an optional SQLite file to keep them across restarts/workers
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH") or None
 
 # Security
 SECRET_KEY = os.getenv("SECRET_KEY", "development_secret_key")
@@ -25,3 +40,8 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
 
 # Feature flags
 ENABLE_NOTIFICATIONS = os.getenv("ENABLE_NOTIFICATIONS", "False").lower() in ("true", "1", "t")
+# Where due-date reminders go when notifications are on: "log", "queue" (in-process) or "webhook"
+REMINDER_SINK = os.getenv("REMINDER_SINK", "log").lower()
+REMINDER_WEBHOOK_URL = os.getenv("REMINDER_WEBHOOK_URL") or None
+# Request/LLM/task-store instrumentation exposed at GET /metrics (Prometheus text format)
+ENABLE_METRICS = os.getenv("ENABLE_METRICS", "True").lower() in ("true", "1", "t")
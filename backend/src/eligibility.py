@@ -0,0 +1,357 @@
+"""
+Benefits eligibility screening over onboarding profiles.
+
+Programs are declared as data (PROGRAMS): each lists alternative clauses, and a
+clause maps profile fields to the condition they must meet (a value, or an
+``(operator, value)`` pair), all of which must hold. ``RuleSet`` compiles the
+catalog once. Every distinct condition becomes a column (field, operator,
+threshold), and clauses and programs become 0/1 incidence matrices. A batch
+of profiles is then scored with one comparison per operator across all
+conditions, plus two matrix products: conditions into clauses, clauses into
+programs. A single profile goes through the same compiled conditions in plain
+Python, which beats NumPy's per-call overhead for one row.
+
+Answers may be missing or free text ("yes", "$35k", "I rent"). Each field is
+parsed to a number (booleans as 0/1, choices as their index) or unknown. A
+condition on an unknown field is neither met nor failed, so a program comes
+out ELIGIBLE (some clause fully met), POSSIBLE (some clause not failed yet) or
+INELIGIBLE.
+
+Thresholds are rough 2025 federal figures for single and married filers, good
+for screening but not a determination: real limits depend on household size,
+state and more.
+"""
+from __future__ import annotations
+
+import math
+import operator
+import re
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+INELIGIBLE, POSSIBLE, ELIGIBLE = 0, 1, 2
+STATUS_NAMES = {POSSIBLE: "possible", ELIGIBLE: "eligible"}
+
+# Profile field -> "bool", "number" or a tuple of choices. The onboarding chat asks
+# the first four; the others sharpen programs that would otherwise stay POSSIBLE.
+FIELDS: Dict[str, Union[str, Tuple[str, ...]]] = {
+    "is_student": "bool",
+    "income": "number",  # approximate annual income in USD
+    "rent_or_own": ("rent", "own"),
+    "is_married": "bool",
+    "has_student_loans": "bool",
+    "has_hdhp": "bool",  # covered by a high-deductible health plan
+}
+
+_SINGLE_EDUCATION_CREDIT = {"is_student": True, "is_married": False, "income": ("<=", 90000)}
+_MARRIED_EDUCATION_CREDIT = {"is_student": True, "is_married": True, "income": ("<=", 180000)}
+
+PROGRAMS: List[Dict[str, Any]] = [
+    {
+        "id": "fafsa",
+        "name": "FAFSA (federal student aid)",
+        "summary": "The application for federal grants, work-study and student loans.",
+        "when": [{"is_student": True}],
+    },
+    {
+        "id": "pell_grant",
+        "name": "Federal Pell Grant",
+        "summary": "A need-based grant for undergraduates that does not have to be repaid.",
+        "when": [{"is_student": True, "income": ("<=", 60000)}],
+    },
+    {
+        "id": "aotc",
+        "name": "American Opportunity Tax Credit",
+        "summary": "Up to $2,500 a year back for the first four years of college costs.",
+        "when": [_SINGLE_EDUCATION_CREDIT, _MARRIED_EDUCATION_CREDIT],
+    },
+    {
+        "id": "lifetime_learning_credit",
+        "name": "Lifetime Learning Credit",
+        "summary": "Up to $2,000 a year for tuition, including part-time and graduate courses.",
+        "when": [_SINGLE_EDUCATION_CREDIT, _MARRIED_EDUCATION_CREDIT],
+    },
+    {
+        "id": "student_loan_interest",
+        "name": "Student loan interest deduction",
+        "summary": "Deduct up to $2,500 of student loan interest paid during the year.",
+        "when": [
+            {"has_student_loans": True, "is_married": False, "income": ("<=", 100000)},
+            {"has_student_loans": True, "is_married": True, "income": ("<=", 200000)},
+        ],
+    },
+    {
+        "id": "snap",
+        "name": "SNAP food assistance",
+        "summary": "Monthly grocery benefits for low-income households.",
+        "when": [
+            {"is_married": False, "income": ("<=", 20000)},
+            {"is_married": True, "income": ("<=", 27000)},
+        ],
+    },
+    {
+        "id": "housing_assistance",
+        "name": "Housing assistance",
+        "summary": "Rental help such as Housing Choice Vouchers for renters on lower incomes.",
+        "when": [{"rent_or_own": "rent", "income": ("<=", 40000)}],
+    },
+    {
+        "id": "savers_credit",
+        "name": "Saver's Credit",
+        "summary": "A tax credit for contributing to a 401(k) or IRA on a modest income.",
+        "when": [
+            {"is_student": False, "is_married": False, "income": ("<=", 39500)},
+            {"is_student": False, "is_married": True, "income": ("<=", 79000)},
+        ],
+    },
+    {
+        "id": "hsa",
+        "name": "Health Savings Account",
+        "summary": "Tax-free savings for medical costs, open to anyone on a high-deductible plan.",
+        "when": [{"has_hdhp": True}],
+    },
+]
+
+_OPS: Dict[str, Callable[[Any, Any], Any]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+_TRUE_WORDS = frozenset({"yes", "y", "yeah", "yep", "true", "married", "student"})
+_FALSE_WORDS = frozenset({"no", "n", "nope", "false", "not", "single", "unmarried", "divorced", "widowed"})
+_WORD = re.compile(r"[a-z]+")
+# A leading minus is kept (so negative amounts are rejected, not read as positive); "$" may sit after it.
+_AMOUNT = re.compile(r"((?<!\w)-)?\s*\$?(\d[\d,]*(?:\.\d+)?)(?:\s*(k|thousand|m|million|b|bn|billion)\b)?")
+_SCALES = {"k": 1e3, "thousand": 1e3, "m": 1e6, "million": 1e6, "b": 1e9, "bn": 1e9, "billion": 1e9}
+
+# numpy once resolved, or False when it is not installed
+_np: Any = None
+
+
+def _numpy() -> Any:
+    global _np
+    if _np is None:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = False
+    return _np or None
+
+
+def parse_answer(kind: Union[str, Tuple[str, ...]], value: Any) -> Optional[float]:
+    """``value`` (typed or a free-text answer) encoded for a field of ``kind``; None if unknown."""
+    if value is None:
+        return None
+    if kind == "bool":
+        if isinstance(value, bool):
+            return float(value)
+        words = set(_WORD.findall(str(value).casefold()))
+        if words & _FALSE_WORDS:
+            return 0.0
+        return 1.0 if words & _TRUE_WORDS else None
+    if kind == "number":
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            number = float(value)
+        else:
+            match = _AMOUNT.search(str(value).casefold())
+            if match is None:
+                return None
+            sign, digits, scale = match.groups()
+            number = float(digits.replace(",", "")) * _SCALES.get(scale, 1) * (-1 if sign else 1)
+        return number if number >= 0 and math.isfinite(number) else None
+    text = str(value).casefold()
+    for i, choice in enumerate(kind):
+        if text == choice or any(word.startswith(choice) for word in _WORD.findall(text)):
+            return float(i)
+    return None
+
+
+class Match:
+    __slots__ = ("program_id", "name", "summary", "status", "missing")
+
+    def __init__(self, program_id: str, name: str, summary: str, status: int, missing: List[str]) -> None:
+        self.program_id = program_id
+        self.name = name
+        self.summary = summary
+        self.status = status
+        # For POSSIBLE matches: the unanswered fields that would settle it.
+        self.missing = missing
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.program_id,
+            "name": self.name,
+            "summary": self.summary,
+            "status": STATUS_NAMES[self.status],
+            "missing": self.missing,
+        }
+
+
+class RuleSet:
+    """PROGRAMS (or another catalog in the same shape) compiled for fast evaluation."""
+
+    def __init__(self, programs: Sequence[Mapping[str, Any]] = PROGRAMS,
+                 fields: Mapping[str, Union[str, Tuple[str, ...]]] = FIELDS) -> None:
+        self.programs = list(programs)
+        self.fields = list(fields)
+        self._kinds = [fields[f] for f in self.fields]
+        field_index = {f: i for i, f in enumerate(self.fields)}
+        # distinct (field index, operator, encoded value)
+        self._conditions: List[Tuple[int, str, float]] = []
+        condition_index: Dict[Tuple[int, str, float], int] = {}
+        # per program, its clauses as lists of condition indices
+        self._program_clauses: List[List[List[int]]] = []
+        for program in self.programs:
+            clauses = []
+            for clause in program["when"]:
+                ids = []
+                for field, test in clause.items():
+                    if field not in field_index:
+                        raise ValueError(f"Program {program['id']}: unknown field {field!r}")
+                    op, value = test if isinstance(test, tuple) else ("==", test)
+                    kind = fields[field]
+                    if op not in _OPS or (kind != "number" and op not in ("==", "!=")):
+                        raise ValueError(f"Program {program['id']}: operator {op!r} does not apply to {field!r}")
+                    encoded = parse_answer(kind, value)
+                    if encoded is None:
+                        raise ValueError(f"Program {program['id']}: invalid value {value!r} for {field!r}")
+                    key = (field_index[field], op, encoded)
+                    if key not in condition_index:
+                        condition_index[key] = len(self._conditions)
+                        self._conditions.append(key)
+                    ids.append(condition_index[key])
+                clauses.append(ids)
+            self._program_clauses.append(clauses)
+        self._compiled = [(f, _OPS[op], value) for f, op, value in self._conditions]
+        self._arrays: Optional[Dict[str, Any]] = None
+
+    # ----- one profile -----
+
+    def encode(self, profile: Mapping[str, Any]) -> List[Optional[float]]:
+        return [parse_answer(kind, profile.get(field)) for field, kind in zip(self.fields, self._kinds)]
+
+    def evaluate(self, profile: Mapping[str, Any]) -> List[int]:
+        """Status of every program (in catalog order) for one profile."""
+        return self._evaluate_row(self.encode(profile))[0]
+
+    def matches(self, profile: Mapping[str, Any]) -> List[Match]:
+        """Programs the profile is eligible or possibly eligible for, eligible ones first."""
+        row = self.encode(profile)
+        statuses, state = self._evaluate_row(row)
+        result = []
+        for program, clauses, status in zip(self.programs, self._program_clauses, statuses):
+            if status == INELIGIBLE:
+                continue
+            missing: List[str] = []
+            if status == POSSIBLE:
+                for clause in clauses:
+                    if all(state[c] is not False for c in clause):
+                        for c in clause:
+                            field = self.fields[self._conditions[c][0]]
+                            if row[self._conditions[c][0]] is None and field not in missing:
+                                missing.append(field)
+            result.append(Match(program["id"], program["name"], program["summary"], status, missing))
+        result.sort(key=lambda m: -m.status)
+        return result
+
+    def _evaluate_row(self, row: List[Optional[float]]) -> Tuple[List[int], List[Optional[bool]]]:
+        # Per condition: met (True), failed (False) or unknown (None).
+        state = [None if row[f] is None else op(row[f], value) for f, op, value in self._compiled]
+        statuses = []
+        for clauses in self._program_clauses:
+            status = INELIGIBLE
+            for clause in clauses:
+                result = ELIGIBLE
+                for c in clause:
+                    met = state[c]
+                    if met is False:
+                        result = INELIGIBLE
+                        break
+                    if met is None:
+                        result = POSSIBLE
+                if result > status:
+                    status = result
+                    if status == ELIGIBLE:
+                        break
+            statuses.append(status)
+        return statuses, state
+
+    # ----- batches -----
+
+    def encode_batch(self, profiles: Sequence[Mapping[str, Any]]) -> Any:
+        """Profiles as an (n, fields) float matrix with NaN for unknown answers (needs NumPy)."""
+        np = _numpy()
+        if np is None:
+            raise RuntimeError("encode_batch needs numpy")
+        matrix = np.empty((len(profiles), len(self.fields)), dtype=np.float64)
+        for j, (field, kind) in enumerate(zip(self.fields, self._kinds)):
+            # Answers repeat a lot ("yes", "rent"), so each distinct one is parsed once per batch.
+            parsed: Dict[Tuple[type, Any], float] = {}
+            column = []
+            for profile in profiles:
+                value = profile.get(field)
+                key = (value.__class__, value)
+                x = parsed.get(key)
+                if x is None:
+                    answer = parse_answer(kind, value)
+                    x = parsed[key] = math.nan if answer is None else answer
+                column.append(x)
+            matrix[:, j] = column
+        return matrix
+
+    def evaluate_batch(self, profiles: Any) -> Any:
+        """
+        Statuses for many profiles: an (n, programs) int8 array with NumPy, given
+        profile mappings or an ``encode_batch`` matrix. Without NumPy, a list of
+        ``evaluate`` results.
+        """
+        np = _numpy()
+        if np is None:
+            return [self.evaluate(p) for p in profiles]
+        matrix = profiles if isinstance(profiles, np.ndarray) else self.encode_batch(profiles)
+        arrays = self._compile_arrays(np)
+        values = matrix[:, arrays["fields"]]  # (n, conditions)
+        known = ~np.isnan(values)
+        met = np.zeros(values.shape, dtype=bool)
+        for op, columns, thresholds in arrays["by_op"]:
+            met[:, columns] = op(values[:, columns], thresholds)
+        met &= known
+        # A clause is met when all its conditions are, and still possible when none failed.
+        sizes = arrays["clause_sizes"]
+        clause_met = (met.astype(np.float32) @ arrays["clauses"]) == sizes
+        clause_open = ((met | ~known).astype(np.float32) @ arrays["clauses"]) == sizes
+        eligible = (clause_met.astype(np.float32) @ arrays["programs"]) > 0
+        possible = (clause_open.astype(np.float32) @ arrays["programs"]) > 0
+        return possible.astype(np.int8) + eligible.astype(np.int8)
+
+    def _compile_arrays(self, np: Any) -> Dict[str, Any]:
+        if self._arrays is None:
+            clauses = [clause for program in self._program_clauses for clause in program]
+            clause_matrix = np.zeros((len(self._conditions), len(clauses)), dtype=np.float32)
+            program_matrix = np.zeros((len(clauses), len(self.programs)), dtype=np.float32)
+            j = 0
+            for p, program in enumerate(self._program_clauses):
+                for clause in program:
+                    clause_matrix[clause, j] = 1
+                    program_matrix[j, p] = 1
+                    j += 1
+            by_op = []
+            for op in _OPS:
+                columns = [i for i, (_, o, _) in enumerate(self._conditions) if o == op]
+                if columns:
+                    thresholds = np.array([self._conditions[i][2] for i in columns])
+                    by_op.append((_OPS[op], np.array(columns), thresholds))
+            self._arrays = {
+                "fields": np.array([f for f, _, _ in self._conditions], dtype=np.intp),
+                "by_op": by_op,
+                "clauses": clause_matrix,
+                "clause_sizes": clause_matrix.sum(axis=0),
+                "programs": program_matrix,
+            }
+        return self._arrays
+
+
+rules = RuleSet()
@@ -0,0 +1,328 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+A deliberately small subset of the Prometheus client model: counters, gauges
+and fixed-bucket histograms with labels, held in a process-wide registry and
+rendered by ``render()`` for ``GET /metrics``. Recording is a dict lookup, a
+bisect and a few additions under a per-series lock, so it can sit on every
+request and store call.
+
+What gets recorded:
+- HTTP: per-route latency histogram, request counts by status, in-flight gauge
+  (``MetricsMiddleware``, a pure ASGI middleware)
+- LLM calls: latency, prompt/response sizes, errors and cache hits by provider
+  and model (``record_llm_call``, installed as an LLMClient hook)
+- assistant prompts: estimated tokens and history turns summarized to fit the budget
+- task store: latency per backend and operation (``timed_store_call``)
+- due-date reminders: pending reminders and reminders fired by kind (due, overdue)
+"""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._series: Dict[LabelValues, Any] = {}
+
+    def _get(self, values: LabelValues) -> Any:
+        series = self._series.get(values)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(values, self._new_series())
+        return series
+
+    def _new_series(self) -> Any:
+        raise NotImplementedError
+
+    def _label_str(self, values: LabelValues, extra: str = "") -> str:
+        pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, series in sorted(self._series.items()):
+            lines.extend(self._render_series(values, series))
+        return lines
+
+    def _render_series(self, values: LabelValues, series: Any) -> List[str]:
+        raise NotImplementedError
+
+
+class _Value:
+    __slots__ = ("lock", "value")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.value = 0.0
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_series(self) -> _Value:
+        return _Value()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        series = self._get(labels)
+        with series.lock:
+            series.value += amount
+
+    def value(self, *labels: str) -> float:
+        return self._get(labels).value
+
+    def _render_series(self, values: LabelValues, series: _Value) -> List[str]:
+        return [f"{self.name}{self._label_str(values)} {_fmt(series.value)}"]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        series = self._get(labels)
+        with series.lock:
+            series.value = value
+
+
+class _Buckets:
+    __slots__ = ("lock", "counts", "sum", "count")
+
+    def __init__(self, size: int) -> None:
+        self.lock = threading.Lock()
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = ()) -> None:
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_series(self) -> _Buckets:
+        return _Buckets(len(self.buckets) + 1)
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._get(labels)
+        i = bisect_left(self.buckets, value)  # upper bounds are inclusive ("le")
+        with series.lock:
+            series.counts[i] += 1
+            series.sum += value
+            series.count += 1
+
+    def snapshot(self, *labels: str) -> Tuple[List[int], float, int]:
+        """Per-bucket (non-cumulative) counts, sum and count for one series."""
+        series = self._get(labels)
+        with series.lock:
+            return list(series.counts), series.sum, series.count
+
+    def _render_series(self, values: LabelValues, series: _Buckets) -> List[str]:
+        with series.lock:
+            counts, total, count = list(series.counts), series.sum, series.count
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else _fmt(bound)
+            labels = self._label_str(values, 'le="' + le + '"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_str(values)} {_fmt(total)}")
+        lines.append(f"{self.name}_count{self._label_str(values)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> Any:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+# ----- the app's metrics -----
+
+REGISTRY = Registry()
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+_STORE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+_SIZE_BUCKETS = (100, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+
+HTTP_REQUESTS = REGISTRY.register(
+    Counter("http_requests_total", "HTTP requests by route template, method and status.", ("method", "route", "status"))
+)
+HTTP_LATENCY = REGISTRY.register(
+    Histogram("http_request_duration_seconds", "HTTP request latency, until the response body is sent.",
+              ("method", "route"), _LATENCY_BUCKETS)
+)
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge("http_requests_in_flight", "HTTP requests currently being served."))
+
+LLM_CALLS = REGISTRY.register(
+    Counter("llm_calls_total", "LLM calls by provider, model and outcome (ok, error, cached).",
+            ("provider", "model", "outcome"))
+)
+LLM_LATENCY = REGISTRY.register(
+    Histogram("llm_call_duration_seconds", "Provider latency of LLM calls (cache hits excluded).",
+              ("provider", "model"), _LLM_BUCKETS)
+)
+LLM_PROMPT_CHARS = REGISTRY.register(
+    Histogram("llm_prompt_chars", "Characters sent per LLM call.", ("provider", "model"), _SIZE_BUCKETS)
+)
+LLM_RESPONSE_CHARS = REGISTRY.register(
+    Histogram("llm_response_chars", "Characters received per LLM call.", ("provider", "model"), _SIZE_BUCKETS)
+)
+LLM_ERRORS = REGISTRY.register(
+    Counter("llm_errors_total", "Failed LLM calls by exception type.", ("provider", "model", "error"))
+)
+
+PROMPT_TOKENS = REGISTRY.register(
+    Histogram("assistant_prompt_tokens", "Estimated tokens per assembled assistant prompt.", (), _SIZE_BUCKETS)
+)
+PROMPT_SUMMARIZED_TURNS = REGISTRY.register(
+    Counter("assistant_prompt_summarized_turns_total", "History turns folded into a summary to fit the prompt budget.")
+)
+
+STORE_LATENCY = REGISTRY.register(
+    Histogram("task_store_operation_duration_seconds", "Task repository operation latency.",
+              ("backend", "operation"), _STORE_BUCKETS)
+)
+STORE_ERRORS = REGISTRY.register(
+    Counter("task_store_errors_total", "Task repository operations that raised.", ("backend", "operation"))
+)
+
+REMINDERS_PENDING = REGISTRY.register(Gauge("reminders_pending", "Open tasks with a due date still to be reminded."))
+REMINDERS_FIRED = REGISTRY.register(
+    Counter("reminders_fired_total", "Due-date reminders fired, by kind (due, overdue).", ("kind",))
+)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+# ----- recording helpers -----
+
+class LLMCall:
+    """What an LLMClient hook receives after each chat/achat/astream call."""
+
+    __slots__ = ("provider", "model", "seconds", "prompt_chars", "response_chars", "error", "cached")
+
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        seconds: float,
+        prompt_chars: int,
+        response_chars: int = 0,
+        error: Optional[BaseException] = None,
+        cached: bool = False,
+    ) -> None:
+        self.provider = provider
+        self.model = model
+        self.seconds = seconds
+        self.prompt_chars = prompt_chars
+        self.response_chars = response_chars
+        self.error = error
+        self.cached = cached
+
+
+def record_llm_call(call: LLMCall) -> None:
+    labels = (call.provider, call.model)
+    if call.cached:
+        LLM_CALLS.inc(*labels, "cached")
+        return
+    LLM_LATENCY.observe(call.seconds, *labels)
+    LLM_PROMPT_CHARS.observe(call.prompt_chars, *labels)
+    if call.error is not None:
+        LLM_CALLS.inc(*labels, "error")
+        LLM_ERRORS.inc(*labels, type(call.error).__name__)
+    else:
+        LLM_CALLS.inc(*labels, "ok")
+        LLM_RESPONSE_CHARS.observe(call.response_chars, *labels)
+
+
+def timed_store_call(backend: str, operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """Call ``fn(*args)`` and record its latency (and failure, if it raises)."""
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    except BaseException:
+        STORE_ERRORS.inc(backend, operation)
+        raise
+    finally:
+        STORE_LATENCY.observe(time.perf_counter() - start, backend, operation)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware task/queue overhead) recording
+    latency, status and in-flight requests. Routes are labelled by their template
+    (``/tasks/{task_id}``), unmatched paths as ``<unmatched>`` to bound cardinality.
+    """
+
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "<unmatched>"
+            method = scope.get("method", "")
+            HTTP_LATENCY.observe(time.perf_counter() - start, method, template)
+            HTTP_REQUESTS.inc(method, template, str(status))
@@ -2,7 +2,7 @@
 Data models for the AdultingOS backend.
 """
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict
 from datetime import datetime
 
 
@@ -37,7 +37,7 @@ class User(BaseModel):
     email: str
     full_name: Optional[str] = None
     joined_date: datetime = datetime.now()
-    preferences: Dict[str, any] = {}
+    preferences: Dict[str, Any] = {}
     
     class Config:
         schema_extra = {
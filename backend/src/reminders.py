@@ -0,0 +1,348 @@
+"""
+Due-date reminders (enabled with ENABLE_NOTIFICATIONS).
+
+The scheduler subscribes to the task repository and keeps a min-heap of
+``(due time, seq, task id)`` for every open task with a due date. Creating,
+updating, completing or deleting a task costs one heap push at most (O(log n)):
+superseded entries are not searched for and removed but skipped when they
+reach the top, and the heap is rebuilt once they outnumber the live ones.
+
+A background task sleeps until the earliest due time (or until a write puts an
+earlier one on top), pops everything that is due and hands the events to a
+sink. A reminder fires once per due date: a task that was already reminded
+only fires again if its due date changes or it is reopened. Tasks found past
+due by more than OVERDUE_AFTER_SECONDS (created late, or missed while the
+server was down) fire as "overdue" instead of "due".
+
+Workers sharing a journal or SQLite store each keep a heap, refreshing the
+repository at least every REFRESH_SECONDS to pick up the others' writes, but
+only the one holding the store's "reminders" lock (see
+TaskRepository.lock_path) sends reminders; the rest drop theirs when they come
+due. When that worker exits, the next one to try the lock takes over.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.src import metrics
+from backend.src.assistant.journal import FileLock, JournalListener
+from backend.src.models import Task
+
+logger = logging.getLogger(__name__)
+
+# A reminder this late when it fires is reported as overdue rather than due.
+OVERDUE_AFTER_SECONDS = 60.0
+# Upper bound on a single sleep, so wall-clock jumps are noticed eventually.
+MAX_SLEEP_SECONDS = 60.0
+# With a store shared between workers: how often to pick up the others' writes (and try for the lock).
+REFRESH_SECONDS = 5.0
+# Events handed to the sink per call.
+BATCH_SIZE = 1000
+
+
+class ReminderEvent:
+    __slots__ = ("task_id", "title", "due_date", "kind", "fired_at")
+
+    def __init__(self, task_id: str, title: str, due_date: datetime, kind: str, fired_at: float) -> None:
+        self.task_id = task_id
+        self.title = title
+        self.due_date = due_date
+        self.kind = kind  # "due" or "overdue"
+        self.fired_at = fired_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "task_id": self.task_id,
+            "title": self.title,
+            "due_date": self.due_date.isoformat(),
+            "kind": self.kind,
+            "fired_at": self.fired_at,
+        }
+
+
+class ReminderSink:
+    """Where fired reminders go. ``send`` runs on the event loop and should not block."""
+
+    async def send(self, events: List[ReminderEvent]) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class LogSink(ReminderSink):
+    async def send(self, events: List[ReminderEvent]) -> None:
+        for event in events:
+            logger.info("reminder: task %s %r is %s (due %s)", event.task_id, event.title, event.kind,
+                        event.due_date.isoformat())
+
+
+class QueueSink(ReminderSink):
+    """Buffers events for in-process consumers (``await sink.queue.get()``); drops them when full."""
+
+    def __init__(self, maxsize: int = 10000) -> None:
+        self.queue: "asyncio.Queue[ReminderEvent]" = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    async def send(self, events: List[ReminderEvent]) -> None:
+        for event in events:
+            try:
+                self.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.dropped += 1
+
+
+class WebhookSink(ReminderSink):
+    """POSTs each batch as ``{"reminders": [...]}`` to ``url``; failures are logged, not retried."""
+
+    def __init__(self, url: str, timeout_seconds: float = 10.0) -> None:
+        self.url = url
+        self.timeout_seconds = timeout_seconds
+        self._client: Any = None
+
+    async def send(self, events: List[ReminderEvent]) -> None:
+        if self._client is None:
+            import httpx  # only needed once a reminder actually fires
+
+            self._client = httpx.AsyncClient(timeout=self.timeout_seconds)
+        try:
+            response = await self._client.post(self.url, json={"reminders": [e.to_dict() for e in events]})
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning("reminder webhook %s failed for %d event(s): %s", self.url, len(events), e)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def create_sink(kind: str, webhook_url: Optional[str] = None) -> ReminderSink:
+    if kind == "log":
+        return LogSink()
+    if kind == "queue":
+        return QueueSink()
+    if kind == "webhook":
+        if not webhook_url:
+            raise ValueError("REMINDER_SINK=webhook needs REMINDER_WEBHOOK_URL")
+        return WebhookSink(webhook_url)
+    raise ValueError(f"Unknown reminder sink: {kind}")
+
+
+# (due timestamp, seq, task id); seq makes entries unique and keeps ties in scheduling order.
+_Entry = Tuple[float, int, str]
+
+
+class ReminderScheduler(JournalListener):
+    """
+    Heap of upcoming due dates, kept in step with the repository through
+    JournalListener callbacks (which arrive on whichever thread wrote).
+    """
+
+    def __init__(self, sink: Optional[ReminderSink] = None) -> None:
+        self.sink = sink or LogSink()
+        self._lock = threading.Lock()
+        self._heap: List[_Entry] = []
+        # task id -> (due timestamp, seq, title, due date) of its live heap entry
+        self._due: Dict[str, Tuple[float, int, str, datetime]] = {}
+        # task id -> due timestamp it was last reminded for
+        self._fired: Dict[str, float] = {}
+        self._seq = 0
+        self._stale = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._repository: Any = None
+        # Held by the one worker that sends reminders; None when the store is private to this process.
+        self._leader_lock: Optional[FileLock] = None
+        self.leading = True
+        self.fired = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._due)
+
+    # ----- JournalListener -----
+
+    def on_reset(self) -> None:
+        # Everything is about to be put again; _fired survives so reloads do not re-fire.
+        with self._lock:
+            self._heap = []
+            self._due = {}
+            self._stale = 0
+
+    def on_put(self, task: Task) -> None:
+        if task.completed or task.due_date is None:
+            self.on_delete(task.id)
+            return
+        due = task.due_date.timestamp()
+        with self._lock:
+            current = self._due.get(task.id)
+            if current is not None and current[0] == due:
+                self._due[task.id] = current[:2] + (task.title, task.due_date)
+                return
+            if self._fired.get(task.id) == due:
+                return
+            if current is not None:
+                self._stale += 1
+            self._fired.pop(task.id, None)
+            self._seq += 1
+            entry = (due, self._seq, task.id)
+            heapq.heappush(self._heap, entry)
+            self._due[task.id] = (due, self._seq, task.title, task.due_date)
+            if self._heap[0] is entry:
+                self._notify()
+            self._maybe_rebuild()
+
+    def on_delete(self, task_id: str) -> None:
+        with self._lock:
+            self._fired.pop(task_id, None)
+            if self._due.pop(task_id, None) is not None:
+                self._stale += 1
+                self._maybe_rebuild()
+
+    # ----- firing -----
+
+    def pop_due(self, now: Optional[float] = None, limit: int = BATCH_SIZE) -> List[ReminderEvent]:
+        """Remove and return up to ``limit`` reminders due at ``now``, earliest first."""
+        now = time.time() if now is None else now
+        events: List[ReminderEvent] = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(events) < limit:
+                due, seq, task_id = heapq.heappop(self._heap)
+                current = self._due.get(task_id)
+                if current is None or current[1] != seq:
+                    self._stale -= 1
+                    continue
+                del self._due[task_id]
+                self._fired[task_id] = due
+                kind = "overdue" if now - due > OVERDUE_AFTER_SECONDS else "due"
+                events.append(ReminderEvent(task_id, current[2], current[3], kind, now))
+        return events
+
+    def next_due(self) -> Optional[float]:
+        """Timestamp of the earliest pending reminder, or None."""
+        with self._lock:
+            while self._heap:
+                due, seq, task_id = self._heap[0]
+                current = self._due.get(task_id)
+                if current is not None and current[1] == seq:
+                    return due
+                heapq.heappop(self._heap)
+                self._stale -= 1
+            return None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "pending": len(self._due),
+                "heap": len(self._heap),
+                "fired": self.fired,
+                "dropped": self.dropped,
+                "leading": int(self.leading),
+            }
+
+    # ----- background task -----
+
+    async def start(self, repository: Any = None) -> None:
+        """Subscribe to the task repository (loading it, off the event loop) and start firing."""
+        from starlette.concurrency import run_in_threadpool
+
+        if repository is None:
+            from backend.src.repository import get_repository
+
+            repository = get_repository()
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._repository = repository
+        lock_path = repository.lock_path("reminders")
+        if lock_path is not None:
+            self._leader_lock = FileLock(lock_path)
+        await run_in_threadpool(repository.subscribe, self)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+        if self._leader_lock is not None:
+            # Lets another worker take over.
+            self._leader_lock.close()
+            self._leader_lock = None
+        await self.sink.close()
+
+    async def _run(self) -> None:
+        assert self._loop is not None and self._wake is not None
+        while True:
+            # Cleared before looking at the heap, so a write that lands meanwhile still wakes us.
+            self._wake.clear()
+            max_sleep = MAX_SLEEP_SECONDS
+            if self._leader_lock is not None:
+                await self._refresh()
+                self.leading = self._leader_lock.try_hold()
+                max_sleep = REFRESH_SECONDS
+            events = self.pop_due()
+            if events:
+                if self.leading:
+                    await self._dispatch(events)
+                else:
+                    # The leader has them too and sends them.
+                    self.dropped += len(events)
+                if len(events) == BATCH_SIZE:
+                    continue
+            metrics.REMINDERS_PENDING.set(value=len(self))
+            due = self.next_due()
+            delay = max_sleep if due is None else min(max(due - time.time(), 0.0), max_sleep)
+            # A timer setting the wake event, not asyncio.wait_for: on Python 3.11 wait_for can
+            # swallow stop()'s cancel when it lands as the timeout fires.
+            timer = self._loop.call_later(delay, self._wake.set)
+            try:
+                await self._wake.wait()
+            finally:
+                timer.cancel()
+
+    async def _refresh(self) -> None:
+        from starlette.concurrency import run_in_threadpool
+
+        try:
+            await run_in_threadpool(self._repository.refresh)
+        except Exception:
+            logger.exception("reminder scheduler could not refresh the task store")
+
+    async def _dispatch(self, events: List[ReminderEvent]) -> None:
+        self.fired += len(events)
+        for event in events:
+            metrics.REMINDERS_FIRED.inc(event.kind)
+        try:
+            await self.sink.send(events)
+        except Exception:
+            logger.exception("reminder sink failed for %d event(s)", len(events))
+
+    # ----- internals (called with the lock held) -----
+
+    def _notify(self) -> None:
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:  # loop already closed
+                pass
+
+    def _maybe_rebuild(self) -> None:
+        # Superseded entries outnumber live ones: rebuild from the live set (amortized O(1) per update).
+        if self._stale > 1024 and self._stale > len(self._due):
+            self._heap = [(due, seq, task_id) for task_id, (due, seq, _, _) in self._due.items()]
+            heapq.heapify(self._heap)
+            self._stale = 0
@@ -0,0 +1,872 @@
+"""
+Task repository shared by the REST API (/tasks) and the assistant tools.
+
+One interface, interchangeable backends:
+- "memory":  process-local dict (tests, throwaway dev servers)
+- "journal": JSON snapshot + append-only journal under backend/data (default)
+- "sqlite":  the database at DATABASE_URL
+
+Select one with TASK_STORE; `get_repository()` returns the process-wide instance.
+"""
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from backend.src import config, metrics
+from backend.src.assistant.journal import JournalListener, TaskJournal, task_from_dict, task_to_dict
+from backend.src.models import Task
+from backend.src.task_changes import EPOCH_SHIFT, Change, ChangeFeed, random_epoch
+from backend.src.task_index import SORT_FIELDS, TaskIndex, decode_cursor, encode_cursor
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+TASKS_FILE = os.path.join(DATA_DIR, "tasks.json")
+JOURNAL_FILE = os.path.join(DATA_DIR, "tasks.journal")
+
+Page = Tuple[List[Task], Optional[str]]
+
+_WORD = re.compile(r"\w+")
+
+
+def search_terms(query: str) -> List[str]:
+    """Split a free-text query into casefolded words (punctuation and FTS syntax are ignored)."""
+    return _WORD.findall(query.casefold())
+
+
+class TaskRepository:
+    """Storage interface for tasks. Ids are assigned by callers."""
+
+    def get(self, task_id: str) -> Optional[Task]:
+        raise NotImplementedError
+
+    def put(self, task: Task) -> Task:
+        """Insert or replace ``task`` (keeps its original creation position)."""
+        raise NotImplementedError
+
+    def put_many(self, tasks: List[Task]) -> None:
+        for task in tasks:
+            self.put(task)
+
+    def delete(self, task_id: str) -> Optional[Task]:
+        raise NotImplementedError
+
+    def delete_many(self, task_ids: Iterable[str]) -> int:
+        return sum(1 for task_id in task_ids if self.delete(task_id) is not None)
+
+    def replace_all(self, tasks: Iterable[Task]) -> None:
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def query(
+        self,
+        category: Optional[str] = None,
+        completed: Optional[bool] = None,
+        tags: Optional[Iterable[str]] = None,
+        priority: Optional[int] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None,
+        sort: str = "created",
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Page:
+        """
+        Filtered, sorted page of tasks plus the cursor for the next page (None at the end).
+        Raises ValueError for an unknown sort field or a malformed cursor.
+        """
+        raise NotImplementedError
+
+    def search(self, query: str, limit: int = 20) -> List[Task]:
+        """
+        Tasks whose title or description contains every word of ``query`` (as a word
+        prefix). This default scans everything in creation order; SQLite ranks with FTS5.
+        """
+        terms = search_terms(query)
+        if not terms:
+            return []
+        found: List[Task] = []
+        for task in self.iter_tasks():
+            words = _WORD.findall(f"{task.title} {task.description or ''}".casefold())
+            if all(any(word.startswith(term) for word in words) for term in terms):
+                found.append(task)
+                if len(found) == limit:
+                    break
+        return found
+
+    def refresh(self) -> None:
+        """Pick up writes made by other processes (and tell subscribers about them)."""
+
+    def subscribe(self, listener: JournalListener) -> None:
+        """
+        Tell ``listener`` about the current tasks (``on_reset``, then ``on_put`` for
+        each) and every change after that. Callbacks run on the writing thread.
+        """
+        raise NotImplementedError
+
+    def shared_changes(self) -> Optional[ChangeFeed]:
+        """
+        The store's own change feed, numbered the same for every process sharing
+        it, or None to have each process keep a ChangeLog of the writes it sees.
+        """
+        return None
+
+    def change_epoch(self) -> int:
+        """An epoch for this process's ChangeLog versions, distinct from other processes' (see task_changes)."""
+        return random_epoch()
+
+    def change_clock(self) -> Optional[Callable[[], int]]:
+        """
+        A function returning the number of the change being applied, the same in
+        every process sharing the store, for a ChangeLog to version writes by; or
+        None to have it number the writes it sees itself.
+        """
+        return None
+
+    def lock_path(self, name: str) -> Optional[str]:
+        """
+        A lock file every process sharing the store can use to elect one of them
+        for the ``name`` job (see FileLock.try_hold), or None if the store is private
+        to this process.
+        """
+        return None
+
+    def iter_tasks(self, chunk_size: int = 256) -> Iterator[Task]:
+        """All tasks in creation order, fetched a page at a time."""
+        cursor = None
+        while True:
+            tasks, cursor = self.query(limit=chunk_size, cursor=cursor)
+            yield from tasks
+            if cursor is None:
+                return
+
+    def close(self) -> None:
+        pass
+
+
+class _IndexedRepository(TaskRepository, JournalListener):
+    """Keeps tasks in a dict with a TaskIndex on the side; subclasses add persistence."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._tasks: Dict[str, Task] = {}
+        self._index = TaskIndex()
+        self._listeners: List[JournalListener] = []
+
+    # JournalListener hooks keep the index (and subscribers) in step with whatever changed the data.
+    def on_reset(self) -> None:
+        self._index.clear()
+        for listener in self._listeners:
+            listener.on_reset()
+
+    def on_put(self, task: Task) -> None:
+        self._index.add(task)
+        for listener in self._listeners:
+            listener.on_put(task)
+
+    def on_delete(self, task_id: str) -> None:
+        self._index.remove(task_id)
+        for listener in self._listeners:
+            listener.on_delete(task_id)
+
+    def subscribe(self, listener: JournalListener) -> None:
+        with self._lock:
+            self._refresh()
+            listener.on_reset()
+            for task in self._tasks.values():
+                listener.on_put(task)
+            self._listeners.append(listener)
+
+    def _refresh(self) -> None:
+        pass
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._refresh()
+
+    def get(self, task_id: str) -> Optional[Task]:
+        with self._lock:
+            self._refresh()
+            return self._tasks.get(task_id)
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._tasks)
+
+    def query(self, sort: str = "created", limit: int = 100, cursor: Optional[str] = None, **filters: Any) -> Page:
+        with self._lock:
+            self._refresh()
+            ids, next_cursor = self._index.query(sort=sort, limit=limit, cursor=cursor, **filters)
+            return [self._tasks[task_id] for task_id in ids], next_cursor
+
+
+class InMemoryTaskRepository(_IndexedRepository):
+    def put(self, task: Task) -> Task:
+        with self._lock:
+            self._tasks[task.id] = task
+            self.on_put(task)
+            return task
+
+    def delete(self, task_id: str) -> Optional[Task]:
+        with self._lock:
+            task = self._tasks.pop(task_id, None)
+            if task is not None:
+                self.on_delete(task_id)
+            return task
+
+    def replace_all(self, tasks: Iterable[Task]) -> None:
+        with self._lock:
+            self._tasks = {}
+            self.on_reset()
+            for task in tasks:
+                self.put(task)
+
+
+class JournalTaskRepository(_IndexedRepository):
+    """The assistant's JSON snapshot + journal, now shared with the REST API."""
+
+    def __init__(self, snapshot_path: str = TASKS_FILE, journal_path: str = JOURNAL_FILE,
+                 group_commit_ms: float = 0.0) -> None:
+        super().__init__()
+        self.journal = TaskJournal(snapshot_path, journal_path, listener=self, lock=self._lock,
+                                   group_commit_ms=group_commit_ms, first_version=random_epoch() << EPOCH_SHIFT)
+
+    def _refresh(self) -> None:
+        self.journal.refresh()
+        self._tasks = self.journal.tasks
+
+    def put(self, task: Task) -> Task:
+        return self.journal.put(task)
+
+    def put_many(self, tasks: List[Task]) -> None:
+        self.journal.put_many(tasks)
+
+    def delete(self, task_id: str) -> Optional[Task]:
+        return self.journal.delete(task_id)
+
+    def replace_all(self, tasks: Iterable[Task]) -> None:
+        self.journal.replace_all(tasks)
+
+    def change_clock(self) -> Optional[Callable[[], int]]:
+        return lambda: self.journal.version
+
+    def lock_path(self, name: str) -> Optional[str]:
+        return os.path.splitext(self.journal.snapshot_path)[0] + f".{name}.lock"
+
+    def close(self) -> None:
+        self.journal.close()
+
+
+class SQLiteTaskRepository(TaskRepository):
+    """
+    Tasks in SQLite. Each thread reuses its own connection, and statements are
+    parameterized with fixed SQL text so sqlite3's statement cache reuses the
+    prepared versions.
+
+    File databases run in WAL mode so readers never block on the writer. Filters
+    and sort orders are covered by indexes, tags live in a ``task_tags`` join
+    table and title/description in an FTS5 index; triggers keep both in step
+    with the ``tasks`` table.
+
+    Triggers also number every write in ``task_changes`` (the latest change per
+    task id, tombstones included), so every process sharing the file serves the
+    same change versions; see ``shared_changes``.
+    """
+
+    _SORT_COLUMNS = {"created": "seq", "due_date": "due_key", "priority": "priority"}
+    # Tags with at most this many tasks drive the query from the join table; bigger
+    # ones are checked per row while walking the sort order (SQLite can't tell which
+    # is cheaper without per-value statistics).
+    TAG_SCAN_THRESHOLD = 5000
+    # Search ranks (bm25) only the newest this-many matches, bounding the cost of very common words.
+    SEARCH_RANK_WINDOW = 1000
+    # task_changes is trimmed back to change_log_size entries after this many writes through this instance.
+    CHANGE_PRUNE_EVERY = 1000
+    _COLUMNS = "id, title, description, category, due_date, due_key, priority, completed, tags"
+    _QUALIFIED_COLUMNS = ", ".join(f"tasks.{column}" for column in _COLUMNS.split(", "))
+    _UPSERT = (
+        f"INSERT INTO tasks ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET title = excluded.title, description = excluded.description, "
+        "category = excluded.category, due_date = excluded.due_date, due_key = excluded.due_key, "
+        "priority = excluded.priority, completed = excluded.completed, tags = excluded.tags"
+    )
+
+    def __init__(self, path: str, change_log_size: int = config.TASK_CHANGE_LOG_SIZE) -> None:
+        self.path = path
+        self.change_log_size = change_log_size
+        self._writes_since_prune = 0
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._conn_lock = threading.Lock()
+        # Writers serialize in-process (SQLite allows one writer anyway); this also keeps
+        # threads sharing the ":memory:" connection from interleaving transactions.
+        self._write_lock = threading.RLock()
+        # ":memory:" databases are per-connection, so all threads share one.
+        self._shared: Optional[sqlite3.Connection] = None
+        if path == ":memory:":
+            self._shared = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # Told about writes made through this instance, and other processes' on refresh().
+        self._listeners: List[JournalListener] = []
+        # task_changes version the listeners have been told about.
+        self._listened = 0
+        self._create_schema(self._conn())
+        self._changes = _SQLiteChangeFeed(self)
+
+    # ----- connections -----
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._shared is not None:
+            return self._shared
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            # Autocommit; multi-statement writes use explicit transactions.
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            # WAL is persistent in the file; the rest are per-connection settings.
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._conn_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.fts = _has_fts5(conn)
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                description TEXT,
+                category TEXT NOT NULL,
+                due_date TEXT,
+                due_key REAL NOT NULL,
+                priority INTEGER NOT NULL,
+                completed INTEGER NOT NULL,
+                tags TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_tasks_completed_due ON tasks (completed, due_key, seq);
+            CREATE INDEX IF NOT EXISTS idx_tasks_due ON tasks (due_key, seq);
+            CREATE INDEX IF NOT EXISTS idx_tasks_category ON tasks (category, seq);
+            CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority, seq);
+
+            CREATE TABLE IF NOT EXISTS task_tags (
+                tag TEXT NOT NULL,
+                task_seq INTEGER NOT NULL,
+                PRIMARY KEY (tag, task_seq)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_task_tags_seq ON task_tags (task_seq);
+
+            CREATE TRIGGER IF NOT EXISTS tasks_tags_ai AFTER INSERT ON tasks BEGIN
+                INSERT OR IGNORE INTO task_tags (tag, task_seq) SELECT value, new.seq FROM json_each(new.tags);
+            END;
+            CREATE TRIGGER IF NOT EXISTS tasks_tags_au AFTER UPDATE OF tags ON tasks BEGIN
+                DELETE FROM task_tags WHERE task_seq = old.seq;
+                INSERT OR IGNORE INTO task_tags (tag, task_seq) SELECT value, new.seq FROM json_each(new.tags);
+            END;
+            CREATE TRIGGER IF NOT EXISTS tasks_tags_ad AFTER DELETE ON tasks BEGIN
+                DELETE FROM task_tags WHERE task_seq = old.seq;
+            END;
+
+            CREATE TABLE IF NOT EXISTS task_changes (
+                version INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id TEXT NOT NULL UNIQUE,
+                deleted INTEGER NOT NULL
+            );
+            -- Every change after this version is still in task_changes.
+            CREATE TABLE IF NOT EXISTS task_change_floor (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            );
+            -- DELETE then INSERT rather than INSERT OR REPLACE: the upsert's conflict
+            -- policy would override the trigger's.
+            CREATE TRIGGER IF NOT EXISTS tasks_changes_ai AFTER INSERT ON tasks BEGIN
+                DELETE FROM task_changes WHERE task_id = new.id;
+                INSERT INTO task_changes (task_id, deleted) VALUES (new.id, 0);
+            END;
+            CREATE TRIGGER IF NOT EXISTS tasks_changes_au AFTER UPDATE ON tasks BEGIN
+                DELETE FROM task_changes WHERE task_id = new.id;
+                INSERT INTO task_changes (task_id, deleted) VALUES (new.id, 0);
+            END;
+            CREATE TRIGGER IF NOT EXISTS tasks_changes_ad AFTER DELETE ON tasks BEGIN
+                DELETE FROM task_changes WHERE task_id = old.id;
+                INSERT INTO task_changes (task_id, deleted) VALUES (old.id, 1);
+            END;
+            """
+        )
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM task_change_floor").fetchone() is None:
+                # Versions start from the clock (in microseconds), so ones handed out by a
+                # database that has since been replaced are out of range and reset.
+                start = time.time_ns() // 1000
+                conn.execute("DELETE FROM task_changes")
+                conn.execute("DELETE FROM sqlite_sequence WHERE name = 'task_changes'")
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('task_changes', ?)", (start,))
+                conn.execute("INSERT INTO task_change_floor (id, version) VALUES (1, ?)", (start,))
+        if "task_tags" not in existing:
+            # Databases created before the join table existed.
+            conn.execute(
+                "INSERT OR IGNORE INTO task_tags (tag, task_seq) "
+                "SELECT json_each.value, tasks.seq FROM tasks, json_each(tasks.tags)"
+            )
+        if self.fts:
+            conn.executescript(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+                    title, description, content='tasks', content_rowid='seq',
+                    tokenize='unicode61 remove_diacritics 2'
+                );
+                CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+                    INSERT INTO tasks_fts (rowid, title, description) VALUES (new.seq, new.title, new.description);
+                END;
+                CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN
+                    INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+                        VALUES ('delete', old.seq, old.title, old.description);
+                    INSERT INTO tasks_fts (rowid, title, description) VALUES (new.seq, new.title, new.description);
+                END;
+                CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+                    INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+                        VALUES ('delete', old.seq, old.title, old.description);
+                END;
+                """
+            )
+            if "tasks_fts" not in existing:
+                conn.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+
+    def close(self) -> None:
+        with self._conn_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
+        self._local = threading.local()
+
+    # ----- rows -----
+
+    @staticmethod
+    def _row(task: Task) -> Tuple[Any, ...]:
+        item = task_to_dict(task)
+        due_key = task.due_date.timestamp() if task.due_date is not None else float("inf")
+        return (
+            item["id"], item["title"], item["description"], item["category"], item["due_date"],
+            due_key, item["priority"], int(item["completed"]), json.dumps(item["tags"]),
+        )
+
+    @staticmethod
+    def _task(row: Tuple[Any, ...]) -> Task:
+        task_id, title, description, category, due_date, _, priority, completed, tags = row[:9]
+        return task_from_dict({
+            "id": task_id, "title": title, "description": description, "category": category,
+            "due_date": due_date, "priority": priority, "completed": bool(completed), "tags": json.loads(tags),
+        })
+
+    # ----- interface -----
+
+    def get(self, task_id: str) -> Optional[Task]:
+        row = self._conn().execute(f"SELECT {self._COLUMNS} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return self._task(row) if row else None
+
+    def put(self, task: Task) -> Task:
+        with self._write_lock:
+            self._conn().execute(self._UPSERT, self._row(task))
+            self._notify_put([task])
+            self._wrote(1)
+        return task
+
+    def put_many(self, tasks: List[Task]) -> None:
+        with self._write_lock:
+            with self._transaction() as conn:
+                conn.executemany(self._UPSERT, [self._row(t) for t in tasks])
+            self._notify_put(tasks)
+            self._wrote(len(tasks))
+
+    def delete(self, task_id: str) -> Optional[Task]:
+        with self._write_lock:
+            with self._transaction() as conn:
+                task = self.get(task_id)
+                if task is not None:
+                    conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            if task is not None:
+                self._notify_delete([task_id])
+                self._wrote(1)
+            return task
+
+    def delete_many(self, task_ids: Iterable[str]) -> int:
+        task_ids = list(task_ids)
+        with self._write_lock:
+            with self._transaction() as conn:
+                cur = conn.executemany("DELETE FROM tasks WHERE id = ?", [(task_id,) for task_id in task_ids])
+            # rowcount does not say which ids existed; deleting an unknown id is a no-op for listeners.
+            self._notify_delete(task_ids)
+            self._wrote(cur.rowcount)
+            return cur.rowcount
+
+    def replace_all(self, tasks: Iterable[Task]) -> None:
+        if self._listeners:
+            tasks = list(tasks)
+        with self._write_lock:
+            with self._transaction() as conn:
+                conn.execute("DELETE FROM tasks")
+                conn.executemany(self._UPSERT, (self._row(t) for t in tasks))
+                # Nothing before the new contents can be caught up with: every client resets.
+                conn.execute("DELETE FROM task_changes")
+                conn.execute(
+                    "UPDATE task_change_floor SET version = "
+                    "(SELECT seq FROM sqlite_sequence WHERE name = 'task_changes')"
+                )
+            for listener in self._listeners:
+                listener.on_reset()
+            self._notify_put(tasks)
+
+    def subscribe(self, listener: JournalListener) -> None:
+        with self._write_lock:
+            self.refresh()
+            self._listened = self._changes.version
+            listener.on_reset()
+            for task in self.iter_tasks():
+                listener.on_put(task)
+            self._listeners.append(listener)
+
+    def refresh(self) -> None:
+        # Replays task_changes since the last refresh; this instance's own writes come round
+        # again, which listeners shrug off (a put of the current state changes nothing).
+        if not self._listeners:
+            return
+        with self._write_lock:
+            while True:
+                changes, version, has_more, reset = self._changes.changes(self._listened)
+                if reset:
+                    self._listened = self._changes.version
+                    for listener in self._listeners:
+                        listener.on_reset()
+                    self._notify_put(list(self.iter_tasks()))
+                    return
+                for task_id, _, deleted in changes:
+                    task = None if deleted else self.get(task_id)
+                    if task is None:
+                        self._notify_delete([task_id])
+                    else:
+                        self._notify_put([task])
+                self._listened = version
+                if not has_more:
+                    return
+
+    def shared_changes(self) -> Optional[ChangeFeed]:
+        return self._changes
+
+    def lock_path(self, name: str) -> Optional[str]:
+        return None if self._shared is not None else f"{self.path}.{name}.lock"
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def query(
+        self,
+        category: Optional[str] = None,
+        completed: Optional[bool] = None,
+        tags: Optional[Iterable[str]] = None,
+        priority: Optional[int] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None,
+        sort: str = "created",
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Page:
+        descending = sort.startswith("-")
+        field = sort.lstrip("-")
+        if field not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort field: {field}")
+        column = self._SORT_COLUMNS[field]
+
+        conn = self._conn()
+        where: List[str] = []
+        params: List[Any] = []
+        if category is not None:
+            where.append("category = ?")
+            params.append(category)
+        if completed is not None:
+            where.append("completed = ?")
+            params.append(int(completed))
+        if priority is not None:
+            where.append("priority = ?")
+            params.append(priority)
+        for tag in tags or ():
+            if self._tag_is_small(conn, tag):
+                where.append("seq IN (SELECT task_seq FROM task_tags WHERE tag = ?)")
+            else:
+                where.append("EXISTS (SELECT 1 FROM task_tags WHERE tag = ? AND task_seq = tasks.seq)")
+            params.append(tag)
+        if due_after is not None or due_before is not None:
+            # Undated tasks have due_key = inf, which is above any finite bound.
+            where.append("due_key BETWEEN ? AND ?")
+            params.append(due_after.timestamp() if due_after is not None else -sys.float_info.max)
+            params.append(due_before.timestamp() if due_before is not None else sys.float_info.max)
+        if cursor:
+            primary, seq, _ = decode_cursor(cursor)
+            # Keyset pagination on the same (sort key, seq) pair the in-memory index uses.
+            where.append(f"({column}, seq) {'<' if descending else '>'} (?, ?)")
+            params.extend([primary, seq])
+
+        order = "DESC" if descending else "ASC"
+        sql = f"SELECT {self._COLUMNS}, seq FROM tasks"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {column} {order}, seq {order} LIMIT ?"
+        params.append(limit + 1)
+
+        rows = conn.execute(sql, params).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            primary = {"created": last[9], "due_date": last[5], "priority": last[6]}[field]
+            next_cursor = encode_cursor((float(primary), last[9], last[0]))
+        return [self._task(row) for row in rows], next_cursor
+
+    def search(self, query: str, limit: int = 20) -> List[Task]:
+        """Best FTS5 (bm25) matches first; every word must match a word prefix."""
+        if not self.fts:
+            return super().search(query, limit)
+        terms = search_terms(query)
+        if not terms:
+            return []
+        match = " ".join(f'"{term}"*' for term in terms)
+        rows = self._conn().execute(
+            f"SELECT {self._QUALIFIED_COLUMNS} FROM ("
+            "  SELECT rowid, rank FROM tasks_fts WHERE tasks_fts MATCH ? ORDER BY rowid DESC LIMIT ?"
+            ") AS hits JOIN tasks ON tasks.seq = hits.rowid ORDER BY hits.rank, tasks.seq LIMIT ?",
+            (match, self.SEARCH_RANK_WINDOW, limit),
+        ).fetchall()
+        return [self._task(row) for row in rows]
+
+    def _tag_is_small(self, conn: sqlite3.Connection, tag: str) -> bool:
+        count = conn.execute(
+            "SELECT COUNT(*) FROM (SELECT 1 FROM task_tags WHERE tag = ? LIMIT ?)",
+            (tag, self.TAG_SCAN_THRESHOLD + 1),
+        ).fetchone()[0]
+        return count <= self.TAG_SCAN_THRESHOLD
+
+    def _notify_put(self, tasks: Iterable[Task]) -> None:
+        for listener in self._listeners:
+            for task in tasks:
+                listener.on_put(task)
+
+    def _notify_delete(self, task_ids: Iterable[str]) -> None:
+        for listener in self._listeners:
+            for task_id in task_ids:
+                listener.on_delete(task_id)
+
+    def _wrote(self, count: int) -> None:
+        self._writes_since_prune += count
+        if self._writes_since_prune >= self.CHANGE_PRUNE_EVERY:
+            self._writes_since_prune = 0
+            self._prune_changes()
+
+    def _prune_changes(self) -> None:
+        """Drop all but the newest ``change_log_size`` changes, moving the floor up past them."""
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT version FROM task_changes ORDER BY version DESC LIMIT 1 OFFSET ?", (self.change_log_size,)
+            ).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM task_changes WHERE version <= ?", (row[0],))
+                conn.execute("UPDATE task_change_floor SET version = max(version, ?)", (row[0],))
+
+    def _transaction(self) -> "_Transaction":
+        return _Transaction(self._conn(), self._write_lock)
+
+    @contextlib.contextmanager
+    def _read_transaction(self) -> Iterator[sqlite3.Connection]:
+        """A connection whose SELECTs all see the same state of the database."""
+        if self._shared is not None:
+            # One connection for every thread: holding the write lock keeps writers out meanwhile.
+            with self._write_lock:
+                yield self._shared
+            return
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+
+class _SQLiteChangeFeed(ChangeFeed):
+    """``changes`` and ``version`` read from the ``task_changes`` table of a SQLiteTaskRepository."""
+
+    _VERSION = "SELECT seq FROM sqlite_sequence WHERE name = 'task_changes'"
+
+    def __init__(self, repository: SQLiteTaskRepository) -> None:
+        self.repository = repository
+
+    @property
+    def version(self) -> int:
+        return self.repository._conn().execute(self._VERSION).fetchone()[0]
+
+    def changes(self, since: int, limit: int = 1000) -> Tuple[List[Change], int, bool, bool]:
+        with self.repository._read_transaction() as conn:
+            floor = conn.execute("SELECT version FROM task_change_floor").fetchone()[0]
+            version = conn.execute(self._VERSION).fetchone()[0]
+            if since < floor or since > version:
+                return [], version, False, True
+            rows = conn.execute(
+                "SELECT task_id, version, deleted FROM task_changes WHERE version > ? ORDER BY version LIMIT ?",
+                (since, limit + 1),
+            ).fetchall()
+        picked = [(task_id, changed_at, bool(deleted)) for task_id, changed_at, deleted in rows]
+        if len(picked) > limit:
+            picked = picked[:limit]
+            return picked, picked[-1][1], True, False
+        return picked, version, False, False
+
+
+class _Transaction:
+    def __init__(self, conn: sqlite3.Connection, lock: threading.RLock) -> None:
+        self.conn = conn
+        self.lock = lock
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.lock.acquire()
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self.lock.release()
+            raise
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.lock.release()
+
+
+class InstrumentedTaskRepository(TaskRepository):
+    """
+    Times every operation of another repository into the task store metrics.
+    Anything else (e.g. ``.journal``) is passed through to the wrapped repository.
+    """
+
+    def __init__(self, inner: TaskRepository, backend: str) -> None:
+        self.inner = inner
+        self.backend = backend
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+    def get(self, task_id: str) -> Optional[Task]:
+        return metrics.timed_store_call(self.backend, "get", self.inner.get, task_id)
+
+    def put(self, task: Task) -> Task:
+        return metrics.timed_store_call(self.backend, "put", self.inner.put, task)
+
+    def put_many(self, tasks: List[Task]) -> None:
+        metrics.timed_store_call(self.backend, "put_many", self.inner.put_many, tasks)
+
+    def delete(self, task_id: str) -> Optional[Task]:
+        return metrics.timed_store_call(self.backend, "delete", self.inner.delete, task_id)
+
+    def delete_many(self, task_ids: Iterable[str]) -> int:
+        return metrics.timed_store_call(self.backend, "delete_many", self.inner.delete_many, task_ids)
+
+    def replace_all(self, tasks: Iterable[Task]) -> None:
+        metrics.timed_store_call(self.backend, "replace_all", self.inner.replace_all, tasks)
+
+    def count(self) -> int:
+        return metrics.timed_store_call(self.backend, "count", self.inner.count)
+
+    def query(self, **kwargs: Any) -> Page:
+        return metrics.timed_store_call(self.backend, "query", lambda: self.inner.query(**kwargs))
+
+    def search(self, query: str, limit: int = 20) -> List[Task]:
+        return metrics.timed_store_call(self.backend, "search", self.inner.search, query, limit)
+
+    def refresh(self) -> None:
+        self.inner.refresh()
+
+    def subscribe(self, listener: JournalListener) -> None:
+        self.inner.subscribe(listener)
+
+    def shared_changes(self) -> Optional[ChangeFeed]:
+        return self.inner.shared_changes()
+
+    def change_epoch(self) -> int:
+        return self.inner.change_epoch()
+
+    def change_clock(self) -> Optional[Callable[[], int]]:
+        return self.inner.change_clock()
+
+    def lock_path(self, name: str) -> Optional[str]:
+        return self.inner.lock_path(name)
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+def _has_fts5(conn: sqlite3.Connection) -> bool:
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)")
+    except sqlite3.OperationalError:
+        return False
+    conn.execute("DROP TABLE temp._fts5_probe")
+    return True
+
+
+def sqlite_path(database_url: str) -> str:
+    """sqlite:///relative.db, sqlite:////abs/path.db or sqlite:///:memory: -> a sqlite3 path."""
+    prefix = "sqlite:///"
+    if not database_url.startswith(prefix):
+        raise ValueError(f"Only sqlite:/// URLs are supported for TASK_STORE=sqlite, got {database_url!r}")
+    return database_url[len(prefix):] or ":memory:"
+
+
+def create_repository(store: str = config.TASK_STORE) -> TaskRepository:
+    repository: TaskRepository
+    if store == "memory":
+        repository = InMemoryTaskRepository()
+    elif store == "journal":
+        repository = JournalTaskRepository(group_commit_ms=config.TASK_JOURNAL_GROUP_COMMIT_MS)
+    elif store == "sqlite":
+        repository = SQLiteTaskRepository(sqlite_path(config.DATABASE_URL))
+    else:
+        raise ValueError(f"Unknown task store: {store}")
+    if config.ENABLE_METRICS:
+        repository = InstrumentedTaskRepository(repository, store)
+    return repository
+
+
+_repository: Optional[TaskRepository] = None
+_repository_lock = threading.Lock()
+
+
+def get_repository() -> TaskRepository:
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                _repository = create_repository()
+    return _repository
+
+
+def set_repository(repository: Optional[TaskRepository]) -> None:
+    """Swap the shared repository (tests, benchmarks); None recreates it from config on next use."""
+    global _repository
+    with _repository_lock:
+        if _repository is not None and _repository is not repository:
+            _repository.close()
+        _repository = repository
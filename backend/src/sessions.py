@@ -0,0 +1,193 @@
+"""
+Per-user conversation sessions for the onboarding /chat flow.
+
+Each client carries a session id; its progress (which question is next and the
+answers so far) lives in a small ``__slots__`` object. Sessions sit in a bounded
+LRU that also drops any session idle for longer than the TTL, so memory tracks
+the number of active conversations. A session that is checked out is never
+evicted, so a turn in progress cannot lose its update; the LRU may briefly run
+over its bound while all of its oldest sessions are busy.
+
+With an SQLite file, the file is the source of truth instead: every checkout
+re-reads the session and writes it back inside one ``BEGIN IMMEDIATE``
+transaction, so sessions survive restarts and workers sharing the file see each
+other's answers rather than overwriting them. Turns are short (no I/O besides
+the row), so serializing them on the database write lock costs little.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+# Expired sessions are purged from SQLite at most this often.
+PURGE_INTERVAL_SECONDS = 60.0
+
+
+class Session:
+    __slots__ = ("session_id", "question_index", "profile", "last_seen", "lock", "users")
+
+    def __init__(
+        self,
+        session_id: str,
+        question_index: int = 0,
+        profile: Optional[Dict[str, str]] = None,
+        last_seen: float = 0.0,
+    ) -> None:
+        self.session_id = session_id
+        self.question_index = question_index
+        self.profile: Dict[str, str] = profile or {}
+        self.last_seen = last_seen
+        # Serializes turns of the same session (e.g. a double-submitted message).
+        self.lock = threading.Lock()
+        # Open checkouts, counted under the store lock; eviction skips busy sessions.
+        self.users = 0
+
+
+class SessionStore:
+    """Thread-safe LRU of sessions with idle-TTL eviction, or a shared SQLite table."""
+
+    def __init__(self, max_sessions: int = 10000, idle_ttl_seconds: float = 3600.0, path: Optional[str] = None) -> None:
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._next_purge = 0.0
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=30.0)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, question_index INTEGER NOT NULL, "
+                "profile TEXT NOT NULL, last_seen REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_sessions_last_seen ON sessions (last_seen)")
+            self._db.commit()
+        self.created = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    @contextmanager
+    def checkout(self, session_id: Optional[str] = None) -> Iterator[Session]:
+        """
+        Yield the session for ``session_id`` (a new one if it is missing, unknown or
+        expired) with its lock, or with a path the database write lock, held;
+        changes are saved when the block exits.
+        """
+        if self._db is not None:
+            with self._transaction():
+                session = self._load(session_id, time.time())
+                yield session
+                session.last_seen = time.time()
+                self._save(session)
+            return
+        session = self._get_or_create(session_id)
+        try:
+            with session.lock:
+                yield session
+                session.last_seen = time.time()
+        finally:
+            with self._lock:
+                session.users -= 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "active": len(self._sessions),
+                "created": self.created,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # ----- internals -----
+
+    def _get_or_create(self, session_id: Optional[str]) -> Session:
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(session_id) if session_id else None
+            if session is not None and session.users == 0 and session.last_seen <= now - self.idle_ttl_seconds:
+                del self._sessions[session_id]
+                self.expirations += 1
+                session = None
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+            else:
+                session = self._new(session_id, now)
+                self._sessions[session.session_id] = session
+            session.users += 1
+            self._evict(now)
+            return session
+
+    def _evict(self, now: float) -> None:
+        # Least recently used first: drop idle sessions past the TTL, then enough more to get
+        # back within the bound, skipping any that are checked out. Stop at the first fresh
+        # session once the bound holds.
+        cutoff = now - self.idle_ttl_seconds
+        excess = len(self._sessions) - self.max_sessions
+        doomed = []
+        for session in self._sessions.values():
+            if session.users:
+                continue
+            if session.last_seen <= cutoff:
+                self.expirations += 1
+            elif len(doomed) < excess:
+                self.evictions += 1
+            else:
+                break
+            doomed.append(session.session_id)
+        for session_id in doomed:
+            del self._sessions[session_id]
+
+    def _new(self, session_id: Optional[str], now: float) -> Session:
+        self.created += 1
+        return Session(session_id or uuid.uuid4().hex, last_seen=now)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        # One connection per store: the thread lock keeps other threads' statements out of
+        # this transaction, and BEGIN IMMEDIATE keeps other workers' writes out until COMMIT.
+        with self._lock:
+            if self._db is None:
+                raise RuntimeError("SessionStore is closed")
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._db.rollback()
+                raise
+            self._db.commit()
+
+    def _load(self, session_id: Optional[str], now: float) -> Session:
+        row = None
+        if session_id:
+            row = self._db.execute(
+                "SELECT question_index, profile, last_seen FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None or row[2] <= now - self.idle_ttl_seconds:
+            return self._new(session_id, now)
+        return Session(session_id, row[0], json.loads(row[1]), row[2])
+
+    def _save(self, session: Session) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO sessions (session_id, question_index, profile, last_seen) VALUES (?, ?, ?, ?)",
+            (session.session_id, session.question_index, json.dumps(session.profile), session.last_seen),
+        )
+        now = time.time()
+        if now >= self._next_purge:
+            self._next_purge = now + PURGE_INTERVAL_SECONDS
+            self._db.execute("DELETE FROM sessions WHERE last_seen <= ?", (now - self.idle_ttl_seconds,))
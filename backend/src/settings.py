@@ -14,9 +14,11 @@ except Exception:
     # Optional dependency; safe to continue without .env
     pass
 
+_BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
 @dataclass(frozen=True)
 class Settings:
-    # Model provider: "openai" or "ollama"
+    # Model provider: "openai", "ollama" or "replay" (offline; see assistant/replay.py)
     model_provider: str = os.getenv("MODEL_PROVIDER", "openai").lower()
 
     # OpenAI
@@ -27,6 +29,48 @@ class Settings:
     ollama_base_url: str = os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
     ollama_model: str = os.getenv("OLLAMA_MODEL", "llama3.1:8b")
 
+    # Pooled provider connections (shared by all assistant turns)
+    llm_pool_size: int = int(os.getenv("LLM_POOL_SIZE", "10"))
+    llm_keepalive_seconds: float = float(os.getenv("LLM_KEEPALIVE_SECONDS", "60"))
+    llm_connect_timeout_seconds: float = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", "10"))
+    llm_timeout_seconds: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+
+    # Response cache for repeated prompts (size 0 disables; path enables the SQLite tier)
+    response_cache_size: int = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+    response_cache_ttl_seconds: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+    response_cache_path: Optional[str] = os.getenv("RESPONSE_CACHE_PATH") or None
+
+    # Replay provider: recorded replies (JSON lines), synthetic ones for unknown prompts,
+    # paced by first-token latency and token rate (0 = instant)
+    replay_cassette_path: Optional[str] = os.getenv("REPLAY_CASSETTE") or None
+    replay_latency_ms: float = float(os.getenv("REPLAY_LATENCY_MS", "200"))
+    replay_tokens_per_second: float = float(os.getenv("REPLAY_TOKENS_PER_SECOND", "50"))
+    replay_reply_tokens: int = int(os.getenv("REPLAY_REPLY_TOKENS", "60"))
+    # Append every reply from a real provider to REPLAY_CASSETTE
+    replay_record: bool = os.getenv("REPLAY_RECORD", "false").lower() in ("true", "1", "t")
+
+    # Prompt budget (estimated tokens) for system prompt + history + message; older turns
+    # beyond it are summarized into at most prompt_summary_tokens
+    prompt_budget_tokens: int = int(os.getenv("PROMPT_BUDGET_TOKENS", "3000"))
+    prompt_summary_tokens: int = int(os.getenv("PROMPT_SUMMARY_TOKENS", "400"))
+    prompt_summary_cache_size: int = int(os.getenv("PROMPT_SUMMARY_CACHE_SIZE", "1024"))
+
+    # Server-side conversation memory: conversations kept, messages per conversation,
+    # idle time before one expires, and an optional SQLite file to persist them
+    conversation_max: int = int(os.getenv("CONVERSATION_MAX", "10000"))
+    conversation_turns: int = int(os.getenv("CONVERSATION_TURNS", "40"))
+    conversation_ttl_seconds: float = float(os.getenv("CONVERSATION_TTL_SECONDS", "86400"))
+    conversation_store_path: Optional[str] = os.getenv("CONVERSATION_STORE_PATH") or None
+
+    # Docs knowledge base for grounded answers: the directory indexed, the index file (built at
+    # deploy time with `python -m backend.src.assistant.knowledge`, else at startup), chunks retrieved per turn,
+    # the least BM25 score worth adding and the most estimated tokens they may take (0 disables)
+    docs_dir: str = os.getenv("DOCS_DIR") or os.path.join(_BACKEND_DIR, "..", "docs")
+    docs_index_path: str = os.getenv("DOCS_INDEX_PATH") or os.path.join(_BACKEND_DIR, "data", "docs.index")
+    docs_top_k: int = int(os.getenv("DOCS_TOP_K", "3"))
+    docs_min_score: float = float(os.getenv("DOCS_MIN_SCORE", "3.0"))
+    docs_context_tokens: int = int(os.getenv("DOCS_CONTEXT_TOKENS", "600"))
+
     # System prompt for the assistant
     system_prompt: str = os.getenv(
         "ASSISTANT_SYSTEM_PROMPT",
@@ -0,0 +1,139 @@
+"""
+Change versions for the task store, for delta sync and conditional GETs.
+
+A ChangeLog subscribes to the task repository and numbers every write it sees
+with an increasing version. It keeps the latest version of each changed task
+id (an upsert or a tombstone) in insertion order, bounded to ``max_entries``,
+so ``changes(since)`` walks back from the newest entry and only touches what
+changed. When an entry falls off the end, or the store is reloaded wholesale,
+the ``floor`` moves up; a client asking for changes from before the floor is
+told to reset (list everything again) instead.
+
+Where the store numbers its changes (the journal stamps every record, see
+``TaskRepository.change_clock``), the log versions each write by that number,
+so every worker sharing the files serves one sequence and ETags match across
+workers; a worker that reloaded the store just has a higher floor. Otherwise
+its versions are its own: the log numbers from ``epoch << EPOCH_SHIFT`` with a
+random epoch, so a ``since`` issued by another process, or before a restart,
+lies outside its range and gets a reset, never another process's delta. SQLite
+keeps the changes themselves (see ``TaskRepository.shared_changes``).
+"""
+from __future__ import annotations
+
+import secrets
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Tuple
+
+from backend.src import config
+from backend.src.assistant.journal import JournalListener
+from backend.src.models import Task
+
+# (task id, version, deleted)
+Change = Tuple[str, int, bool]
+
+# Versions are (epoch << EPOCH_SHIFT) + a per-log counter; EPOCH_BITS keeps
+# them below 2**53 so JavaScript clients read them exactly.
+EPOCH_BITS = 21
+EPOCH_SHIFT = 32
+
+
+def random_epoch() -> int:
+    return secrets.randbelow((1 << EPOCH_BITS) - 1) + 1
+
+
+class ChangeFeed:
+    """What /tasks and /tasks/changes read: the current version and the changes after one."""
+
+    version: int
+
+    def changes(self, since: int, limit: int = 1000) -> Tuple[List[Change], int, bool, bool]:
+        """
+        Changes after version ``since``, oldest first: ``(changes, version, has_more, reset)``.
+        ``version`` is what to pass as ``since`` next time. With ``reset``, the feed
+        cannot cover ``since`` and the client should list the whole store again.
+        """
+        raise NotImplementedError
+
+
+class ChangeLog(ChangeFeed, JournalListener):
+    def __init__(self, max_entries: int = 10000, epoch: int = 0, clock: Optional[Callable[[], int]] = None) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # task id -> (version, deleted), oldest change first
+        self._entries: "OrderedDict[str, Tuple[int, bool]]" = OrderedDict()
+        self.epoch = epoch or random_epoch()
+        # The store's change number, when it has one; read as each change is applied.
+        self.clock = clock
+        self.version = clock() if clock is not None else self.epoch << EPOCH_SHIFT
+        # Every change after this version is still in the log.
+        self.floor = self.version
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    # ----- JournalListener -----
+
+    def on_reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.version = self.clock() if self.clock is not None else self.version + 1
+            self.floor = self.version
+
+    def on_put(self, task: Task) -> None:
+        self._record(task.id, False)
+
+    def on_delete(self, task_id: str) -> None:
+        self._record(task_id, True)
+
+    # ----- queries -----
+
+    def changes(self, since: int, limit: int = 1000) -> Tuple[List[Change], int, bool, bool]:
+        with self._lock:
+            if since < self.floor or since > self.version:
+                return [], self.version, False, True
+            picked: List[Change] = []
+            for task_id in reversed(self._entries):
+                version, deleted = self._entries[task_id]
+                if version <= since:
+                    break
+                picked.append((task_id, version, deleted))
+            current = self.version
+        picked.reverse()
+        if len(picked) > limit:
+            picked = picked[:limit]
+            return picked, picked[-1][1], True, False
+        return picked, current, False, False
+
+    # ----- internals -----
+
+    def _record(self, task_id: str, deleted: bool) -> None:
+        with self._lock:
+            self.version = self.clock() if self.clock is not None else self.version + 1
+            self._entries[task_id] = (self.version, deleted)
+            self._entries.move_to_end(task_id)
+            if len(self._entries) > self.max_entries:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self.floor = evicted
+
+
+_logs: "weakref.WeakKeyDictionary[Any, ChangeLog]" = weakref.WeakKeyDictionary()
+_logs_lock = threading.Lock()
+
+
+def change_log(repository: Any) -> ChangeFeed:
+    """The store's own change feed, or a ChangeLog subscribed to ``repository``, created on first use."""
+    shared = repository.shared_changes()
+    if shared is not None:
+        return shared
+    log = _logs.get(repository)
+    if log is None:
+        with _logs_lock:
+            log = _logs.get(repository)
+            if log is None:
+                log = ChangeLog(config.TASK_CHANGE_LOG_SIZE, repository.change_epoch(), repository.change_clock())
+                repository.subscribe(log)
+                _logs[repository] = log
+    return log
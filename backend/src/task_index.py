@@ -0,0 +1,233 @@
+"""
+Secondary indexes over an in-memory task collection.
+
+Keeps category/tag/priority/completed -> id sets plus sorted key lists for
+each sort order, so filtered, cursor-paginated listings only touch the tasks
+that can appear on the requested page instead of scanning the whole store.
+"""
+from __future__ import annotations
+
+import base64
+import json
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from backend.src.models import Task
+
+# Sort orders accepted by TaskIndex.query (prefix "-" for descending).
+SORT_FIELDS = ("created", "due_date", "priority")
+
+_NO_DUE = float("inf")  # undated tasks sort as the latest due date
+
+SortKey = Tuple[float, int, str]
+
+
+def _due_ts(value: Optional[datetime]) -> float:
+    return value.timestamp() if value is not None else _NO_DUE
+
+
+def encode_cursor(key: SortKey) -> str:
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    """Inverse of encode_cursor; raises ValueError on malformed input."""
+    try:
+        primary, seq, task_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return (float(primary), int(seq), str(task_id))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+class TaskIndex:
+    def __init__(self) -> None:
+        self._seq = 0
+        self._keys: Dict[str, Dict[str, SortKey]] = {}  # id -> {sort field -> key}
+        # id -> (category, tags, priority, completed) as indexed, for removal
+        self._fields: Dict[str, Tuple[str, Tuple[str, ...], int, bool]] = {}
+        self._sorted: Dict[str, List[SortKey]] = {field: [] for field in SORT_FIELDS}
+        self.by_category: Dict[str, Set[str]] = defaultdict(set)
+        self.by_tag: Dict[str, Set[str]] = defaultdict(set)
+        self.by_priority: Dict[int, Set[str]] = defaultdict(set)
+        self.by_completed: Dict[bool, Set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    # ----- maintenance -----
+
+    def add(self, task: Task) -> None:
+        """Index ``task`` (re-indexing it if already present, keeping its position)."""
+        seq = self._keys[task.id]["created"][1] if task.id in self._keys else None
+        self.remove(task.id)
+        if seq is None:
+            self._seq += 1
+            seq = self._seq
+        keys = {
+            "created": (float(seq), seq, task.id),
+            "due_date": (_due_ts(task.due_date), seq, task.id),
+            "priority": (float(task.priority), seq, task.id),
+        }
+        self._keys[task.id] = keys
+        for field, key in keys.items():
+            insort(self._sorted[field], key)
+        self.by_category[task.category].add(task.id)
+        for tag in set(task.tags):
+            self.by_tag[tag].add(task.id)
+        self.by_priority[task.priority].add(task.id)
+        self.by_completed[task.completed].add(task.id)
+        self._fields[task.id] = (task.category, tuple(set(task.tags)), task.priority, task.completed)
+
+    def remove(self, task_id: str) -> None:
+        keys = self._keys.pop(task_id, None)
+        if keys is None:
+            return
+        for field, key in keys.items():
+            lst = self._sorted[field]
+            i = bisect_left(lst, key)
+            if i < len(lst) and lst[i] == key:
+                del lst[i]
+        category, tags, priority, completed = self._fields.pop(task_id)
+        _discard(self.by_category, category, task_id)
+        for tag in tags:
+            _discard(self.by_tag, tag, task_id)
+        _discard(self.by_priority, priority, task_id)
+        _discard(self.by_completed, completed, task_id)
+
+    def clear(self) -> None:
+        self.__init__()
+
+    # ----- queries -----
+
+    def query(
+        self,
+        category: Optional[str] = None,
+        completed: Optional[bool] = None,
+        tags: Optional[Iterable[str]] = None,
+        priority: Optional[int] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None,
+        sort: str = "created",
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        Return up to ``limit`` matching ids in ``sort`` order, plus a cursor for the
+        next page (None when there are no more). Tasks must match every given tag.
+        """
+        descending = sort.startswith("-")
+        field = sort.lstrip("-")
+        if field not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort field: {field}")
+        after = decode_cursor(cursor) if cursor else None
+
+        candidates = self._candidates(category, completed, tags, priority)
+        lo = _due_ts(due_after) if due_after is not None else None
+        hi = _due_ts(due_before) if due_before is not None else None
+        if field != "due_date" and (lo is not None or hi is not None):
+            in_range = set(key[2] for key in self._walk("due_date", None, False, lo, hi) if key[0] != _NO_DUE)
+            candidates = in_range if candidates is None else candidates & in_range
+
+        def in_due_range(key_due: float) -> bool:
+            if lo is None and hi is None:
+                return True
+            if key_due == _NO_DUE:
+                return False
+            return (lo is None or key_due >= lo) and (hi is None or key_due <= hi)
+
+        ordered = self._sorted[field]
+        if candidates is not None and len(candidates) * 4 < len(ordered):
+            # Few candidates: sorting them is cheaper than walking the full order.
+            keys = sorted((self._keys[i][field] for i in candidates), reverse=descending)
+            stream: Iterator[SortKey] = iter(keys[_seek(keys, after, descending):])
+        else:
+            stream = self._walk(field, after, descending, lo, hi)
+
+        page: List[str] = []
+        last: Optional[SortKey] = None
+        for key in stream:
+            task_id = key[2]
+            if candidates is not None and task_id not in candidates:
+                continue
+            if not in_due_range(self._keys[task_id]["due_date"][0]):
+                continue
+            if len(page) == limit:
+                return page, encode_cursor(last)
+            page.append(task_id)
+            last = key
+        return page, None
+
+    def _candidates(
+        self,
+        category: Optional[str],
+        completed: Optional[bool],
+        tags: Optional[Iterable[str]],
+        priority: Optional[int],
+    ) -> Optional[Set[str]]:
+        sets: List[Set[str]] = []
+        if category is not None:
+            sets.append(self.by_category.get(category, set()))
+        if completed is not None:
+            sets.append(self.by_completed.get(completed, set()))
+        if priority is not None:
+            sets.append(self.by_priority.get(priority, set()))
+        for tag in tags or ():
+            sets.append(self.by_tag.get(tag, set()))
+        if not sets:
+            return None
+        sets.sort(key=len)
+        # A single index set is returned as-is (callers only read it).
+        result = sets[0]
+        for other in sets[1:]:
+            result = result & other
+            if not result:
+                break
+        return result
+
+    def _walk(
+        self, field: str, after: Optional[SortKey], descending: bool, lo: Optional[float], hi: Optional[float]
+    ) -> Iterator[SortKey]:
+        lst = self._sorted[field]
+        if descending:
+            end = bisect_left(lst, after) if after is not None else len(lst)
+            if field == "due_date" and hi is not None:
+                end = min(end, bisect_right(lst, (hi, float("inf"), "")))
+            for i in range(end - 1, -1, -1):
+                if field == "due_date" and lo is not None and lst[i][0] < lo:
+                    return
+                yield lst[i]
+        else:
+            start = bisect_right(lst, after) if after is not None else 0
+            if field == "due_date" and lo is not None:
+                start = max(start, bisect_left(lst, (lo, -1, "")))
+            for i in range(start, len(lst)):
+                if field == "due_date" and hi is not None and lst[i][0] > hi:
+                    return
+                yield lst[i]
+
+
+def _seek(keys: List[SortKey], after: Optional[SortKey], descending: bool) -> int:
+    if after is None:
+        return 0
+    if descending:
+        # keys are in descending order; skip everything >= after
+        lo, hi = 0, len(keys)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if keys[mid] >= after:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    return bisect_right(keys, after)
+
+
+def _discard(index: Dict, value, task_id: str) -> None:
+    ids = index.get(value)
+    if ids is not None:
+        ids.discard(task_id)
+        if not ids:
+            del index[value]
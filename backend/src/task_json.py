@@ -0,0 +1,84 @@
+"""
+Single-pass JSON responses for the /tasks endpoints.
+
+The default path (``task.dict()`` into ``format_response``, then FastAPI
+validating the dict against ``response_model`` and re-encoding it with the
+stdlib encoder) walks every task three times. Here each Task is serialized
+once, straight to bytes by pydantic's Rust serializer, and the
+``{status, message, data}`` envelope is assembled around those bytes.
+The output is the same JSON as before.
+
+Serialized tasks are cached in a bounded LRU keyed by task id. An entry is
+only reused for the very Task object it was made from. Repositories replace
+the stored object on every write (tasks are never changed in place), so an
+updated task always misses. Backends that build new objects per read
+(SQLite) simply miss every time.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from fastapi import Response
+
+from backend.src import config
+from backend.src.models import Task
+
+_serializer = Task.__pydantic_serializer__
+
+
+class TaskJSONCache:
+    """Thread-safe LRU of task id -> (Task, its JSON bytes)."""
+
+    def __init__(self, maxsize: int = 10000) -> None:
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Task, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def dumps(self, task: Task) -> bytes:
+        with self._lock:
+            entry = self._entries.get(task.id) if task.id else None
+            if entry is not None and entry[0] is task:
+                self._entries.move_to_end(task.id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        raw = _serializer.to_json(task)
+        if task.id and self.maxsize > 0:
+            with self._lock:
+                self._entries[task.id] = (task, raw)
+                self._entries.move_to_end(task.id)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return raw
+
+    def dumps_many(self, tasks: Iterable[Task]) -> bytes:
+        return b"[" + b",".join([self.dumps(task) for task in tasks]) + b"]"
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+task_json = TaskJSONCache(config.TASK_JSON_CACHE_SIZE)
+
+
+def dumps(value: Any) -> bytes:
+    """Encode plain JSON values the way FastAPI's JSONResponse does."""
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def envelope_response(data: bytes, message: str = "", status: str = "success",
+                      extra: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    ``format_response(data, status, message)`` around already-encoded ``data``;
+    ``extra`` keys (e.g. pagination) follow it in the envelope.
+    """
+    body = b'{"status":' + dumps(status) + b',"message":' + dumps(message) + b',"data":' + data
+    for key, value in (extra or {}).items():
+        body += b"," + dumps(key) + b":" + dumps(value)
+    return Response(body + b"}", media_type="application/json", headers=headers)
@@ -1,97 +1,447 @@
 """
 API endpoints for the task management system.
 """
-from fastapi import APIRouter, HTTPException, Path, Body
-from typing import List
+from fastapi import APIRouter, HTTPException, Path, Body, Query, Request, Response, Depends
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import hashlib
+import json
 import uuid
+import zlib
+
+from pydantic import TypeAdapter, ValidationError
 
 from backend.src.models import Task
+from backend.src.repository import TaskRepository, get_repository
+from backend.src.task_changes import ChangeFeed, change_log
+from backend.src.task_json import dumps, envelope_response, task_json
 from backend.src.utils import format_response
 
 # Create a router for task management
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
-# In-memory storage for tasks (replace with database in production)
-tasks_db = {}
+# Tasks live in the shared repository (TASK_STORE), the same store the assistant's
+# /task commands use. Handlers that touch it synchronously are plain `def` so
+# FastAPI runs their blocking I/O in the threadpool. Handlers returning tasks
+# encode them once with task_json instead of going through format_response.
+
+# Upper bound on items in one bulk request
+MAX_BULK_ITEMS = 10000
+
+_task_list = TypeAdapter(List[Task])
+
+# Streaming export/import: lines per chunk, longest accepted line, errors reported
+EXPORT_CHUNK_SIZE = 256
+MAX_IMPORT_LINE_BYTES = 1024 * 1024
+MAX_IMPORT_ERRORS = 100
+
+# Conditional GETs: clients may keep responses but must revalidate them (If-None-Match)
+CACHE_CONTROL = "no-cache"
+
+
+def get_change_log(repo: TaskRepository = Depends(get_repository)) -> ChangeFeed:
+    return change_log(repo)
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    """Whether If-None-Match already names ``etag`` (weak comparison, as GET allows)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag.removeprefix("W/") in {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+
+def _validators(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
 
 
 @router.post("/", response_model=dict)
-async def create_task(task: Task):
+def create_task(task: Task, repo: TaskRepository = Depends(get_repository)):
     """
     Create a new task in the system.
     """
     task_id = str(uuid.uuid4())
     task.id = task_id
-    tasks_db[task_id] = task
-    
+    repo.put(task)
+
+    return envelope_response(task_json.dumps(task), message="Task created successfully")
+
+
+@router.get("/", response_model=dict)
+def get_all_tasks(
+    request: Request,
+    category: Optional[str] = Query(None, description="Only tasks in this category"),
+    completed: Optional[bool] = Query(None, description="Filter by completion state"),
+    tags: Optional[List[str]] = Query(None, description="Only tasks carrying all of these tags"),
+    priority: Optional[int] = Query(None, ge=1, le=5, description="Only tasks with this priority"),
+    due_after: Optional[datetime] = Query(None, description="Due on or after this time"),
+    due_before: Optional[datetime] = Query(None, description="Due on or before this time"),
+    sort: str = Query("created", pattern="^-?(created|due_date|priority)$", description="Sort field, '-' for descending"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum tasks per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    repo: TaskRepository = Depends(get_repository),
+    changes: ChangeFeed = Depends(get_change_log),
+):
+    """
+    Retrieve tasks, filtered and sorted server-side, one page at a time.
+    The ETag is the store version (plus the query), so an unchanged poll is a 304 without querying.
+    """
+    # Read the version before querying: a write landing meanwhile then changes the next ETag.
+    repo.refresh()
+    etag = f'W/"{changes.version}-{zlib.crc32(request.url.query.encode("utf-8")):08x}"'
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=_validators(etag))
+    try:
+        tasks, next_cursor = repo.query(
+            category=category,
+            completed=completed,
+            tags=tags,
+            priority=priority,
+            due_after=due_after,
+            due_before=due_before,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return envelope_response(
+        task_json.dumps_many(tasks),
+        message=f"Retrieved {len(tasks)} tasks",
+        extra={"pagination": {"limit": limit, "next_cursor": next_cursor}},
+        headers=_validators(etag),
+    )
+
+
+@router.get("/changes", response_model=dict)
+def get_task_changes(
+    since: int = Query(..., ge=0, description="version from the previous sync (0 the first time)"),
+    limit: int = Query(1000, ge=1, le=MAX_BULK_ITEMS, description="Maximum changes to return"),
+    repo: TaskRepository = Depends(get_repository),
+    changes: ChangeFeed = Depends(get_change_log),
+):
+    """
+    Tasks created, updated or deleted after version ``since``, oldest first:
+    upserts carry the task, tombstones (``deleted``) only its id. Pass the
+    returned ``version`` as ``since`` next time; with ``has_more``, ask again
+    straight away. ``reset`` means the server can no longer tell what changed
+    since then: list /tasks/ again and continue from the returned ``version``.
+    """
+    repo.refresh()
+    picked, version, has_more, reset = changes.changes(since, limit)
+    items = []
+    for task_id, changed_at, deleted in picked:
+        # A task deleted since the log was read is reported as the tombstone it now is.
+        task = None if deleted else repo.get(task_id)
+        head = dumps({"id": task_id, "version": changed_at, "deleted": task is None})
+        items.append(head[:-1] + b',"task":' + (task_json.dumps(task) if task is not None else b"null") + b"}")
+    head = dumps({"version": version, "reset": reset, "has_more": has_more})
+    return envelope_response(
+        head[:-1] + b',"changes":[' + b",".join(items) + b"]}",
+        message=f"Retrieved {len(items)} changes"
+    )
+
+
+@router.get("/search", response_model=dict)
+def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in title or description"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum tasks to return"),
+    repo: TaskRepository = Depends(get_repository),
+):
+    """
+    Full-text search over task titles and descriptions, best matches first.
+    """
+    tasks = repo.search(q, limit=limit)
+    return envelope_response(task_json.dumps_many(tasks), message=f"Found {len(tasks)} tasks")
+
+
+# --- Bulk operations (declared before /{task_id} so "bulk" isn't taken as an id) ---
+
+@router.post("/bulk", response_model=dict)
+async def bulk_create_tasks(
+    request: Request,
+    atomic: bool = Query(True, description="Reject the whole batch if any item is invalid"),
+    repo: TaskRepository = Depends(get_repository),
+):
+    """
+    Create many tasks from a JSON array or NDJSON body.
+    Returns the new ids in input order (null for rejected items) and per-item errors.
+    """
+    items = await _read_bulk_body(request)
+    tasks, errors = _validate_batch(items)
+    _raise_if_atomic(atomic, errors)
+
+    valid = [task for task in tasks if task is not None]
+    for task in valid:
+        task.id = str(uuid.uuid4())
+    await run_in_threadpool(repo.put_many, valid)
+    ids = [task.id if task is not None else None for task in tasks]
+
+    created = len(ids) - len(errors)
     return format_response(
-        task.dict(),
-        message="Task created successfully"
+        {"created": created, "failed": len(errors), "ids": ids, "errors": errors},
+        message=f"Created {created} tasks"
     )
 
 
-@router.get("/", response_model=dict)
-async def get_all_tasks():
+@router.patch("/bulk", response_model=dict)
+async def bulk_update_tasks(
+    request: Request,
+    atomic: bool = Query(True, description="Reject the whole batch if any item is invalid"),
+    repo: TaskRepository = Depends(get_repository),
+):
     """
-    Retrieve all tasks in the system.
+    Apply partial updates, one object per task: {"id": ..., <fields to change>}.
     """
+    items = await _read_bulk_body(request)
+    merged, not_found = await run_in_threadpool(_merge_updates, repo, items)
+    tasks, errors = _validate_batch(merged, skip=not_found)
+    _raise_if_atomic(atomic, errors)
+
+    await run_in_threadpool(repo.put_many, [task for task in tasks if task is not None])
+
+    updated = len(items) - len(errors)
     return format_response(
-        [task.dict() for task in tasks_db.values()],
-        message=f"Retrieved {len(tasks_db)} tasks"
+        {"updated": updated, "failed": len(errors), "errors": errors},
+        message=f"Updated {updated} tasks"
     )
 
 
-@router.get("/{task_id}", response_model=dict)
-async def get_task(task_id: str = Path(..., description="The ID of the task to retrieve")):
+@router.delete("/bulk", response_model=dict)
+async def bulk_delete_tasks(
+    request: Request,
+    atomic: bool = Query(True, description="Reject the whole batch if any id is unknown"),
+    repo: TaskRepository = Depends(get_repository),
+):
     """
-    Retrieve a specific task by ID.
+    Delete tasks by id; the body lists ids (or objects with an "id").
     """
-    if task_id not in tasks_db:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
+    items = await _read_bulk_body(request)
+    ids = [item.get("id") if isinstance(item, dict) else item for item in items]
+    known = await run_in_threadpool(
+        lambda: [isinstance(task_id, str) and repo.get(task_id) is not None for task_id in ids]
+    )
+    errors = [
+        {"index": i, "errors": [{"loc": ["id"], "msg": "Task not found"}]}
+        for i, found in enumerate(known)
+        if not found
+    ]
+    _raise_if_atomic(atomic, errors)
+
+    deleted = await run_in_threadpool(repo.delete_many, [task_id for task_id, found in zip(ids, known) if found])
+
+    return format_response(
+        {"deleted": deleted, "failed": len(errors), "errors": errors},
+        message=f"Deleted {deleted} tasks"
+    )
+
+
+async def _read_bulk_body(request: Request) -> List[Any]:
+    """Parse a JSON array, or NDJSON when the content type says so."""
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    try:
+        if "ndjson" in content_type or "jsonl" in content_type:
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body or b"[]")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ITEMS} items per request")
+    return items
+
+
+def _merge_updates(repo: TaskRepository, items: List[Any]) -> Tuple[List[Any], Dict[int, List[dict]]]:
+    """Overlay each partial update on the stored task; unknown ids are reported separately."""
+    merged: List[Any] = []
+    not_found: Dict[int, List[dict]] = {}
+    for i, item in enumerate(items):
+        task = repo.get(item.get("id")) if isinstance(item, dict) and isinstance(item.get("id"), str) else None
+        if task is None:
+            not_found[i] = [{"loc": ["id"], "msg": "Task not found"}]
+            merged.append(None)
+            continue
+        current = task.model_dump()
+        merged.append({**current, **{k: v for k, v in item.items() if k in current}})
+    return merged, not_found
+
+
+def _validate_batch(
+    items: List[Any], skip: Optional[Dict[int, List[dict]]] = None
+) -> Tuple[List[Optional[Task]], List[dict]]:
+    """
+    Validate every item in one pydantic pass. Returns tasks aligned with ``items``
+    (None where invalid or skipped) and a list of {index, errors} entries.
+    """
+    bad: Dict[int, List[dict]] = dict(skip or {})
+    todo = [i for i in range(len(items)) if i not in bad]
+    try:
+        validated = _task_list.validate_python([items[i] for i in todo])
+    except ValidationError as e:
+        for err in e.errors():
+            loc = err["loc"]
+            bad.setdefault(todo[loc[0]], []).append({"loc": list(loc[1:]), "msg": err["msg"]})
+        todo = [i for i in todo if i not in bad]
+        validated = _task_list.validate_python([items[i] for i in todo])
+
+    tasks: List[Optional[Task]] = [None] * len(items)
+    for i, task in zip(todo, validated):
+        tasks[i] = task
+    errors = [{"index": i, "errors": bad[i]} for i in sorted(bad)]
+    return tasks, errors
+
+
+def _raise_if_atomic(atomic: bool, errors: List[dict]) -> None:
+    if atomic and errors:
+        raise HTTPException(status_code=422, detail={"failed": len(errors), "errors": errors})
+
+
+# --- Streaming NDJSON export/import ---
+
+@router.get("/export")
+def export_tasks(repo: TaskRepository = Depends(get_repository)):
+    """
+    Stream every task as NDJSON (one JSON object per line) in creation order.
+    """
+    return StreamingResponse(_export_lines(repo), media_type="application/x-ndjson")
+
+
+def _export_lines(repo: TaskRepository) -> Iterator[str]:
+    # Page through the store so memory stays flat and concurrent writes are tolerated.
+    cursor = None
+    while True:
+        tasks, cursor = repo.query(limit=EXPORT_CHUNK_SIZE, cursor=cursor)
+        if tasks:
+            yield "\n".join(task.model_dump_json() for task in tasks) + "\n"
+        if cursor is None:
+            return
+
+
+@router.post("/import", response_model=dict)
+async def import_tasks(request: Request, repo: TaskRepository = Depends(get_repository)):
+    """
+    Load tasks from an NDJSON body, parsed and validated line by line as it arrives.
+    Lines with an existing "id" replace that task; others get a new id.
+    """
+    summary = {"created": 0, "updated": 0, "failed": 0, "errors": []}
+    buffer = b""
+    line_no = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        if len(buffer) > MAX_IMPORT_LINE_BYTES:
+            raise HTTPException(status_code=413, detail=f"Line {line_no + len(lines) + 1} is too long")
+        batch = []
+        for line in lines:
+            line_no += 1
+            # A whole line can arrive in one chunk, so the remainder check above does not cover it.
+            if len(line) > MAX_IMPORT_LINE_BYTES:
+                raise HTTPException(status_code=413, detail=f"Line {line_no} is too long")
+            task = _import_line(line, line_no, summary)
+            if task is not None:
+                batch.append(task)
+        if batch:
+            await run_in_threadpool(_store_imported, repo, batch, summary)
+    if buffer.strip():
+        task = _import_line(buffer, line_no + 1, summary)
+        if task is not None:
+            await run_in_threadpool(_store_imported, repo, [task], summary)
+
     return format_response(
-        tasks_db[task_id].dict(),
-        message="Task retrieved successfully"
+        summary,
+        message=f"Imported {summary['created'] + summary['updated']} tasks"
     )
 
 
+def _import_line(line: bytes, line_no: int, summary: Dict[str, Any]) -> Optional[Task]:
+    if not line.strip():
+        return None
+    try:
+        return Task.model_validate_json(line)
+    except ValidationError as e:
+        summary["failed"] += 1
+        if len(summary["errors"]) < MAX_IMPORT_ERRORS:
+            summary["errors"].append(
+                {"line": line_no, "errors": [{"loc": list(err["loc"]), "msg": err["msg"]} for err in e.errors()]}
+            )
+        return None
+
+
+def _store_imported(repo: TaskRepository, tasks: List[Task], summary: Dict[str, Any]) -> None:
+    for task in tasks:
+        if task.id and repo.get(task.id) is not None:
+            summary["updated"] += 1
+        else:
+            task.id = task.id or str(uuid.uuid4())
+            summary["created"] += 1
+    repo.put_many(tasks)
+
+
+@router.get("/{task_id}", response_model=dict)
+def get_task(
+    request: Request,
+    task_id: str = Path(..., description="The ID of the task to retrieve"),
+    repo: TaskRepository = Depends(get_repository),
+):
+    """
+    Retrieve a specific task by ID (304 if If-None-Match has its current ETag).
+    """
+    task = repo.get(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    raw = task_json.dumps(task)
+    etag = 'W/"' + hashlib.blake2b(raw, digest_size=12).hexdigest() + '"'
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=_validators(etag))
+    return envelope_response(raw, message="Task retrieved successfully", headers=_validators(etag))
+
+
 @router.put("/{task_id}", response_model=dict)
-async def update_task(
+def update_task(
     task_update: dict = Body(...),
-    task_id: str = Path(..., description="The ID of the task to update")
+    task_id: str = Path(..., description="The ID of the task to update"),
+    repo: TaskRepository = Depends(get_repository),
 ):
     """
     Update a specific task by ID.
     """
-    if task_id not in tasks_db:
+    existing = repo.get(task_id)
+    if existing is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    task = tasks_db[task_id]
-    
-    # Update task attributes from the request
-    for key, value in task_update.items():
-        if hasattr(task, key):
-            setattr(task, key, value)
+    current = existing.model_dump()
     
-    tasks_db[task_id] = task
+    # Update task attributes from the request (validated, so the indexes see typed values)
+    changes = {key: value for key, value in task_update.items() if key in current and key != "id"}
+    try:
+        task = Task(**{**current, **changes})
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
     
-    return format_response(
-        task.dict(),
-        message="Task updated successfully"
-    )
+    repo.put(task)
+
+    return envelope_response(task_json.dumps(task), message="Task updated successfully")
 
 
 @router.delete("/{task_id}", response_model=dict)
-async def delete_task(task_id: str = Path(..., description="The ID of the task to delete")):
+def delete_task(
+    task_id: str = Path(..., description="The ID of the task to delete"),
+    repo: TaskRepository = Depends(get_repository),
+):
     """
     Delete a specific task by ID.
     """
-    if task_id not in tasks_db:
+    deleted_task = repo.delete(task_id)
+    if deleted_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    deleted_task = tasks_db.pop(task_id)
-    
-    return format_response(
-        deleted_task.dict(),
-        message="Task deleted successfully"
-    )
+    return envelope_response(task_json.dumps(deleted_task), message="Task deleted successfully")
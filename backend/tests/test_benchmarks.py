@@ -0,0 +1,83 @@
+"""
+Tests for the benchmark harness: baseline comparison, percentiles and the load driver.
+"""
+import sys
+import os
+import asyncio
+import unittest
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.benchmarks.fake_llm import make_app
+from backend.benchmarks.harness import best_of, compare, percentile, task_records
+from backend.benchmarks.load import run_load
+
+
+class TestHarness(unittest.TestCase):
+    def test_percentile(self):
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual((percentile(values, 50), percentile(values, 95), percentile(values, 100)), (50.0, 95.0, 100.0))
+        self.assertEqual(percentile([], 99), 0.0)
+
+    def test_task_records_are_deterministic(self):
+        self.assertEqual(task_records(50), task_records(50))
+        self.assertNotEqual(task_records(50), task_records(50, seed=7))
+
+    def test_compare(self):
+        baseline = {
+            "slow": {"kind": "time", "median_ms": 10.0},
+            "tiny": {"kind": "time", "median_ms": 0.1},
+            "api": {"kind": "load", "p95_ms": 20.0, "rps": 1000.0, "errors": 0},
+            "gone": {"kind": "time", "median_ms": 1.0},
+        }
+        current = {
+            "slow": {"kind": "time", "median_ms": 13.0},   # +30%
+            "tiny": {"kind": "time", "median_ms": 0.4},    # +300%, but only 0.3 ms
+            "api": {"kind": "load", "p95_ms": 21.0, "rps": 700.0, "errors": 2},
+            "new": {"kind": "time", "median_ms": 1.0},
+        }
+        regressions, notes = compare(baseline, current, tolerance=0.25)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(regressions[0].startswith("api: 2 failed requests"))
+        self.assertIn("api: rps", regressions[1])
+        self.assertIn("slow: median_ms", regressions[2])
+        self.assertEqual(notes, ["new: not in baseline", "1 baseline benchmark(s) not run"])
+
+        self.assertEqual(compare(baseline, current, tolerance=0.5)[0], regressions[:1])
+        # Load tests get their own, usually wider, tolerance.
+        self.assertEqual(compare(baseline, current, tolerance=0.25, load_tolerance=0.5)[0],
+                         [regressions[0], regressions[2]])
+
+    def test_best_of(self):
+        first = {
+            "micro": {"kind": "time", "median_ms": 12.0, "min_ms": 9.0, "runs": 5},
+            "api": {"kind": "load", "p50_ms": 5.0, "p95_ms": 30.0, "p99_ms": 40.0, "rps": 900.0, "errors": 0},
+        }
+        second = {
+            "micro": {"kind": "time", "median_ms": 10.0, "min_ms": 9.5, "runs": 5},
+            "api": {"kind": "load", "p50_ms": 6.0, "p95_ms": 20.0, "p99_ms": 45.0, "rps": 1000.0, "errors": 1},
+        }
+        best = best_of(first, second)
+        self.assertEqual(best["micro"], {"kind": "time", "median_ms": 10.0, "min_ms": 9.0, "runs": 5})
+        self.assertEqual((best["api"]["p50_ms"], best["api"]["p95_ms"], best["api"]["p99_ms"], best["api"]["rps"]),
+                         (5.0, 20.0, 40.0, 1000.0))
+        self.assertEqual(best["api"]["errors"], 1)
+
+
+class TestLoadDriver(unittest.TestCase):
+    def test_run_load_against_fake_llm(self):
+        result = asyncio.run(run_load(make_app(latency_ms=20), lambda i: ("POST", "/api/chat", {"stream": False}),
+                                      requests=20, concurrency=10))
+        self.assertEqual((result["requests"], result["errors"]), (20, 0))
+        self.assertGreaterEqual(result["p50_ms"], 20)
+        # Ten concurrent clients overlap their waits instead of queueing behind each other.
+        self.assertLess(result["max_ms"], 20 * 10)
+
+        result = asyncio.run(run_load(make_app(latency_ms=0), lambda i: ("GET", "/missing", None),
+                                      requests=5, concurrency=2))
+        self.assertEqual(result["errors"], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
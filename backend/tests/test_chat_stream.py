@@ -0,0 +1,93 @@
+"""
+Tests for the Server-Sent Events framing of POST /assistant/chat/stream, with a stubbed provider stream.
+"""
+import sys
+import os
+import json
+import unittest
+from unittest import mock
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.src.assistant import router
+from backend.src.assistant.conversations import ConversationStore
+
+
+def _events(body):
+    """Parse an SSE body into (event, data) pairs, checking every event is blank-line terminated."""
+    assert body.endswith("\n\n"), body
+    events = []
+    for block in body[:-2].split("\n\n"):
+        event, data = None, None
+        for line in block.split("\n"):
+            field, _, value = line.partition(": ")
+            if field == "event":
+                event = value
+            else:
+                assert field == "data", line
+                data = json.loads(value)
+        events.append((event, data))
+    return events
+
+
+class _StubLLM:
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+        self.use_cache = None
+
+    async def astream(self, messages, use_cache=True):
+        self.use_cache = use_cache
+        for chunk in self.chunks:
+            yield chunk
+        if self.error is not None:
+            raise self.error
+
+
+class TestChatStream(unittest.TestCase):
+    def setUp(self):
+        patches = [
+            mock.patch.object(router, "conversations", ConversationStore()),
+            mock.patch.object(router, "get_knowledge_base", return_value=None),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.client = TestClient(app)
+
+    def _stream(self, llm, **body):
+        with mock.patch.object(router, "_llm", llm):
+            with self.client.stream("POST", "/assistant/chat/stream", json=body) as response:
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+                self.assertEqual(response.headers["cache-control"], "no-cache")
+                return _events(response.read().decode())
+
+    def test_deltas_then_done(self):
+        llm = _StubLLM(["Pay ", "rent ", "first."])
+        events = self._stream(llm, message="What now?", use_cache=False)
+        self.assertEqual(events[:3], [(None, {"delta": "Pay "}), (None, {"delta": "rent "}), (None, {"delta": "first."})])
+        self.assertEqual(events[3][0], "done")
+        self.assertEqual(list(events[3][1]), ["conversation_id"])
+        self.assertEqual(len(events), 4)
+        self.assertFalse(llm.use_cache)
+
+    def test_provider_error_is_reported_in_band(self):
+        events = self._stream(_StubLLM(["partial"], error=ConnectionError("provider down")), message="Hi")
+        self.assertEqual(events, [(None, {"delta": "partial"}), ("error", {"detail": "provider down"})])
+
+    def test_slash_command_is_one_delta(self):
+        events = self._stream(_StubLLM([]), message="/docs", conversation_id="c1")
+        self.assertEqual(events, [(None, {"delta": "Usage: /docs search <words>"}), ("done", {"conversation_id": "c1"})])
+
+    def test_tools_only_fails_before_the_stream(self):
+        response = self.client.post("/assistant/chat/stream", json={"message": "Hi", "mode": "tools_only"})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+"""
+Tests for server-side conversation memory and the /assistant/chat flow built on it.
+"""
+import sys
+import os
+import dataclasses
+import json
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.src.assistant import router
+from backend.src.assistant.cache import ResponseCache
+from backend.src.assistant.client import LLMClient
+from backend.src.assistant.conversations import ConversationStore
+from backend.src.assistant.knowledge import load_knowledge_base
+from backend.src.settings import Settings
+
+
+class TestConversationStore(unittest.TestCase):
+    def test_ring_buffer(self):
+        store = ConversationStore(max_turns=4)
+        cid, window = store.open()
+        self.assertEqual(window, [])
+        for i in range(3):
+            store.append(cid, [("user", f"q{i}"), ("assistant", f"a{i}")])
+        _, window = store.open(cid)
+        self.assertEqual([m["content"] for m in window], ["q1", "a1", "q2", "a2"])
+
+    def test_unknown_and_foreign_ids_start_over(self):
+        store = ConversationStore()
+        cid, _ = store.open(user_id="alice")
+        store.append(cid, [("user", "hi")])
+        self.assertEqual(store.open(cid, "alice"), (cid, [{"role": "user", "content": "hi"}]))
+
+        other, window = store.open(cid, "mallory")
+        self.assertNotEqual(other, cid)
+        self.assertEqual(window, [])
+        guessed, _ = store.open("made-up-id")
+        self.assertNotEqual(guessed, "made-up-id")
+
+    def test_lru_and_ttl(self):
+        store = ConversationStore(max_conversations=2, idle_ttl_seconds=60)
+        ids = [store.open()[0] for _ in range(3)]
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.stats()["evictions"], 1)
+        self.assertNotEqual(store.open(ids[0])[0], ids[0])
+
+        for conversation in store._conversations.values():
+            conversation.last_seen = time.time() - 61
+        store.open()
+        self.assertEqual(len(store), 1)
+        self.assertEqual(store.stats()["expirations"], 2)
+
+    def test_persistence(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, "conversations.db")
+            store = ConversationStore(max_turns=4, path=path)
+            cid, _ = store.open(user_id="alice")
+            for i in range(5):
+                store.append(cid, [("user", f"q{i}"), ("assistant", f"a{i}")])
+            rows = store._db.execute("SELECT COUNT(*) FROM conversation_messages").fetchone()[0]
+            self.assertLessEqual(rows, 4 + 2)  # pruned as the window moves
+            store.close()
+
+            store = ConversationStore(max_turns=4, path=path)
+            self.assertEqual([m["content"] for m in store.open(cid, "alice")[1]], ["q3", "a3", "q4", "a4"])
+            store.close()
+
+            # An expired conversation whose id is reused does not bring back old messages.
+            store = ConversationStore(max_turns=4, path=path)
+            store._db.execute("UPDATE conversations SET last_seen = last_seen - 86401")
+            store._db.commit()
+            store.append(cid, [("user", "fresh")])
+            store.close()
+            store = ConversationStore(max_turns=4, path=path)
+            self.assertEqual(store.open(cid)[1], [{"role": "user", "content": "fresh"}])
+            store.close()
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def test_workers_sharing_a_file(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, "conversations.db")
+            a, b = ConversationStore(path=path), ConversationStore(path=path)
+            cid, _ = a.open(user_id="alice")
+            a.append(cid, [("user", "u1"), ("assistant", "a1")], "alice")
+            self.assertEqual(len(b.open(cid, "alice")[1]), 2)
+            b.append(cid, [("user", "u2"), ("assistant", "a2")], "alice")
+            a.append(cid, [("user", "u3"), ("assistant", "a3")], "alice")
+            for store in (a, b):
+                self.assertEqual([m["content"] for m in store.open(cid, "alice")[1]],
+                                 ["u1", "a1", "u2", "a2", "u3", "a3"])
+            self.assertNotEqual(b.open(cid, "mallory")[0], cid)
+            a.close()
+            b.close()
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+class TestAssistantConversations(unittest.TestCase):
+    def setUp(self):
+        with mock.patch("backend.src.assistant.client.get_settings",
+                        return_value=dataclasses.replace(Settings(), model_provider="ollama", replay_record=False)):
+            self.llm = LLMClient(cache=ResponseCache(), hooks=[])
+        self.prompts = []
+
+        async def reply(llm, messages):
+            self.prompts.append(messages)
+            return f"answer {len(self.prompts)}"
+
+        async def stream(llm, messages):
+            self.prompts.append(messages)
+            for word in ("streamed ", "answer"):
+                yield word
+
+        # The real docs, indexed into a temporary file rather than backend/data.
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        kb = load_knowledge_base(Settings().docs_dir, os.path.join(tmp.name, "docs.index"))
+
+        patches = [
+            mock.patch.object(router, "_llm", self.llm),
+            mock.patch.object(router, "conversations", ConversationStore()),
+            mock.patch.object(router, "get_knowledge_base", return_value=kb),
+            mock.patch.object(LLMClient, "_ollama_achat", reply),
+            mock.patch.object(LLMClient, "_ollama_astream", stream),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.client = TestClient(app)
+
+    def test_server_remembers_the_conversation(self):
+        first = self.client.post("/assistant/chat", json={"message": "Plan my week"}).json()
+        cid = first["conversation_id"]
+        second = self.client.post("/assistant/chat", json={"message": "And the weekend?", "conversation_id": cid})
+        self.assertEqual(second.json(), {"reply": "answer 2", "conversation_id": cid})
+
+        contents = [m["content"] for m in self.prompts[1][1:]]
+        self.assertEqual(contents, ["Plan my week", "answer 1", "And the weekend?"])
+
+    def test_legacy_history_is_used_and_not_stored(self):
+        history = [{"role": "user", "content": "earlier"}, {"role": "assistant", "content": "reply"}]
+        body = self.client.post("/assistant/chat", json={"message": "now", "history": history}).json()
+        self.assertIsNone(body["conversation_id"])
+        self.assertEqual([m["content"] for m in self.prompts[0][1:]], ["earlier", "reply", "now"])
+        self.assertEqual(len(router.conversations), 0)
+
+    def test_stream_reports_and_stores_the_conversation(self):
+        with self.client.stream("POST", "/assistant/chat/stream", json={"message": "Hi"}) as response:
+            events = response.read().decode()
+        done = events.split("event: done\ndata: ")[1]
+        cid = json.loads(done)["conversation_id"]
+        _, window = router.conversations.open(cid)
+        self.assertEqual(window, [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "streamed answer"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
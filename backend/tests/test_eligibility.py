@@ -0,0 +1,120 @@
+"""
+Tests for benefits eligibility screening: answer parsing, the compiled rules, batches and the endpoints.
+"""
+import sys
+import os
+import unittest
+from unittest import mock
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.benchmarks.micro import benefit_profiles
+from backend.src import eligibility
+from backend.src.assistant.router import _handle_command
+from backend.src.eligibility import ELIGIBLE, INELIGIBLE, POSSIBLE, RuleSet, parse_answer, rules
+
+STUDENT_RENTER = {"is_student": "yes", "income": "$35,000", "rent_or_own": "I rent", "is_married": "single"}
+
+
+class TestAnswers(unittest.TestCase):
+    def test_parse_answer(self):
+        cases = [
+            ("bool", True, 1.0), ("bool", "Yes, I am", 1.0), ("bool", "I'm not a student", 0.0),
+            ("bool", "married", 1.0), ("bool", "single", 0.0), ("bool", "maybe", None),
+            ("number", 35000, 35000.0), ("number", "$35,000", 35000.0), ("number", "about 45k a year", 45000.0),
+            ("number", "1.5 million", 1500000.0), ("number", "$2M", 2000000.0), ("number", "1bn", 1e9),
+            ("number", "2000usd", 2000.0), ("number", "12 months", 12.0),
+            ("number", "-2000", None), ("number", "-$2,000", None), ("number", "$-2000", None),
+            ("number", "none", None), ("number", -5, None), ("number", True, None),
+            (("rent", "own"), "I'm renting", 0.0),
+            (("rent", "own"), "I own a condo", 1.0), (("rent", "own"), "with my parents", None),
+            ("bool", None, None),
+        ]
+        for kind, value, expected in cases:
+            with self.subTest(value=value):
+                self.assertEqual(parse_answer(kind, value), expected)
+
+
+class TestRuleSet(unittest.TestCase):
+    def _statuses(self, profile):
+        return {m.program_id: (m.status, m.missing) for m in rules.matches(profile)}
+
+    def test_onboarding_profile(self):
+        statuses = self._statuses(STUDENT_RENTER)
+        for program in ("fafsa", "pell_grant", "aotc", "lifetime_learning_credit", "housing_assistance"):
+            self.assertEqual(statuses[program], (ELIGIBLE, []))
+        self.assertEqual(statuses["hsa"], (POSSIBLE, ["has_hdhp"]))
+        self.assertEqual(statuses["student_loan_interest"], (POSSIBLE, ["has_student_loans"]))
+        # Over the SNAP limit, and students do not get the Saver's Credit.
+        self.assertNotIn("snap", statuses)
+        self.assertNotIn("savers_credit", statuses)
+        self.assertEqual([m.status for m in rules.matches(STUDENT_RENTER)][-1], POSSIBLE)
+
+    def test_alternative_clauses(self):
+        married = dict(STUDENT_RENTER, income=150000, is_married=True)
+        self.assertEqual(self._statuses(married)["aotc"][0], ELIGIBLE)
+        self.assertNotIn("aotc", self._statuses(dict(married, is_married=False)))
+        # Either clause could still apply: the answer that would decide is reported.
+        self.assertEqual(self._statuses({"is_student": True, "income": 100000})["aotc"], (POSSIBLE, ["is_married"]))
+
+    def test_empty_profile_is_all_possible(self):
+        self.assertEqual(rules.evaluate({}), [POSSIBLE] * len(rules.programs))
+        self.assertEqual(rules.evaluate({"is_student": False, "has_hdhp": False, "income": 500000})[0], INELIGIBLE)
+
+    def test_invalid_rules(self):
+        with self.assertRaisesRegex(ValueError, "unknown field"):
+            RuleSet([{"id": "x", "name": "x", "summary": "", "when": [{"age": ("<", 26)}]}])
+        with self.assertRaisesRegex(ValueError, "operator"):
+            RuleSet([{"id": "x", "name": "x", "summary": "", "when": [{"is_student": ("<", True)}]}])
+
+    def test_batch_matches_single_profiles(self):
+        profiles = benefit_profiles(2000) + [{}, STUDENT_RENTER]
+        expected = [rules.evaluate(p) for p in profiles]
+        with mock.patch.object(eligibility, "_np", False):
+            self.assertEqual(rules.evaluate_batch(profiles), expected)
+        if eligibility._numpy() is None:
+            self.skipTest("numpy not installed")
+        batch = rules.evaluate_batch(profiles)
+        self.assertEqual(batch.shape, (len(profiles), len(rules.programs)))
+        self.assertEqual(batch.tolist(), expected)
+        self.assertEqual(rules.evaluate_batch(rules.encode_batch(profiles)).tolist(), expected)
+
+
+class TestBenefitsEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(main.app)
+
+    def test_match(self):
+        body = self.client.post("/benefits/match", json={"is_student": True, "income": 35000, "rent_or_own": "rent",
+                                                         "is_married": False}).json()
+        self.assertEqual(body["message"], "Eligible for 5 programs, possibly 2 more")
+        self.assertEqual(body["data"][0]["status"], "eligible")
+        self.assertEqual(self.client.post("/benefits/match", json={"income": -1}).status_code, 422)
+        programs = self.client.get("/benefits/programs").json()["data"]
+        self.assertEqual([p["id"] for p in programs], [p["id"] for p in rules.programs])
+
+    def test_onboarding_ends_with_matches(self):
+        reply = self.client.post("/chat", json={"text": ""}).json()
+        for answer in ["Yes", "about 35k", "I rent", "single"]:
+            reply = self.client.post("/chat", json={"text": answer, "session_id": reply["session_id"]}).json()
+        self.assertTrue(reply["text"].startswith("Thank you for completing your profile! You may qualify for: "))
+        self.assertIn("Federal Pell Grant", reply["text"])
+        self.assertEqual(len([b for b in reply["benefits"] if b["status"] == "eligible"]), 5)
+
+        # Chatting on afterwards doesn't overwrite the last answer.
+        again = self.client.post("/chat", json={"text": "thanks!", "session_id": reply["session_id"]}).json()
+        self.assertEqual(again, reply)
+
+    def test_slash_command(self):
+        reply = _handle_command("/benefits --student yes --income 35000 --home rent --married no")
+        self.assertIn("✔ Federal Pell Grant", reply)
+        self.assertIn("(depends on --hdhp)", reply)
+        self.assertTrue(_handle_command("/benefits").startswith("Usage: /benefits"))
+
+
+if __name__ == "__main__":
+    unittest.main()
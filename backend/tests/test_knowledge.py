@@ -0,0 +1,103 @@
+"""
+Tests for the docs knowledge base: chunking, the memory-mapped BM25 index and /docs search.
+"""
+import sys
+import os
+import stat
+import tempfile
+import unittest
+from unittest import mock
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.src.assistant import knowledge, router
+from backend.src.assistant.knowledge import KnowledgeBase, build_index, chunk_text, format_context, load_knowledge_base
+
+DOCS = {
+    "benefits.txt": "Pell Grants help students pay for college.\n\n"
+                    "SNAP is food assistance for low-income households.",
+    "taxes.md": "The American Opportunity Tax Credit covers tuition.\n\n"
+                "A Health Savings Account lowers taxable income for medical costs.",
+    "notes.txt": "Remember to renew the passport before traveling.",
+    "ignored.pdf": "Pell Grants",
+}
+
+
+class TestKnowledgeBase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.docs = os.path.join(self._tmp.name, "docs")
+        self.index = os.path.join(self._tmp.name, "data", "docs.index")
+        os.makedirs(self.docs)
+        for name, text in DOCS.items():
+            self._write(name, text)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, name, text):
+        with open(os.path.join(self.docs, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_chunking(self):
+        text = "one\n\ntwo\n\n" + "\n".join(["x" * 30] * 4)
+        self.assertEqual(chunk_text(text, max_chars=60), ["one\n\ntwo\n\n" + "x" * 30] + ["x" * 30] * 3)
+        self.assertEqual(chunk_text("a\n\nb\n \nc", max_chars=100), ["a\n\nb\n\nc"])
+
+    def test_search(self):
+        build_index(self.docs, self.index, chunk_chars=60)
+        kb = KnowledgeBase(self.index)
+        self.assertEqual(len(kb), 5)
+        self.assertEqual(stat.S_IMODE(os.stat(self.index).st_mode), 0o644)
+        hits = kb.search("How do students pay for college?", k=2)
+        self.assertEqual(hits[0].source, "benefits.txt")
+        self.assertIn("Pell Grants", hits[0].text)
+        self.assertEqual([h.source for h in kb.search("health savings account")][:1], ["taxes.md"])
+        # Stopwords and unknown words match nothing.
+        self.assertEqual(kb.search("what should we do with it"), [])
+        self.assertEqual(kb.search("zyzzyva"), [])
+
+    def test_vectorized_scoring_matches(self):
+        build_index(self.docs, self.index, chunk_chars=60)
+        queries = ["pell grants college", "tax credit tuition income", "passport"]
+        with mock.patch.object(knowledge, "_np", False):
+            kb = KnowledgeBase(self.index)
+            expected = [[(h.source, round(h.score, 5)) for h in kb.search(q)] for q in queries]
+        if knowledge._numpy() is None:
+            self.skipTest("numpy not installed")
+        with mock.patch.object(knowledge, "VECTORIZE_MIN_POSTINGS", 0):
+            kb = KnowledgeBase(self.index)
+            self.assertEqual([[(h.source, round(h.score, 5)) for h in kb.search(q)] for q in queries], expected)
+
+    def test_rebuilt_when_docs_change(self):
+        kb = load_knowledge_base(self.docs, self.index)
+        self.assertEqual(kb.search("passport")[0].source, "notes.txt")
+        self.assertEqual(load_knowledge_base(self.docs, self.index).sources, kb.sources)
+        self._write("notes.txt", "Book the dentist appointment for March.")
+        rebuilt = load_knowledge_base(self.docs, self.index)
+        self.assertEqual(rebuilt.search("passport"), [])
+        self.assertEqual(rebuilt.search("dentist")[0].source, "notes.txt")
+        # The first mapping still reads the index it opened.
+        self.assertEqual(kb.search("passport")[0].source, "notes.txt")
+
+    def test_no_docs(self):
+        self.assertIsNone(load_knowledge_base(os.path.join(self._tmp.name, "missing"), self.index))
+
+    def test_context_and_command(self):
+        kb = load_knowledge_base(self.docs, self.index)
+        context = format_context(kb.search("pell grants"), max_chars=2000)
+        self.assertIn("[benefits.txt]\nPell Grants", context)
+        self.assertLessEqual(len(format_context(kb.search("pell grants"), max_chars=120)), 120)
+        self.assertEqual(format_context([], 2000), "")
+
+        with mock.patch.object(router, "get_knowledge_base", return_value=kb):
+            reply = router._handle_command("/docs search food assistance")
+            self.assertTrue(reply.startswith("benefits.txt (score "))
+            self.assertIn("SNAP", reply)
+            self.assertEqual(router._handle_command("/docs search zyzzyva"), 'No docs match "zyzzyva".')
+            self.assertEqual(router._handle_command("/docs"), "Usage: /docs search <words>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+"""
+Tests for LLMClient's pooled provider connections and async calls, against a stand-in Ollama server.
+"""
+import sys
+import os
+import asyncio
+import dataclasses
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fastapi import HTTPException
+
+from backend.src.assistant import router
+from backend.src.assistant.client import LLMClient
+from backend.src.settings import Settings
+
+
+class _FakeOllama(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so a pooled client can reuse its connection
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.peers.append(self.client_address)
+        body = json.dumps({"message": {"role": "assistant", "content": f"echo {payload['messages'][-1]['content']}"},
+                           "done": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestConnectionPooling(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeOllama)
+        self.server.peers = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        settings = Settings(model_provider="ollama", replay_record=False,
+                            ollama_base_url=f"http://127.0.0.1:{self.server.server_port}")
+        with mock.patch("backend.src.assistant.client.get_settings", return_value=settings):
+            self.llm = LLMClient(hooks=[])
+        self.addCleanup(self.llm.close)
+
+    def _ask(self, text):
+        return self.llm.chat([{"role": "user", "content": text}], use_cache=False)
+
+    def test_calls_reuse_one_connection(self):
+        self.assertEqual([self._ask(f"q{i}") for i in range(5)], [f"echo q{i}" for i in range(5)])
+        session = self.llm._get_session()
+        self._ask("again")
+        self.assertIs(self.llm._get_session(), session)
+        self.assertEqual(len(self.server.peers), 6)
+        self.assertEqual(len(set(self.server.peers)), 1)
+
+    def test_settings_change_rebuilds_the_pool(self):
+        self._ask("first")
+        session = self.llm._get_session()
+        # Unrelated settings keep the pool.
+        self.llm.settings = dataclasses.replace(self.llm.settings, system_prompt="Be brief.")
+        self.assertIs(self.llm._get_session(), session)
+
+        self.llm.settings = dataclasses.replace(self.llm.settings, llm_pool_size=2)
+        with mock.patch.object(session, "close", wraps=session.close) as close:
+            rebuilt = self.llm._get_session()
+        close.assert_called_once()
+        self.assertIsNot(rebuilt, session)
+        self.assertEqual(rebuilt.get_adapter("http://x")._pool_maxsize, 2)
+        self.assertEqual(self._ask("second"), "echo second")
+        self.assertEqual(len(set(self.server.peers)), 2)
+
+    def test_achat_and_event_loop_changes(self):
+        messages = [{"role": "user", "content": "hi"}]
+        self.assertEqual(asyncio.run(self.llm.achat(messages)), "echo hi")
+        first = self.llm._async_http
+        # Cached: no new request, and the pool is still open.
+        self.assertEqual(asyncio.run(self.llm.achat(messages)), "echo hi")
+        self.assertFalse(first.is_closed)
+
+        # A new loop closes the pool the old one left behind.
+        self.assertEqual(asyncio.run(self.llm.achat(messages, use_cache=False)), "echo hi")
+        self.assertTrue(first.is_closed)
+        self.assertIsNot(self.llm._async_http, first)
+        self.assertEqual(len(self.server.peers), 2)
+
+    def test_pool_of_a_running_loop_is_closed_on_that_loop(self):
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        self.addCleanup(loop.close)
+        self.addCleanup(thread.join)
+        self.addCleanup(loop.call_soon_threadsafe, loop.stop)
+
+        messages = [{"role": "user", "content": "hi"}]
+        asyncio.run_coroutine_threadsafe(self.llm.achat(messages), loop).result(timeout=5)
+        other = self.llm._async_http
+        with mock.patch.object(other, "aclose", wraps=other.aclose) as aclose:
+            asyncio.run(self.llm.achat(messages, use_cache=False))
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result(timeout=5)
+        aclose.assert_called_once()
+        self.assertTrue(other.is_closed)
+        asyncio.run(self.llm.aclose())
+        self.assertIsNone(self.llm._async_http)
+
+
+class _Request:
+    """Stands in for a Starlette request whose client goes away after ``polls`` checks."""
+
+    def __init__(self, polls):
+        self.polls = polls
+
+    async def is_disconnected(self):
+        self.polls -= 1
+        return self.polls < 0
+
+
+class TestCancelOnDisconnect(unittest.TestCase):
+    def setUp(self):
+        patch = mock.patch.object(router, "DISCONNECT_POLL_SECONDS", 0.01)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_result_is_returned(self):
+        async def call():
+            await asyncio.sleep(0.03)
+            return "reply"
+
+        self.assertEqual(asyncio.run(router._cancel_on_disconnect(_Request(polls=100), call())), "reply")
+
+    def test_disconnect_cancels_the_call(self):
+        cancelled = []
+
+        async def call():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def run():
+            with self.assertRaises(HTTPException) as caught:
+                await router._cancel_on_disconnect(_Request(polls=2), call())
+            await asyncio.sleep(0)
+            return caught.exception
+
+        self.assertEqual(asyncio.run(run()).status_code, 499)
+        self.assertEqual(cancelled, [True])
+
+
+if __name__ == "__main__":
+    unittest.main()
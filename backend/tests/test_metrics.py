@@ -0,0 +1,130 @@
+"""
+Tests for the Prometheus metrics: primitives, HTTP middleware, LLM hooks and store spans.
+"""
+import sys
+import os
+import asyncio
+import unittest
+from unittest import mock
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.src import metrics
+from backend.src.assistant.cache import ResponseCache
+from backend.src.assistant.client import LLMClient
+from backend.src.metrics import Counter, Histogram, LLMCall
+from backend.src.models import Task
+from backend.src.repository import InMemoryTaskRepository, InstrumentedTaskRepository, set_repository
+from backend.src.settings import Settings
+
+
+class TestPrimitives(unittest.TestCase):
+    def test_histogram_exposition(self):
+        h = Histogram("demo_seconds", "Demo.", ("route",), (0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            h.observe(value, "/x")
+        self.assertEqual(h.render(), [
+            "# HELP demo_seconds Demo.",
+            "# TYPE demo_seconds histogram",
+            'demo_seconds_bucket{route="/x",le="0.1"} 2',
+            'demo_seconds_bucket{route="/x",le="1"} 3',
+            'demo_seconds_bucket{route="/x",le="+Inf"} 4',
+            'demo_seconds_sum{route="/x"} 3.65',
+            'demo_seconds_count{route="/x"} 4',
+        ])
+
+    def test_label_escaping(self):
+        c = Counter("demo_total", "Demo.", ("path",))
+        c.inc('a"b\\c')
+        self.assertEqual(c.render()[-1], 'demo_total{path="a\\"b\\\\c"} 1')
+
+
+class TestHttpMetrics(unittest.TestCase):
+    def setUp(self):
+        set_repository(InMemoryTaskRepository())
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        set_repository(None)
+
+    def test_routes_are_labelled_by_template(self):
+        before = metrics.HTTP_REQUESTS.value("GET", "/tasks/{task_id}", "404")
+        self.client.get("/tasks/missing-1")
+        self.client.get("/tasks/missing-2")
+        self.client.get("/no/such/path")
+        self.assertEqual(metrics.HTTP_REQUESTS.value("GET", "/tasks/{task_id}", "404"), before + 2)
+        self.assertGreaterEqual(metrics.HTTP_REQUESTS.value("GET", "<unmatched>", "404"), 1)
+
+        body = self.client.get("/metrics")
+        self.assertEqual(body.headers["content-type"], metrics.CONTENT_TYPE)
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="/tasks/{task_id}"}', body.text)
+        self.assertIn("http_requests_in_flight 1", body.text)  # the scrape itself
+
+
+class TestLlmHooks(unittest.TestCase):
+    def _client(self, calls):
+        with mock.patch("backend.src.assistant.client.get_settings", return_value=Settings(model_provider="ollama")):
+            return LLMClient(cache=ResponseCache(), hooks=[calls.append])
+
+    def test_calls_errors_and_cache_hits_are_reported(self):
+        calls = []
+        client = self._client(calls)
+        messages = [{"role": "user", "content": "hello"}]
+        with mock.patch.object(LLMClient, "_ollama_chat", return_value="hi there"):
+            client.chat(messages)
+            client.chat(messages)
+        with mock.patch.object(LLMClient, "_ollama_chat", side_effect=ConnectionError("down")):
+            with self.assertRaises(ConnectionError):
+                client.chat(messages, use_cache=False)
+        self.assertEqual([(c.cached, c.error is None) for c in calls], [(False, True), (True, True), (False, False)])
+        self.assertEqual((calls[0].prompt_chars, calls[0].response_chars), (5, 8))
+        self.assertIsInstance(calls[2].error, ConnectionError)
+
+    def test_async_calls_are_reported(self):
+        calls = []
+        client = self._client(calls)
+
+        async def reply(self, messages):
+            return "ok"
+
+        with mock.patch.object(LLMClient, "_ollama_achat", reply):
+            asyncio.run(client.achat([{"role": "user", "content": "x"}], use_cache=False))
+        self.assertEqual(len(calls), 1)
+        self.assertGreaterEqual(calls[0].seconds, 0)
+
+    def test_failing_hook_does_not_break_the_reply(self):
+        client = self._client([])
+        client.hooks = [mock.Mock(side_effect=RuntimeError("boom"))]
+        with mock.patch.object(LLMClient, "_ollama_chat", return_value="fine"):
+            with self.assertLogs("backend.src.assistant.client", level="ERROR"):
+                self.assertEqual(client.chat([{"role": "user", "content": "x"}], use_cache=False), "fine")
+
+    def test_record_llm_call(self):
+        before = metrics.LLM_CALLS.value("test", "m", "error")
+        metrics.record_llm_call(LLMCall("test", "m", 0.5, 100, error=TimeoutError()))
+        self.assertEqual(metrics.LLM_CALLS.value("test", "m", "error"), before + 1)
+        self.assertEqual(metrics.LLM_ERRORS.value("test", "m", "TimeoutError"), 1)
+
+
+class TestStoreSpans(unittest.TestCase):
+    def test_operations_are_timed(self):
+        repo = InstrumentedTaskRepository(InMemoryTaskRepository(), "unit")
+        repo.put(Task(id="t1", title="Pay rent", category="finance"))
+        repo.get("t1")
+        list(repo.iter_tasks())
+        self.assertEqual(metrics.STORE_LATENCY.snapshot("unit", "put")[2], 1)
+        self.assertEqual(metrics.STORE_LATENCY.snapshot("unit", "get")[2], 1)
+        self.assertEqual(metrics.STORE_LATENCY.snapshot("unit", "query")[2], 1)
+
+        with mock.patch.object(InMemoryTaskRepository, "delete", side_effect=OSError("disk")):
+            with self.assertRaises(OSError):
+                repo.delete("t1")
+        self.assertEqual(metrics.STORE_ERRORS.value("unit", "delete"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
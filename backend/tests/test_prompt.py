@@ -0,0 +1,107 @@
+"""
+Tests for the token-budgeted prompt builder and its prefix-summary cache.
+"""
+import sys
+import os
+import unittest
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.src.assistant.conversations import ConversationStore
+from backend.src.assistant.prompt import SUMMARY_HEADER, PromptBuilder, estimate_tokens, message_tokens
+
+
+def _history(turns, words=40):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"turn {i} " + "blah " * words}
+        for i in range(turns)
+    ]
+
+
+class TestPromptBuilder(unittest.TestCase):
+    def test_estimates(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("abcde"), 2)
+        self.assertEqual(message_tokens({"role": "user", "content": "abcd"}), 5)
+
+    def test_short_history_is_kept_whole(self):
+        history = _history(12, words=3)
+        messages, stats = PromptBuilder(budget_tokens=1000).build("Be brief.", history, "Next?")
+        self.assertEqual(messages[1:-1], history)
+        self.assertEqual(messages[-1], {"role": "user", "content": "Next?"})
+        self.assertEqual((stats.kept_turns, stats.summarized_turns), (12, 0))
+        self.assertEqual(stats.tokens, sum(message_tokens(m) for m in messages))
+
+    def test_long_history_is_summarized_within_budget(self):
+        history = _history(30)
+        messages, stats = PromptBuilder(budget_tokens=600, summary_tokens=150).build("Be brief.", history, "Next?")
+        self.assertLessEqual(stats.tokens, 600)
+        self.assertFalse(stats.over_budget)
+        self.assertEqual(stats.kept_turns + stats.summarized_turns, 30)
+        self.assertGreater(stats.summarized_turns, 0)
+
+        summary = messages[1]
+        self.assertEqual(summary["role"], "system")
+        self.assertTrue(summary["content"].startswith(SUMMARY_HEADER))
+        self.assertLessEqual(message_tokens(summary), 150)
+        # The newest summarized turn survives trimming; the kept turns follow verbatim.
+        self.assertIn(f"turn {stats.summarized_turns - 1} ", summary["content"])
+        self.assertEqual(messages[2:-1], history[stats.summarized_turns:])
+
+    def test_summary_cache(self):
+        builder = PromptBuilder(budget_tokens=600, summary_tokens=150)
+        history = _history(30)
+        first, stats = builder.build("Be brief.", history, "Next?")
+        self.assertFalse(stats.summary_cached)
+        again, stats = builder.build("Be brief.", history, "Next?")
+        self.assertTrue(stats.summary_cached)
+        self.assertEqual(first, again)
+
+        # Two more turns: the cached prefix summary is extended, and matches a cold build.
+        longer = _history(32)
+        hits = builder.cache.stats()["hits"]
+        extended, stats = builder.build("Be brief.", longer, "Next?")
+        self.assertTrue(stats.summary_cached)
+        self.assertEqual(builder.cache.stats()["hits"], hits + 1)
+        self.assertEqual(extended, PromptBuilder(budget_tokens=600, summary_tokens=150).build(
+            "Be brief.", longer, "Next?")[0])
+
+    def test_summary_cache_survives_the_window_sliding(self):
+        # Long enough that the stored window (40 messages) slides every turn.
+        store = ConversationStore(max_turns=40)
+        builder = PromptBuilder(budget_tokens=600, summary_tokens=150)
+        cid, _ = store.open()
+        cached = []
+        for turn in range(40):
+            cid, window, first_seq = store.open_window(cid)
+            messages, stats = builder.build("Be brief.", window, "Next?", conversation=(cid, first_seq))
+            cached.append(stats.summary_cached)
+            # Same prompt as summarizing the current window from scratch.
+            self.assertEqual(messages, PromptBuilder(budget_tokens=600, summary_tokens=150).build(
+                "Be brief.", window, "Next?")[0])
+            store.append(cid, [(m["role"], m["content"]) for m in _history(2 * turn + 2)[-2:]])
+        self.assertEqual(first_seq, 38)
+        self.assertGreater(stats.summarized_turns, 0)
+        self.assertTrue(all(cached[10:]))
+
+    def test_oversized_message_is_never_cut(self):
+        text = "x" * 8000
+        messages, stats = PromptBuilder(budget_tokens=500).build("Be brief.", _history(4), text)
+        self.assertEqual(messages[-1]["content"], text)
+        self.assertTrue(stats.over_budget)
+        self.assertEqual(stats.summarized_turns, 4)
+        self.assertEqual(len(messages), 2)  # no room left for a summary either
+
+    def test_context_follows_the_system_prompt_within_budget(self):
+        context = "Relevant excerpts: " + "pell " * 200
+        messages, stats = PromptBuilder(budget_tokens=600, summary_tokens=100).build(
+            "Be brief.", _history(30), "Next?", context=context)
+        self.assertEqual(messages[1], {"role": "system", "content": context})
+        self.assertEqual(stats.context_tokens, message_tokens(messages[1]))
+        self.assertLessEqual(stats.tokens, 600)
+        self.assertEqual(stats.tokens, sum(message_tokens(m) for m in messages))
+
+
+if __name__ == "__main__":
+    unittest.main()
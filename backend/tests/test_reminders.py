@@ -0,0 +1,157 @@
+"""
+Tests for the due-date reminder scheduler and the repository subscriptions that feed it.
+"""
+import sys
+import os
+import asyncio
+import tempfile
+import time
+import unittest
+from unittest import mock
+from datetime import datetime, timedelta
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.src.models import Task
+from backend.src import reminders
+from backend.src.reminders import QueueSink, ReminderScheduler
+from backend.src.repository import InMemoryTaskRepository, JournalTaskRepository, SQLiteTaskRepository
+
+
+def _task(task_id, due_in_seconds=None, **fields):
+    due = datetime.now() + timedelta(seconds=due_in_seconds) if due_in_seconds is not None else None
+    return Task(id=task_id, title=f"task {task_id}", category="home", due_date=due, **fields)
+
+
+class TestReminderScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = ReminderScheduler()
+        self.now = time.time()
+
+    def _fire(self, after_seconds=0):
+        return [(e.task_id, e.kind) for e in self.scheduler.pop_due(self.now + after_seconds)]
+
+    def test_fires_in_due_order(self):
+        self.scheduler.on_put(_task("late", 300))
+        self.scheduler.on_put(_task("soon", 100))
+        self.scheduler.on_put(_task("undated"))
+        self.scheduler.on_put(_task("done", 50, completed=True))
+        self.assertEqual(len(self.scheduler), 2)
+        self.assertEqual(self._fire(0), [])
+        self.assertEqual(self._fire(400), [("soon", "overdue"), ("late", "overdue")])
+        self.assertEqual(self._fire(400), [])
+
+    def test_due_and_overdue(self):
+        self.scheduler.on_put(_task("a", -600))
+        self.scheduler.on_put(_task("b", 10))
+        self.assertEqual(self._fire(11), [("a", "overdue"), ("b", "due")])
+
+    def test_updates_reschedule_or_cancel(self):
+        self.scheduler.on_put(_task("moved", 100))
+        self.scheduler.on_put(_task("moved", 500))
+        self.scheduler.on_put(_task("completed", 100))
+        self.scheduler.on_put(_task("completed", 100, completed=True))
+        self.scheduler.on_put(_task("deleted", 100))
+        self.scheduler.on_delete("deleted")
+        self.assertEqual(self._fire(200), [])
+        self.assertEqual(self._fire(600), [("moved", "overdue")])
+
+    def test_fires_once_per_due_date(self):
+        task = _task("a", -1)
+        self.scheduler.on_put(task)
+        self.assertEqual(self._fire(), [("a", "due")])
+        # Re-saving it (e.g. a title edit, or a store reload) does not remind again ...
+        self.scheduler.on_reset()
+        self.scheduler.on_put(task.model_copy(update={"title": "renamed"}))
+        self.assertEqual(self._fire(), [])
+        # ... a new due date does.
+        self.scheduler.on_put(task.model_copy(update={"due_date": task.due_date + timedelta(seconds=1)}))
+        self.assertEqual(self._fire(5), [("a", "due")])
+
+    def test_superseded_entries_are_dropped(self):
+        for i in range(3000):
+            self.scheduler.on_put(_task("a", 100 + i))
+        self.assertLess(self.scheduler.stats()["heap"], 2100)
+        self.assertEqual(self.scheduler.next_due(), self.scheduler._due["a"][0])
+
+
+class TestRepositorySubscriptions(unittest.TestCase):
+    def test_every_backend_feeds_its_subscribers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            repositories = {
+                "memory": InMemoryTaskRepository(),
+                "journal": JournalTaskRepository(os.path.join(tmp, "tasks.json"), os.path.join(tmp, "tasks.journal")),
+                "sqlite": SQLiteTaskRepository(os.path.join(tmp, "tasks.db")),
+            }
+            for name, repo in repositories.items():
+                with self.subTest(store=name):
+                    repo.put(_task("existing", -5))
+                    scheduler = ReminderScheduler()
+                    repo.subscribe(scheduler)
+                    self.assertEqual(len(scheduler), 1)
+                    repo.put(_task("new", -5))
+                    repo.put_many([_task("done", -5, completed=True), _task("gone", -5)])
+                    repo.delete("gone")
+                    self.assertEqual(sorted(e.task_id for e in scheduler.pop_due()), ["existing", "new"])
+                    repo.replace_all([_task("fresh", -5)])
+                    self.assertEqual([e.task_id for e in scheduler.pop_due()], ["fresh"])
+                    repo.close()
+
+
+class TestBackgroundScheduler(unittest.TestCase):
+    def test_wakes_for_new_reminders(self):
+        async def scenario():
+            repo = InMemoryTaskRepository()
+            sink = QueueSink()
+            scheduler = ReminderScheduler(sink)
+            await scheduler.start(repo)
+            try:
+                repo.put(_task("a", 0.05))
+                # Written from another thread while the scheduler is asleep.
+                await asyncio.to_thread(repo.put, _task("b", -1))
+                first = await asyncio.wait_for(sink.queue.get(), 1)
+                second = await asyncio.wait_for(sink.queue.get(), 1)
+                return [first.task_id, second.task_id]
+            finally:
+                await scheduler.stop()
+
+        self.assertEqual(asyncio.run(scenario()), ["b", "a"])
+
+    def test_workers_sharing_a_store_fire_once(self):
+        """One worker sends reminders for every worker's writes; another takes over when it stops"""
+        async def scenario(make_repo):
+            repos = [make_repo(), make_repo()]
+            sinks = [QueueSink(), QueueSink()]
+            schedulers = [ReminderScheduler(sink) for sink in sinks]
+            for scheduler, repo in zip(schedulers, repos):
+                await scheduler.start(repo)
+            try:
+                await asyncio.to_thread(repos[1].put, _task("a", -1))  # written by the follower
+                first = await asyncio.wait_for(sinks[0].queue.get(), 2)
+                await asyncio.sleep(0.1)
+                self.assertTrue(sinks[1].queue.empty())
+                self.assertEqual(schedulers[1].stats()["leading"], 0)
+                await schedulers[0].stop()
+                await asyncio.to_thread(repos[0].put, _task("b", -1))  # written by the stopped worker
+                second = await asyncio.wait_for(sinks[1].queue.get(), 2)
+                return [first.task_id, second.task_id]
+            finally:
+                for scheduler in schedulers:
+                    await scheduler.stop()
+                for repo in repos:
+                    repo.close()
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(reminders, "REFRESH_SECONDS", 0.02):
+            stores = {
+                "journal": lambda: JournalTaskRepository(os.path.join(tmp, "tasks.json"),
+                                                         os.path.join(tmp, "tasks.journal")),
+                "sqlite": lambda: SQLiteTaskRepository(os.path.join(tmp, "tasks.db")),
+            }
+            for name, make_repo in stores.items():
+                with self.subTest(store=name):
+                    self.assertEqual(asyncio.run(scenario(make_repo)), ["a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
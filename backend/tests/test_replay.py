@@ -0,0 +1,119 @@
+"""
+Tests for the offline replay provider: cassettes, synthetic replies, pacing and record mode.
+"""
+import sys
+import os
+import asyncio
+import dataclasses
+import json
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.src.assistant.client import LLMClient
+from backend.src.assistant.replay import Cassette, ReplayProvider
+from backend.src.settings import Settings
+
+MESSAGES = [{"role": "system", "content": "Be brief."}, {"role": "user", "content": "How do I file taxes?"}]
+
+
+def _client(**overrides):
+    settings = dataclasses.replace(Settings(), **{"replay_record": False, **overrides})
+    with mock.patch("backend.src.assistant.client.get_settings", return_value=settings):
+        return LLMClient(hooks=[])
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+class TestCassette(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "cassette.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_round_trip_and_torn_line(self):
+        Cassette(self.path).record(MESSAGES, "Gather your forms first.", "openai", "gpt-4o-mini", 1.5)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"messages": [{"role": "user", "con')
+
+        with self.assertLogs("backend.src.assistant.replay", level="WARNING"):
+            cassette = Cassette(self.path)
+        self.assertEqual(len(cassette), 1)
+        # Keys are on normalized content, like the response cache.
+        same = [dict(m, content="  " + m["content"].upper()) for m in MESSAGES]
+        self.assertEqual(cassette.get(same), "Gather your forms first.")
+        self.assertIsNone(cassette.get(MESSAGES[:1]))
+
+    def test_synthetic_replies_are_deterministic(self):
+        provider = ReplayProvider(Cassette(), reply_tokens=8)
+        first = provider.reply_for(MESSAGES)
+        self.assertEqual(first, ReplayProvider(Cassette(), reply_tokens=8).reply_for(MESSAGES))
+        self.assertEqual(len(first.split()), 8)
+        self.assertNotEqual(first, provider.reply_for(MESSAGES[:1]))
+        self.assertEqual((provider.replayed, provider.synthesized), (0, 2))
+
+
+class TestReplayClient(unittest.TestCase):
+    def test_pacing(self):
+        provider = ReplayProvider(latency_ms=30, tokens_per_second=100, reply_tokens=5)
+        self.assertAlmostEqual(provider.duration("one two three four five"), 0.08)
+
+        start = time.perf_counter()
+        chunks = asyncio.run(_collect(provider.astream(MESSAGES)))
+        self.assertGreaterEqual(time.perf_counter() - start, 0.08)
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual("".join(chunks), provider.reply_for(MESSAGES))
+
+    def test_replay_provider_serves_the_cassette(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, "cassette.jsonl")
+            Cassette(path).record(MESSAGES, "Recorded answer.")
+            client = _client(model_provider="replay", replay_cassette_path=path, replay_latency_ms=0,
+                             replay_tokens_per_second=0)
+            self.assertEqual(client.model, "replay")
+            self.assertEqual(client.chat(MESSAGES, use_cache=False), "Recorded answer.")
+            self.assertEqual(asyncio.run(client.achat(MESSAGES, use_cache=False)), "Recorded answer.")
+            self.assertEqual("".join(asyncio.run(_collect(client.astream(MESSAGES, use_cache=False)))),
+                             "Recorded answer.")
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def test_record_then_replay(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, "cassette.jsonl")
+            recorder = _client(model_provider="ollama", replay_record=True, replay_cassette_path=path)
+            with mock.patch.object(LLMClient, "_ollama_chat", return_value="Live answer."):
+                recorder.chat(MESSAGES)
+                recorder.chat(MESSAGES)  # a cache hit is not recorded again
+            with mock.patch.object(LLMClient, "_ollama_chat", side_effect=ConnectionError("down")):
+                with self.assertRaises(ConnectionError):
+                    recorder.chat(MESSAGES[:1], use_cache=False)
+
+            with open(path, encoding="utf-8") as f:
+                entries = [json.loads(line) for line in f]
+            self.assertEqual(len(entries), 1)
+            self.assertEqual((entries[0]["provider"], entries[0]["reply"]), ("ollama", "Live answer."))
+
+            replay = _client(model_provider="replay", replay_cassette_path=path, replay_latency_ms=0)
+            self.assertEqual(asyncio.run(replay.achat(MESSAGES, use_cache=False)), "Live answer.")
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def test_record_needs_a_cassette(self):
+        with self.assertRaises(RuntimeError):
+            _client(model_provider="ollama", replay_record=True, replay_cassette_path=None)
+
+
+if __name__ == "__main__":
+    unittest.main()
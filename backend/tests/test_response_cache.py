@@ -0,0 +1,115 @@
+"""
+Tests for the LLM response cache.
+"""
+import sys
+import os
+import asyncio
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.src.assistant.cache import ResponseCache, cache_key
+
+
+MESSAGES = [
+    {"role": "system", "content": "You are AdultingOS."},
+    {"role": "user", "content": "How do I file taxes as a student?"},
+]
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_key_normalizes_messages(self):
+        """Whitespace and case differences map to the same key"""
+        noisy = [MESSAGES[0], {"role": "user", "content": "  how do I  file taxes as a STUDENT? "}]
+        self.assertEqual(cache_key("ollama", "m", 0.2, MESSAGES), cache_key("ollama", "m", 0.2, noisy))
+        self.assertNotEqual(cache_key("ollama", "m", 0.2, MESSAGES), cache_key("openai", "m", 0.2, MESSAGES))
+        self.assertNotEqual(cache_key("ollama", "m", 0.2, MESSAGES), cache_key("ollama", "m", 0.7, MESSAGES))
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted first"""
+        cache = ResponseCache(maxsize=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+
+        self.assertEqual(cache.get("a"), "1")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["hits"], 2)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_ttl_expiry(self):
+        """Entries older than the TTL are misses"""
+        cache = ResponseCache(ttl_seconds=0.05)
+        cache.set("a", "1")
+        self.assertEqual(cache.get("a"), "1")
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("a"))
+
+    def test_sqlite_tier(self):
+        """Entries persist across cache instances through SQLite"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            first = ResponseCache(sqlite_path=path)
+            first.set("a", "1")
+            first.close()
+
+            second = ResponseCache(sqlite_path=path)
+            self.assertEqual(second.get("a"), "1")
+            self.assertEqual(second.stats()["disk_hits"], 1)
+            second.close()
+
+    def test_sqlite_purge_is_periodic_and_indexed(self):
+        """Expired rows are deleted at most once per purge interval, through the expires_at index"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResponseCache(ttl_seconds=0.05, sqlite_path=os.path.join(tmp, "cache.db"))
+            plan = cache._db.execute(
+                "EXPLAIN QUERY PLAN DELETE FROM response_cache WHERE expires_at <= 0"
+            ).fetchall()
+            self.assertIn("idx_response_cache_expires_at", str(plan))
+
+            def rows():
+                return cache._db.execute("SELECT key FROM response_cache ORDER BY key").fetchall()
+
+            cache.set("a", "1")
+            time.sleep(0.1)
+            cache.set("b", "2")
+            self.assertEqual(rows(), [("a",), ("b",)])  # purged on the first write only
+            cache._next_purge = 0.0  # the interval has passed
+            time.sleep(0.1)
+            cache.set("c", "3")
+            self.assertEqual(rows(), [("c",)])
+            self.assertIsNone(cache.get("a"))
+            cache.close()
+
+    def test_async_disk_tier_runs_off_the_loop(self):
+        """aget/aset use a worker thread for SQLite only; memory hits answer inline"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            first = ResponseCache(sqlite_path=path)
+            self.assertEqual(first._db.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(first._db.execute("PRAGMA busy_timeout").fetchone()[0], 5000)
+            second = ResponseCache(sqlite_path=path)
+
+            async def scenario():
+                with mock.patch("backend.src.assistant.cache.asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+                    await first.aset("a", "1")
+                    self.assertEqual(await first.aget("a"), "1")  # memory
+                    self.assertEqual(to_thread.call_count, 1)
+                    self.assertEqual(await second.aget("a"), "1")  # disk
+                    self.assertIsNone(await second.aget("b"))
+                    self.assertEqual(to_thread.call_count, 3)
+
+            asyncio.run(scenario())
+            self.assertEqual((second.stats()["disk_hits"], second.stats()["misses"]), (1, 1))
+            first.close()
+            second.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+"""
+Tests for the onboarding session store and the /chat flow built on it.
+"""
+import sys
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.src.sessions import Session, SessionStore
+
+
+class TestSessionStore(unittest.TestCase):
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            Session("s").extra = 1
+
+    def test_new_and_existing_sessions(self):
+        store = SessionStore()
+        with store.checkout() as session:
+            session.question_index = 2
+            session_id = session.session_id
+        with store.checkout(session_id) as session:
+            self.assertEqual(session.question_index, 2)
+        with store.checkout("user-42") as session:
+            self.assertEqual((session.session_id, session.question_index), ("user-42", 0))
+        self.assertEqual(store.stats()["created"], 2)
+
+    def test_lru_bound(self):
+        store = SessionStore(max_sessions=3)
+        for i in range(5):
+            with store.checkout(f"s{i}"):
+                pass
+        with store.checkout("s2"):
+            pass
+        with store.checkout("s5"):
+            pass
+        self.assertEqual(len(store), 3)
+        self.assertEqual(list(store._sessions), ["s4", "s2", "s5"])
+        self.assertEqual(store.stats()["evictions"], 3)
+
+    def test_idle_sessions_expire(self):
+        store = SessionStore(idle_ttl_seconds=60)
+        with store.checkout("old") as session:
+            session.question_index = 3
+        store._sessions["old"].last_seen = time.time() - 61
+        with store.checkout("new"):
+            pass
+        self.assertEqual(len(store), 1)
+        with store.checkout("old") as session:
+            self.assertEqual(session.question_index, 0)
+        self.assertEqual(store.stats()["expirations"], 1)
+
+    def test_checked_out_sessions_are_not_evicted(self):
+        """A session pushed out of the LRU or past the TTL mid-turn keeps its update"""
+        store = SessionStore(max_sessions=2, idle_ttl_seconds=60)
+        with store.checkout("busy") as session:
+            for i in range(3):
+                with store.checkout(f"s{i}"):
+                    pass
+            session.last_seen = time.time() - 61
+            with store.checkout("s3"):
+                pass
+            self.assertIn("busy", store._sessions)
+            session.question_index = 2
+        with store.checkout("busy") as session:
+            self.assertEqual(session.question_index, 2)
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.stats()["created"], 5)
+
+    def test_persistence(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, "sessions.db")
+            store = SessionStore(path=path)
+            with store.checkout("s1") as session:
+                session.question_index = 2
+                session.profile["is_student"] = "yes"
+            store.close()
+
+            store = SessionStore(path=path)
+            with store.checkout("s1") as session:
+                self.assertEqual(session.question_index, 2)
+                self.assertEqual(session.profile, {"is_student": "yes"})
+            store.close()
+
+            store = SessionStore(path=path, idle_ttl_seconds=0)
+            with store.checkout("s1") as session:
+                self.assertEqual(session.question_index, 0)
+            store.close()
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def test_sqlite_purge_is_periodic(self):
+        """Expired rows are deleted at most once per purge interval, not on every turn"""
+        tmp = tempfile.mkdtemp()
+        try:
+            store = SessionStore(path=os.path.join(tmp, "sessions.db"), idle_ttl_seconds=60)
+
+            def rows():
+                return [r[0] for r in store._db.execute("SELECT session_id FROM sessions ORDER BY session_id")]
+
+            with store.checkout("s1"):
+                pass
+            store._db.execute("UPDATE sessions SET last_seen = ?", (time.time() - 61,))
+            store._db.commit()
+            with store.checkout("s2"):
+                pass
+            self.assertEqual(rows(), ["s1", "s2"])  # purged on the first turn only
+            store._next_purge = 0.0  # the interval has passed
+            with store.checkout("s3"):
+                pass
+            self.assertEqual(rows(), ["s2", "s3"])
+            store.close()
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def test_workers_sharing_a_file(self):
+        """Each checkout sees the other store's writes, and concurrent turns are never lost"""
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, "sessions.db")
+            a, b = SessionStore(path=path), SessionStore(path=path)
+            with a.checkout("s1") as session:
+                session.question_index = 1
+            with b.checkout("s1") as session:
+                self.assertEqual(session.question_index, 1)
+                session.question_index = 2
+                session.profile["is_student"] = "yes"
+            with a.checkout("s1") as session:
+                self.assertEqual((session.question_index, session.profile), (2, {"is_student": "yes"}))
+
+            def turns(store):
+                for _ in range(25):
+                    with store.checkout("counter") as session:
+                        session.question_index += 1
+
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                list(pool.map(turns, [a, b] * 4))
+            with b.checkout("counter") as session:
+                self.assertEqual(session.question_index, 200)
+            with self.assertRaises(ValueError), a.checkout("s1") as session:
+                session.question_index = 9
+                raise ValueError("turn failed")
+            with b.checkout("s1") as session:
+                self.assertEqual(session.question_index, 2)
+            a.close()
+            b.close()
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+class TestOnboardingChat(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(main.app)
+
+    def _run_flow(self, answers):
+        reply = self.client.post("/chat", json={"text": ""}).json()
+        session_id = reply["session_id"]
+        replies = [reply["text"]]
+        for answer in answers:
+            reply = self.client.post("/chat", json={"text": answer, "session_id": session_id}).json()
+            replies.append(reply["text"])
+        with main.sessions.checkout(session_id) as session:
+            return replies, dict(session.profile)
+
+    def test_concurrent_flows_stay_separate(self):
+        """Interleaved users each see every question once and keep their own answers"""
+        questions = [q["text"] for q in main.ONBOARDING_QUESTIONS]
+        answer_sets = [[f"user{i}-{q}" for q in range(4)] for i in range(20)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(self._run_flow, answer_sets))
+        for answers, (replies, profile) in zip(answer_sets, results):
+            self.assertEqual(replies, questions + ["Thank you for completing your profile!"])
+            self.assertEqual(list(profile.values()), answers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Tests for single-flight request coalescing.
+"""
+import sys
+import os
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.src.assistant.singleflight import AsyncSingleFlight, SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_one_result(self):
+        """Threads asking for the same key trigger a single upstream call"""
+        group = SingleFlight()
+        calls = []
+        started = threading.Event()
+
+        def upstream():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return "reply"
+
+        with ThreadPoolExecutor(8) as ex:
+            first = ex.submit(group.do, "k", upstream)
+            started.wait()
+            rest = [ex.submit(group.do, "k", upstream) for _ in range(7)]
+            results = [first.result()] + [f.result() for f in rest]
+
+        self.assertEqual(results, ["reply"] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(group.coalesced, 7)
+        self.assertEqual(group.in_flight(), 0)
+
+    def test_errors_and_timeouts_propagate(self):
+        """Waiters see the leader's exception, or time out on their own"""
+        group = SingleFlight()
+        started = threading.Event()
+
+        def failing():
+            started.set()
+            time.sleep(0.1)
+            raise ValueError("provider down")
+
+        with ThreadPoolExecutor(3) as ex:
+            leader = ex.submit(group.do, "k", failing)
+            started.wait()
+            follower = ex.submit(group.do, "k", failing)
+            impatient = ex.submit(group.do, "k", failing, 0.01)
+            self.assertRaises(ValueError, leader.result)
+            self.assertRaises(ValueError, follower.result)
+            self.assertRaises(TimeoutError, impatient.result)
+
+    def test_async_coalescing_and_cancellation(self):
+        """Coroutines share one call; it's only cancelled when all callers leave"""
+        group = AsyncSingleFlight()
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "reply"
+
+        async def scenario():
+            results = await asyncio.gather(*[group.do("k", upstream) for _ in range(10)])
+            self.assertEqual(results, ["reply"] * 10)
+
+            slow = asyncio.ensure_future(group.do("slow", lambda: asyncio.sleep(10)))
+            await asyncio.sleep(0)
+            self.assertEqual(group.in_flight(), 1)
+            slow.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await slow
+            await asyncio.sleep(0)
+            self.assertEqual(group.in_flight(), 0)
+
+        asyncio.run(scenario())
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Tests that importing the app stays cheap: no provider SDKs, clients or data files.
+"""
+import sys
+import os
+import json
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+# Add the repo root to the path so the backend package can be imported
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, REPO_ROOT)
+
+_PROBE = r"""
+import json, os, sys
+import backend.main
+from backend.src.assistant import router
+print(json.dumps({
+    "modules": sorted(m for m in ("openai", "requests", "httpx", "numpy") if m in sys.modules),
+    "llm_created": router._llm is not None,
+    "routes": sorted(backend.main.app.openapi()["paths"]),
+}))
+"""
+
+
+class TestColdStart(unittest.TestCase):
+    def _probe(self, **env):
+        with tempfile.TemporaryDirectory() as cwd:
+            proc = subprocess.run(
+                [sys.executable, "-c", _PROBE],
+                cwd=cwd,
+                env={**os.environ, "PYTHONPATH": REPO_ROOT, **env},
+                capture_output=True, text=True, check=True,
+            )
+            return json.loads(proc.stdout.strip().splitlines()[-1]), os.listdir(cwd)
+
+    def test_import_is_lazy(self):
+        """Provider SDKs, HTTP clients and the LLM client wait for the first LLM turn"""
+        result, created_files = self._probe(MODEL_PROVIDER="openai", OPENAI_API_KEY="")
+        self.assertEqual(result["modules"], [])
+        self.assertFalse(result["llm_created"])
+        self.assertEqual(created_files, [])
+
+    def test_assistant_mounts_without_provider_credentials(self):
+        """A missing API key no longer drops the assistant routes; it fails per request instead"""
+        result, _ = self._probe(MODEL_PROVIDER="openai", OPENAI_API_KEY="")
+        self.assertIn("/assistant/chat", result["routes"])
+        self.assertIn("/tasks/", result["routes"])
+
+
+class TestLazyClient(unittest.TestCase):
+    def test_missing_credentials_return_503(self):
+        """Provider misconfiguration surfaces on the LLM endpoints, not at import"""
+        from fastapi.testclient import TestClient
+        from backend.main import app
+        from backend.src.assistant import router
+        from backend.src.settings import Settings
+
+        settings = Settings(model_provider="openai", openai_api_key=None)
+        old_llm, router._llm = router._llm, None
+        try:
+            with mock.patch("backend.src.assistant.client.get_settings", return_value=settings):
+                client = TestClient(app)
+                response = client.post("/assistant/chat", json={"message": "hello"})
+                self.assertEqual(response.status_code, 503)
+                self.assertIn("OPENAI_API_KEY", response.json()["detail"])
+                self.assertEqual(client.post("/assistant/chat/stream", json={"message": "hello"}).status_code, 503)
+                # Slash-commands don't need the model at all.
+                self.assertEqual(client.post("/assistant/chat", json={"message": "/task"}).status_code, 200)
+            self.assertIsNone(router._llm)
+        finally:
+            router._llm = old_llm
+
+
+if __name__ == "__main__":
+    unittest.main()
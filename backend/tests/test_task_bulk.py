@@ -0,0 +1,116 @@
+"""
+Tests for the bulk task endpoints: JSON and NDJSON bodies, atomic vs per-item errors and limits.
+"""
+import sys
+import os
+import json
+import unittest
+from unittest import mock
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.src import tasks
+from backend.src.repository import InMemoryTaskRepository, set_repository
+
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+class TestBulkEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.repo = InMemoryTaskRepository()
+        set_repository(self.repo)
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        set_repository(None)
+
+    def _bulk(self, method, items=None, content=None, headers=None, atomic=True):
+        return self.client.request(method, f"/tasks/bulk?atomic={str(atomic).lower()}",
+                                   json=items, content=content, headers=headers)
+
+    def _titles(self):
+        return sorted(task.title for task in self.repo.query(limit=1000)[0])
+
+    def test_create_from_json_and_ndjson(self):
+        body = self._bulk("POST", [{"title": "Pay rent", "category": "home"},
+                                   {"title": "File taxes", "category": "finance", "priority": 3}]).json()
+        self.assertEqual((body["data"]["created"], body["data"]["failed"], body["data"]["errors"]), (2, 0, []))
+        self.assertEqual([self.repo.get(i).title for i in body["data"]["ids"]], ["Pay rent", "File taxes"])
+
+        lines = [json.dumps({"title": "Renew passport", "category": "admin"}), "",
+                 json.dumps({"title": "Vote", "category": "civic"})]
+        body = self._bulk("POST", content="\n".join(lines) + "\n", headers=NDJSON).json()
+        self.assertEqual(body["data"]["created"], 2)
+        self.assertEqual(self._titles(), ["File taxes", "Pay rent", "Renew passport", "Vote"])
+
+    def test_create_atomic_vs_per_item(self):
+        items = [{"title": "Pay rent", "category": "home"}, {"title": "No category"},
+                 {"title": "Bad", "category": "x", "priority": 9}]
+        response = self._bulk("POST", items)
+        self.assertEqual(response.status_code, 422)
+        detail = response.json()["detail"]
+        self.assertEqual(detail["failed"], 2)
+        self.assertEqual([(e["index"], e["errors"][0]["loc"]) for e in detail["errors"]],
+                         [(1, ["category"]), (2, ["priority"])])
+        self.assertEqual(self._titles(), [])
+
+        body = self._bulk("POST", items, atomic=False).json()["data"]
+        self.assertEqual((body["created"], body["failed"]), (1, 2))
+        self.assertIsNotNone(body["ids"][0])
+        self.assertEqual(body["ids"][1:], [None, None])
+        self.assertEqual(self._titles(), ["Pay rent"])
+
+    def test_update(self):
+        ids = self._bulk("POST", [{"title": "Pay rent", "category": "home"},
+                                  {"title": "File taxes", "category": "finance"}]).json()["data"]["ids"]
+        body = self._bulk("PATCH", [{"id": ids[0], "completed": True}, {"id": ids[1], "priority": 4}]).json()["data"]
+        self.assertEqual((body["updated"], body["failed"]), (2, 0))
+        self.assertTrue(self.repo.get(ids[0]).completed)
+        self.assertEqual((self.repo.get(ids[1]).priority, self.repo.get(ids[1]).title), (4, "File taxes"))
+
+        items = [{"id": ids[0], "completed": False}, {"id": "missing", "completed": True},
+                 {"id": ids[1], "priority": 9}]
+        response = self._bulk("PATCH", items)
+        self.assertEqual(response.status_code, 422)
+        errors = response.json()["detail"]["errors"]
+        self.assertEqual([(e["index"], e["errors"][0]["msg"]) for e in errors][0], (1, "Task not found"))
+        self.assertTrue(self.repo.get(ids[0]).completed)
+
+        body = self._bulk("PATCH", items, atomic=False).json()["data"]
+        self.assertEqual((body["updated"], body["failed"]), (1, 2))
+        self.assertEqual([e["index"] for e in body["errors"]], [1, 2])
+        self.assertFalse(self.repo.get(ids[0]).completed)
+        self.assertEqual(self.repo.get(ids[1]).priority, 4)
+
+    def test_delete(self):
+        ids = self._bulk("POST", [{"title": t, "category": "home"} for t in ("a", "b", "c")]).json()["data"]["ids"]
+        response = self._bulk("DELETE", [ids[0], "missing"])
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json()["detail"]["errors"],
+                         [{"index": 1, "errors": [{"loc": ["id"], "msg": "Task not found"}]}])
+        self.assertEqual(self._titles(), ["a", "b", "c"])
+
+        body = self._bulk("DELETE", [ids[0], {"id": ids[1]}, "missing"], atomic=False).json()["data"]
+        self.assertEqual((body["deleted"], body["failed"]), (2, 1))
+        self.assertEqual(self._titles(), ["c"])
+        body = self._bulk("DELETE", content=json.dumps({"id": ids[2]}) + "\n", headers=NDJSON).json()["data"]
+        self.assertEqual(body["deleted"], 1)
+
+    def test_bad_bodies_and_item_limit(self):
+        self.assertEqual(self._bulk("POST", {"title": "not a list"}).status_code, 400)
+        self.assertEqual(self._bulk("POST", content="[{", headers={"Content-Type": "application/json"}).status_code,
+                         400)
+        self.assertEqual(self._bulk("POST", content="{}\nnot json\n", headers=NDJSON).status_code, 400)
+        with mock.patch.object(tasks, "MAX_BULK_ITEMS", 2):
+            response = self._bulk("POST", [{"title": t, "category": "home"} for t in ("a", "b", "c")])
+            self.assertEqual(response.status_code, 413)
+            self.assertEqual(self._bulk("DELETE", ["x", "y"], atomic=False).status_code, 200)
+        self.assertEqual(self._titles(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,243 @@
+"""
+Tests for task change versions: the change log, /tasks/changes and conditional GETs.
+"""
+import sys
+import os
+import tempfile
+import unittest
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.src.models import Task
+from backend.src.repository import (
+    InMemoryTaskRepository,
+    JournalTaskRepository,
+    SQLiteTaskRepository,
+    set_repository,
+)
+from backend.src.task_changes import ChangeLog, change_log
+
+
+def _task(task_id, **fields):
+    return Task(id=task_id, title=f"task {task_id}", category="home", **fields)
+
+
+class TestChangeLog(unittest.TestCase):
+    def test_latest_change_per_task(self):
+        log = ChangeLog()
+        start = log.version
+        log.on_put(_task("a"))
+        log.on_put(_task("b"))
+        log.on_put(_task("a", completed=True))
+        log.on_delete("b")
+        changes, version, has_more, reset = log.changes(start)
+        self.assertEqual([(c[0], c[2]) for c in changes], [("a", False), ("b", True)])
+        self.assertEqual((version, has_more, reset), (start + 4, False, False))
+        self.assertEqual(log.changes(version), ([], version, False, False))
+
+    def test_limit(self):
+        log = ChangeLog()
+        start = log.version
+        for i in range(5):
+            log.on_put(_task(str(i)))
+        changes, version, has_more, _ = log.changes(start, limit=2)
+        self.assertEqual(([c[0] for c in changes], has_more), (["0", "1"], True))
+        changes, _, has_more, _ = log.changes(version, limit=10)
+        self.assertEqual(([c[0] for c in changes], has_more), (["2", "3", "4"], False))
+
+    def test_reset_when_the_log_cannot_cover_since(self):
+        log = ChangeLog(max_entries=3)
+        start = log.version
+        for i in range(5):
+            log.on_put(_task(str(i)))
+        self.assertTrue(log.changes(start)[3])
+        self.assertEqual(len(log), 3)
+        self.assertEqual([c[0] for c in log.changes(log.floor)[0]], ["2", "3", "4"])
+        self.assertTrue(log.changes(log.version + 1)[3])  # from a previous process
+
+        current = log.version
+        log.on_reset()
+        self.assertTrue(log.changes(current)[3])
+
+    def test_versions_from_another_process_reset(self):
+        mine, theirs = ChangeLog(epoch=1), ChangeLog(epoch=2)
+        start = theirs.version
+        for log in (mine, theirs, mine, mine):
+            log.on_put(_task(str(log.version)))
+        # Numerically inside neither range, so never mistaken for a point in mine.
+        self.assertTrue(mine.changes(start)[3])
+        self.assertTrue(mine.changes(theirs.version)[3])
+        self.assertTrue(mine.changes(0)[3])
+        self.assertLessEqual(ChangeLog(epoch=(1 << 21) - 1).version + 2**32 - 1, 2**53 - 1)
+
+    def test_clock_versions_changes(self):
+        now = [7]
+        log = ChangeLog(clock=lambda: now[0])
+        self.assertEqual((log.version, log.floor), (7, 7))
+        now[0] = 9
+        log.on_put(_task("a"))
+        self.assertEqual(log.changes(7), ([("a", 9, False)], 9, False, False))
+        now[0] = 12
+        log.on_reset()
+        self.assertTrue(log.changes(9)[3])
+        self.assertEqual(log.changes(12), ([], 12, False, False))
+
+
+class TestSQLiteChanges(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "tasks.db")
+        # Two workers on one database file.
+        self.mine, self.theirs = SQLiteTaskRepository(path), SQLiteTaskRepository(path)
+        self.addCleanup(self.mine.close)
+        self.addCleanup(self.theirs.close)
+        set_repository(self.mine)
+        self.addCleanup(set_repository, None)
+        self.client = TestClient(app)
+
+    def _sync(self, since):
+        return self.client.get(f"/tasks/changes?since={since}").json()["data"]
+
+    def test_writes_from_another_worker(self):
+        self.mine.put(_task("a"))
+        etag = self.client.get("/tasks/").headers["etag"]
+        start = self._sync(0)["version"]
+        self.assertEqual(self.client.get("/tasks/", headers={"If-None-Match": etag}).status_code, 304)
+
+        self.theirs.put(_task("b"))
+        self.theirs.delete("a")
+        self.mine.put(_task("c"))
+        changed = self.client.get("/tasks/", headers={"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual([t["id"] for t in changed.json()["data"]], ["b", "c"])
+        delta = self._sync(start)
+        self.assertFalse(delta["reset"])
+        self.assertEqual([(c["id"], c["deleted"]) for c in delta["changes"]], [("b", False), ("a", True), ("c", False)])
+        # Either worker answers the same version the same way.
+        self.assertEqual(self.theirs.shared_changes().changes(start), self.mine.shared_changes().changes(start))
+
+    def test_prune_and_replace_reset(self):
+        self.mine.change_log_size = 2
+        self.mine.CHANGE_PRUNE_EVERY = 1
+        start = self._sync(0)["version"]
+        self.mine.put_many([_task(str(i)) for i in range(4)])
+        reset = self._sync(start)
+        self.assertTrue(reset["reset"])
+        floor = reset["version"] - 2
+        self.assertEqual([c["id"] for c in self._sync(floor)["changes"]], ["2", "3"])
+
+        current = self._sync(floor)["version"]
+        self.theirs.replace_all([_task("x")])
+        self.assertTrue(self._sync(current)["reset"])
+
+
+class TestJournalChanges(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.paths = (os.path.join(tmp.name, "tasks.json"), os.path.join(tmp.name, "tasks.journal"))
+        # Two workers on one set of journal files.
+        self.mine, self.theirs = JournalTaskRepository(*self.paths), JournalTaskRepository(*self.paths)
+        self.addCleanup(self.mine.close)
+        self.addCleanup(self.theirs.close)
+        self.addCleanup(set_repository, None)
+        self.client = TestClient(app)
+
+    def _sync(self, repo, since):
+        set_repository(repo)
+        return self.client.get(f"/tasks/changes?since={since}").json()["data"]
+
+    def test_workers_serve_one_sequence(self):
+        self.mine.put(_task("a"))
+        start = self._sync(self.mine, 0)["version"]
+        etag = self.client.get("/tasks/").headers["etag"]
+        set_repository(self.theirs)
+        self.assertEqual(self.client.get("/tasks/", headers={"If-None-Match": etag}).status_code, 304)
+
+        self.theirs.put(_task("b"))
+        self.theirs.delete("a")
+        self.mine.put(_task("c"))
+        for repo in (self.mine, self.theirs):
+            delta = self._sync(repo, start)
+            self.assertFalse(delta["reset"])
+            self.assertEqual([(c["id"], c["deleted"]) for c in delta["changes"]],
+                             [("b", False), ("a", True), ("c", False)])
+        self.assertEqual(change_log(self.mine).changes(start), change_log(self.theirs).changes(start))
+
+    def test_compaction_restart_and_replace(self):
+        self.theirs.put(_task("a"))
+        self.theirs.journal.compact()
+        self.theirs.put(_task("b"))
+        current = self._sync(self.theirs, 0)["version"]
+        # The change number survives compaction, and a restarted worker picks it up.
+        restarted = JournalTaskRepository(*self.paths)
+        self.addCleanup(restarted.close)
+        self.assertEqual(self._sync(restarted, current), {"changes": [], "version": current, "has_more": False,
+                                                          "reset": False})
+        self.assertEqual(self._sync(self.mine, current)["version"], current)
+
+        self.theirs.replace_all([_task("x")])
+        for repo in (self.mine, self.theirs, restarted):
+            self.assertTrue(self._sync(repo, current)["reset"])
+
+
+class TestConditionalRequests(unittest.TestCase):
+    def setUp(self):
+        set_repository(InMemoryTaskRepository())
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        set_repository(None)
+
+    def _create(self, title):
+        return self.client.post("/tasks/", json={"title": title, "category": "home"}).json()["data"]["id"]
+
+    def test_list_etag(self):
+        self._create("Pay rent")
+        first = self.client.get("/tasks/?limit=10")
+        etag = first.headers["etag"]
+        unchanged = self.client.get("/tasks/?limit=10", headers={"If-None-Match": etag})
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertEqual(unchanged.content, b"")
+        # Another query, or any write, gets a fresh response.
+        self.assertEqual(self.client.get("/tasks/?limit=5", headers={"If-None-Match": etag}).status_code, 200)
+        self._create("File taxes")
+        changed = self.client.get("/tasks/?limit=10", headers={"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(len(changed.json()["data"]), 2)
+
+    def test_task_etag(self):
+        task_id = self._create("Pay rent")
+        etag = self.client.get(f"/tasks/{task_id}").headers["etag"]
+        self.assertEqual(self.client.get(f"/tasks/{task_id}", headers={"If-None-Match": f'"x", {etag}'}).status_code, 304)
+        self.client.put(f"/tasks/{task_id}", json={"completed": True})
+        self.assertEqual(self.client.get(f"/tasks/{task_id}", headers={"If-None-Match": etag}).status_code, 200)
+
+    def test_delta_sync(self):
+        kept = self._create("Pay rent")
+        gone = self._create("Old chore")
+        # A first sync is always a reset: list everything, then follow the returned version.
+        start = self.client.get("/tasks/changes?since=0").json()["data"]
+        self.assertTrue(start["reset"])
+
+        self.client.put(f"/tasks/{kept}", json={"completed": True})
+        self.client.delete(f"/tasks/{gone}")
+        added = self._create("File taxes")
+        delta = self.client.get(f"/tasks/changes?since={start['version']}").json()["data"]
+        self.assertFalse(delta["reset"])
+        self.assertEqual([(c["id"], c["deleted"]) for c in delta["changes"]],
+                         [(kept, False), (gone, True), (added, False)])
+        self.assertTrue(delta["changes"][0]["task"]["completed"])
+        self.assertIsNone(delta["changes"][1]["task"])
+
+        idle = self.client.get(f"/tasks/changes?since={delta['version']}").json()["data"]
+        self.assertEqual((idle["changes"], idle["version"]), ([], delta["version"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
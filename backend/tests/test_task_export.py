@@ -0,0 +1,103 @@
+"""
+Tests for streaming NDJSON export and line-by-line import of tasks.
+"""
+import sys
+import os
+import json
+import unittest
+from unittest import mock
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.src import tasks
+from backend.src.models import Task
+from backend.src.repository import InMemoryTaskRepository, set_repository
+
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+class TestExportImport(unittest.TestCase):
+    def setUp(self):
+        self.repo = InMemoryTaskRepository()
+        set_repository(self.repo)
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        set_repository(None)
+
+    def _export(self):
+        response = self.client.get("/tasks/export")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("application/x-ndjson"))
+        return response.text
+
+    def _import(self, content):
+        return self.client.post("/tasks/import", content=content, headers=NDJSON)
+
+    def test_round_trip(self):
+        self.repo.put_many([Task(id=f"t{i}", title=f"Task {i}", category="home", priority=i % 5 + 1, tags=["a"])
+                            for i in range(7)])
+        # Several export chunks, each ending on a line boundary.
+        with mock.patch.object(tasks, "EXPORT_CHUNK_SIZE", 3):
+            exported = self._export()
+        lines = exported.splitlines()
+        self.assertTrue(exported.endswith("\n"))
+        self.assertEqual([json.loads(line)["id"] for line in lines], [f"t{i}" for i in range(7)])
+
+        set_repository(InMemoryTaskRepository())
+        body = self._import(exported).json()["data"]
+        self.assertEqual((body["created"], body["updated"], body["failed"]), (7, 0, 0))
+        self.assertEqual(self._export(), exported)
+
+    def test_created_vs_updated(self):
+        self.repo.put(Task(id="rent", title="Pay rent", category="home"))
+        lines = [
+            {"id": "rent", "title": "Pay rent", "category": "home", "completed": True},
+            {"title": "File taxes", "category": "finance"},
+            {"id": "new", "title": "Vote", "category": "civic"},
+        ]
+        body = self._import("\n".join(json.dumps(line) for line in lines)).json()
+        self.assertEqual(body["message"], "Imported 3 tasks")
+        self.assertEqual((body["data"]["created"], body["data"]["updated"]), (2, 1))
+        self.assertTrue(self.repo.get("rent").completed)
+        self.assertEqual(self.repo.get("new").title, "Vote")
+        self.assertEqual(len(self.repo.query(limit=10)[0]), 3)
+
+    def test_errors_are_reported_per_line(self):
+        content = "\n".join([
+            json.dumps({"title": "Pay rent", "category": "home"}),
+            "",
+            "not json",
+            json.dumps({"title": "No category"}),
+            json.dumps({"title": "Too urgent", "category": "home", "priority": 9}),
+        ]) + "\n"
+        body = self._import(content).json()["data"]
+        self.assertEqual((body["created"], body["failed"]), (1, 3))
+        self.assertEqual([e["line"] for e in body["errors"]], [3, 4, 5])
+        self.assertEqual(body["errors"][1]["errors"][0]["loc"], ["category"])
+        self.assertEqual(body["errors"][2]["errors"][0]["loc"], ["priority"])
+
+        with mock.patch.object(tasks, "MAX_IMPORT_ERRORS", 2):
+            body = self._import("x\n" * 5).json()["data"]
+        self.assertEqual((body["failed"], len(body["errors"])), (5, 2))
+
+    def test_overlong_line(self):
+        with mock.patch.object(tasks, "MAX_IMPORT_LINE_BYTES", 64):
+            ok = json.dumps({"title": "Pay rent", "category": "home"})
+            response = self._import(ok + "\n" + json.dumps({"title": "x" * 100, "category": "home"}))
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.json()["detail"], "Line 2 is too long")
+
+        with mock.patch.object(tasks, "MAX_IMPORT_LINE_BYTES", 64):
+            long = json.dumps({"title": "x" * 100, "category": "home"})
+            response = self._import(f"{ok}\n{ok}\n{long}\n{ok}\n")  # terminated, in one chunk
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.json()["detail"], "Line 3 is too long")
+
+
+if __name__ == "__main__":
+    unittest.main()
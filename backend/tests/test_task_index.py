@@ -0,0 +1,68 @@
+"""
+Tests for the secondary task indexes behind GET /tasks.
+"""
+import sys
+import os
+import unittest
+from datetime import datetime
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.src.models import Task
+from backend.src.task_index import TaskIndex
+
+
+def _task(i, **kwargs):
+    fields = {"id": f"t{i}", "title": f"Task {i}", "category": "home" if i % 2 else "finance"}
+    fields.update(kwargs)
+    return Task(**fields)
+
+
+class TestTaskIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = TaskIndex()
+        for i in range(20):
+            self.index.add(_task(i, priority=1 + i % 5, tags=["a"] if i % 3 == 0 else [],
+                                 due_date=datetime(2025, 1, 1 + i) if i % 4 else None))
+
+    def _all_pages(self, **kwargs):
+        ids, cursor = self.index.query(limit=3, **kwargs)
+        while cursor:
+            page, cursor = self.index.query(limit=3, cursor=cursor, **kwargs)
+            ids.extend(page)
+        return ids
+
+    def test_pages_cover_everything_once(self):
+        """Following cursors yields every task exactly once, in order"""
+        self.assertEqual(self._all_pages(), [f"t{i}" for i in range(20)])
+        self.assertEqual(self._all_pages(sort="-created"), [f"t{i}" for i in reversed(range(20))])
+
+    def test_filters(self):
+        """Hash-index filters intersect, and due ranges use the sorted index"""
+        ids = self._all_pages(category="finance", tags=["a"])
+        self.assertEqual(ids, ["t0", "t6", "t12", "t18"])
+
+        ids = self._all_pages(due_after=datetime(2025, 1, 5), due_before=datetime(2025, 1, 10), sort="-due_date")
+        self.assertEqual(ids, ["t9", "t7", "t6", "t5"])
+
+        ids = self._all_pages(priority=3, sort="priority")
+        self.assertEqual(ids, ["t2", "t7", "t12", "t17"])
+
+    def test_updates_and_removals(self):
+        """Re-adding a task moves it between index buckets; removing drops it"""
+        self.index.add(_task(0, category="home", completed=True))
+        self.assertIn("t0", self._all_pages(category="home", completed=True))
+        self.assertNotIn("t0", self._all_pages(category="finance"))
+        self.assertEqual(self._all_pages()[0], "t0")
+
+        self.index.remove("t0")
+        self.assertNotIn("t0", self._all_pages())
+        self.assertEqual(len(self.index), 19)
+
+    def test_bad_cursor(self):
+        self.assertRaises(ValueError, self.index.query, cursor="not-a-cursor")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+"""
+Tests for the append-only task journal behind the assistant tools.
+"""
+import sys
+import os
+import json
+import multiprocessing
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.src.assistant.journal import TaskJournal
+from backend.src.models import Task
+
+
+def _add_tasks(snapshot, worker, count):
+    # Runs in a child process: a separate store instance racing the others.
+    store = TaskJournal(snapshot, compact_every=15)
+    for i in range(count):
+        store.put(Task(id=f"{worker}-{i}", title=f"task {i}", category="home"))
+        if i % 10 == 9:
+            store.put(Task(id=f"{worker}-{i}", title=f"task {i}", category="home", completed=True))
+
+
+class TestTaskJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.snapshot = os.path.join(self.tmp.name, "tasks.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _reopen(self, **kwargs):
+        return TaskJournal(self.snapshot, **kwargs)
+
+    def test_put_and_reload(self):
+        """Records appended to the journal survive a reload"""
+        store = self._reopen()
+        store.put(Task(id="a", title="Pay rent", category="home"))
+        store.put(Task(id="b", title="File taxes", category="finance"))
+        store.put(Task(id="a", title="Pay rent", category="home", completed=True))
+
+        reloaded = self._reopen()
+        tasks = reloaded.all()
+        self.assertEqual([t.id for t in tasks], ["a", "b"])
+        self.assertTrue(reloaded.get("a").completed)
+        self.assertFalse(os.path.exists(self.snapshot))
+
+    def test_delete(self):
+        """Tombstones remove tasks on replay"""
+        store = self._reopen()
+        store.put(Task(id="a", title="Pay rent", category="home"))
+        self.assertEqual(store.delete("a").title, "Pay rent")
+        self.assertIsNone(store.delete("a"))
+        self.assertEqual(self._reopen().all(), [])
+
+    def test_torn_write_is_dropped(self):
+        """A partial trailing record from a crash is ignored and truncated"""
+        store = self._reopen()
+        store.put(Task(id="a", title="Pay rent", category="home"))
+        with open(store.journal_path, "ab") as f:
+            f.write(b'{"op":"put","task":{"id":"b","ti')
+
+        reloaded = self._reopen()
+        self.assertEqual([t.id for t in reloaded.all()], ["a"])
+        reloaded.put(Task(id="c", title="Call mom", category="family"))
+        self.assertEqual([t.id for t in self._reopen().all()], ["a", "c"])
+
+    def test_compaction(self):
+        """Superseded records are folded into the snapshot"""
+        store = self._reopen(compact_every=3)
+        store.put(Task(id="a", title="v0", category="home"))
+        for i in range(1, 4):
+            store.put(Task(id="a", title=f"v{i}", category="home"))
+
+        self.assertTrue(os.path.exists(self.snapshot))
+        self.assertEqual(store.stats()["journal_records"], 0)
+        self.assertEqual(self._reopen().get("a").title, "v3")
+
+    def test_change_numbers(self):
+        """Every writer numbers changes from one sequence, which outlives compaction and reloads"""
+        first, second = self._reopen(first_version=100, compact_every=2), self._reopen(first_version=500)
+        first.put(Task(id="a", title="v0", category="home"))
+        second.put(Task(id="b", title="v0", category="home"))
+        self.assertEqual((first.version, second.version), (100, 101))
+        first.put(Task(id="a", title="v1", category="home"))
+        first.delete("b")  # compacts
+        self.assertEqual(first.stats()["journal_records"], 0)
+        reopened = self._reopen()
+        self.assertEqual((reopened.get("a").title, reopened.version), ("v1", 103))
+        second.put(Task(id="c", title="v0", category="home"))
+        self.assertEqual(second.version, 104)
+        second.replace_all([])
+        reopened.refresh()
+        self.assertEqual(reopened.version, 105)
+
+    def test_snapshot_is_streamable(self):
+        """Snapshots hold one task per line, and legacy pretty-printed files still load"""
+        store = self._reopen()
+        store.replace_all(Task(id=str(i), title=f"t{i}", category="home") for i in range(3))
+        with open(self.snapshot) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], "[")
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(json.loads("\n".join(lines))[2]["id"], "2")
+
+        with open(self.snapshot, "w") as f:
+            json.dump([{"id": "a", "title": "Pay rent", "category": "home"}], f, indent=2)
+        self.assertEqual([t.id for t in self._reopen().all()], ["a"])
+
+    def test_reads_are_cached(self):
+        """Repeated reads are served from memory until the files change"""
+        store = self._reopen()
+        store.put(Task(id="a", title="Pay rent", category="home"))
+        store.all()
+        misses = store.misses
+        for _ in range(5):
+            store.all()
+        self.assertEqual(store.misses, misses)
+        self.assertGreaterEqual(store.hits, 5)
+
+    def test_sees_other_writers(self):
+        """Changes made through another instance invalidate the cache"""
+        reader = self._reopen()
+        writer = self._reopen(compact_every=2)
+        self.assertEqual(reader.all(), [])
+
+        writer.put(Task(id="a", title="v0", category="home"))
+        self.assertEqual(reader.get("a").title, "v0")
+
+        # Enough updates to force a compaction (new snapshot, empty journal)
+        for i in range(1, 4):
+            writer.put(Task(id="a", title=f"v{i}", category="home"))
+        self.assertEqual(reader.get("a").title, "v3")
+
+    def test_concurrent_processes_lose_nothing(self):
+        """Workers in separate processes append and compact the same files without losing writes"""
+        workers = [multiprocessing.Process(target=_add_tasks, args=(self.snapshot, w, 40)) for w in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+            self.assertEqual(worker.exitcode, 0)
+
+        tasks = {t.id: t for t in self._reopen().all()}
+        self.assertEqual(len(tasks), 160)
+        self.assertTrue(all(tasks[f"{w}-9"].completed for w in range(4)))
+
+    def test_group_commit(self):
+        """Concurrent writes share flushes and all of them land"""
+        store = self._reopen(group_commit_ms=20)
+        barrier = threading.Barrier(16)
+
+        def writer(w):
+            barrier.wait()
+            for i in range(5):
+                store.put(Task(id=f"{w}-{i}", title=f"task {i}", category="home"))
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = store.stats()
+        self.assertEqual(stats["committed"], 80)
+        self.assertLess(stats["commits"], 40)
+        self.assertEqual(len(self._reopen().all()), 80)
+
+    def test_failed_flush_reaches_the_writer(self):
+        """A write error is raised to the caller and leaves the store unchanged"""
+        store = self._reopen()
+        store.put(Task(id="a", title="Pay rent", category="home"))
+        with mock.patch.object(TaskJournal, "_append", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                store.put(Task(id="b", title="File taxes", category="finance"))
+        self.assertIsNone(store.get("b"))
+        self.assertEqual(store.delete("a").title, "Pay rent")
+        self.assertEqual(self._reopen().all(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
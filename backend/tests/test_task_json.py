@@ -0,0 +1,81 @@
+"""
+Tests for the single-pass JSON encoding of /tasks responses.
+"""
+import sys
+import os
+import json
+import unittest
+from datetime import datetime
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.src.models import Task
+from backend.src.repository import InMemoryTaskRepository, set_repository
+from backend.src.task_json import TaskJSONCache, envelope_response
+from backend.src.utils import format_response
+
+
+def _task(task_id, **fields):
+    return Task(id=task_id, title=f"Ünïcode \"task\" {task_id}", category="home",
+                due_date=datetime(2025, 4, 15, 10, 30, 0, 123), tags=["a", "b"], **fields)
+
+
+class TestTaskJSONCache(unittest.TestCase):
+    def test_same_bytes_as_format_response(self):
+        tasks = [_task("1"), _task("2", description="line\nbreak", completed=True)]
+        old = JSONResponse(jsonable_encoder(format_response([t.dict() for t in tasks], message="Retrieved 2 tasks")))
+        new = envelope_response(TaskJSONCache().dumps_many(tasks), message="Retrieved 2 tasks")
+        self.assertEqual(new.body, old.body)
+        self.assertEqual(envelope_response(b"[]", extra={"pagination": {"limit": 5}}).body,
+                         b'{"status":"success","message":"","data":[],"pagination":{"limit":5}}')
+
+    def test_reused_only_for_the_same_object(self):
+        cache = TaskJSONCache()
+        task = _task("1")
+        first = cache.dumps(task)
+        self.assertIs(cache.dumps(task), first)
+        updated = task.model_copy(update={"completed": True})
+        self.assertTrue(json.loads(cache.dumps(updated))["completed"])
+        self.assertEqual(cache.stats(), {"size": 1, "hits": 1, "misses": 2})
+
+    def test_bounded(self):
+        cache = TaskJSONCache(maxsize=2)
+        for i in range(5):
+            cache.dumps(_task(str(i)))
+        self.assertEqual(cache.stats()["size"], 2)
+
+
+class TestTaskResponses(unittest.TestCase):
+    def setUp(self):
+        set_repository(InMemoryTaskRepository())
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        set_repository(None)
+
+    def test_envelopes(self):
+        created = self.client.post("/tasks/", json={"title": "Pay rent", "category": "finance"}).json()
+        self.assertEqual((created["status"], created["message"]), ("success", "Task created successfully"))
+        task_id = created["data"]["id"]
+
+        listed = self.client.get("/tasks/?limit=10")
+        self.assertEqual(listed.headers["content-type"], "application/json")
+        self.assertEqual(listed.json()["pagination"], {"limit": 10, "next_cursor": None})
+        self.assertEqual(listed.json()["data"], [created["data"]])
+
+        updated = self.client.put(f"/tasks/{task_id}", json={"completed": True}).json()["data"]
+        fetched = self.client.get(f"/tasks/{task_id}").json()["data"]
+        self.assertEqual(fetched, updated)
+        self.assertTrue(fetched["completed"])
+        self.assertEqual(self.client.get("/tasks/search?q=rent").json()["data"], [updated])
+        self.assertEqual(self.client.delete(f"/tasks/{task_id}").json()["data"], updated)
+
+
+if __name__ == "__main__":
+    unittest.main()
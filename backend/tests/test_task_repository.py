@@ -0,0 +1,164 @@
+"""
+Tests that every task repository backend behaves the same.
+"""
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+
+# Add the repo root to the path so the backend package can be imported
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.src.models import Task
+from backend.src.repository import (
+    InMemoryTaskRepository,
+    JournalTaskRepository,
+    SQLiteTaskRepository,
+    sqlite_path,
+)
+
+
+def _task(i, **kwargs):
+    fields = {"id": f"t{i}", "title": f"Task {i}", "category": "home" if i % 2 else "finance"}
+    fields.update(kwargs)
+    return Task(**fields)
+
+
+class RepositoryContract:
+    """Mixed into one TestCase per backend; subclasses implement make()."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.repo = self.make()
+        self.repo.put_many([
+            _task(i, priority=1 + i % 5, tags=["a"] if i % 3 == 0 else [],
+                  due_date=datetime(2025, 1, 1 + i) if i % 4 else None)
+            for i in range(20)
+        ])
+
+    def tearDown(self):
+        self.repo.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _all_pages(self, **kwargs):
+        tasks, cursor = self.repo.query(limit=3, **kwargs)
+        ids = [t.id for t in tasks]
+        while cursor:
+            tasks, cursor = self.repo.query(limit=3, cursor=cursor, **kwargs)
+            ids.extend(t.id for t in tasks)
+        return ids
+
+    def test_get_put_delete(self):
+        """Updates keep the creation position; deletes return the removed task"""
+        self.assertEqual(self.repo.get("t3").title, "Task 3")
+        self.repo.put(_task(3, title="Renamed", category="home"))
+        self.assertEqual(self.repo.get("t3").title, "Renamed")
+        self.assertEqual(self._all_pages()[:4], ["t0", "t1", "t2", "t3"])
+        self.assertEqual(self.repo.delete("t3").title, "Renamed")
+        self.assertIsNone(self.repo.delete("t3"))
+        self.assertIsNone(self.repo.get("t3"))
+        self.assertEqual(self.repo.delete_many(["t4", "t5", "missing"]), 2)
+        self.assertEqual(self.repo.count(), 17)
+
+    def test_query_matches_in_memory_reference(self):
+        """Filters, sort orders and cursors agree with the reference backend"""
+        reference = InMemoryTaskRepository()
+        reference.put_many(list(self.repo.iter_tasks()))
+        cases = [
+            {},
+            {"sort": "-created"},
+            {"sort": "due_date"},
+            {"sort": "-priority", "category": "home"},
+            {"tags": ["a"], "completed": False},
+            {"due_after": datetime(2025, 1, 5), "due_before": datetime(2025, 1, 15), "sort": "-due_date"},
+            {"priority": 3},
+        ]
+        for kwargs in cases:
+            with self.subTest(**{k: str(v) for k, v in kwargs.items()}):
+                expected = [t.id for t in reference.query(limit=100, **kwargs)[0]]
+                self.assertEqual(self._all_pages(**kwargs), expected)
+
+    def test_search(self):
+        """Every word must prefix-match a word in the title or description"""
+        self.repo.put(_task(30, title="Pay rent", description="Transfer to landlord"))
+        self.repo.put(_task(31, title="Renew passport"))
+        self.assertEqual([t.id for t in self.repo.search("rent")], ["t30"])
+        self.assertEqual([t.id for t in self.repo.search("LANDL pay")], ["t30"])
+        self.assertEqual(sorted(t.id for t in self.repo.search("re")), ["t30", "t31"])
+        self.assertEqual(self.repo.search('pass"* ('), self.repo.search("pass"))
+        self.assertEqual(self.repo.search("  ?! "), [])
+        self.repo.put(_task(30, title="Pay bills", category="home"))
+        self.assertEqual(self.repo.search("rent"), [])
+        self.repo.delete("t31")
+        self.assertEqual(self.repo.search("passport"), [])
+
+    def test_replace_all(self):
+        self.repo.replace_all([_task(100), _task(101)])
+        self.assertEqual([t.id for t in self.repo.iter_tasks()], ["t100", "t101"])
+
+    def test_bad_input(self):
+        with self.assertRaises(ValueError):
+            self.repo.query(sort="title")
+        with self.assertRaises(ValueError):
+            self.repo.query(cursor="not-a-cursor")
+
+
+class TestInMemoryRepository(RepositoryContract, unittest.TestCase):
+    def make(self):
+        return InMemoryTaskRepository()
+
+
+class TestJournalRepository(RepositoryContract, unittest.TestCase):
+    def make(self):
+        return JournalTaskRepository(os.path.join(self.tmp, "tasks.json"), os.path.join(self.tmp, "tasks.journal"))
+
+    def test_sees_other_writers(self):
+        """A second process writing the same files is picked up, index included"""
+        other = JournalTaskRepository(self.repo.journal.snapshot_path, self.repo.journal.journal_path)
+        other.put(_task(50, category="travel"))
+        self.assertEqual([t.id for t in self.repo.query(category="travel")[0]], ["t50"])
+
+    def test_reload_indexes_the_snapshot(self):
+        """Tasks folded into the snapshot are indexed when another process (or a restart) loads it"""
+        self.repo.journal.compact()
+        other = JournalTaskRepository(self.repo.journal.snapshot_path, self.repo.journal.journal_path)
+        self.assertEqual([t.id for t in other.query(limit=100)[0]], [f"t{i}" for i in range(20)])
+        other.close()
+
+
+class TestSQLiteRepository(RepositoryContract, unittest.TestCase):
+    def make(self):
+        return SQLiteTaskRepository(os.path.join(self.tmp, "tasks.db"))
+
+    def test_schema(self):
+        """WAL mode, tag join table and the filter indexes are in place and used"""
+        conn = self.repo._conn()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM task_tags WHERE tag = 'a'").fetchone()[0], 7)
+        plan = " ".join(row[-1] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM tasks WHERE completed = 0 ORDER BY due_key, seq"))
+        self.assertIn("idx_tasks_completed_due", plan)
+
+    def test_existing_database_is_backfilled(self):
+        """Opening a database created without the tag/FTS tables fills them in"""
+        self.repo.close()
+        conn = sqlite3.connect(os.path.join(self.tmp, "tasks.db"))
+        conn.executescript("DROP TABLE task_tags; DROP TABLE tasks_fts;")
+        conn.close()
+        self.repo = self.make()
+        self.assertEqual(len(self.repo.query(tags=["a"])[0]), 7)
+        self.assertEqual([t.id for t in self.repo.search("task 7")][:1], ["t7"])
+
+    def test_sqlite_path(self):
+        self.assertEqual(sqlite_path("sqlite:///./adultingos.db"), "./adultingos.db")
+        self.assertEqual(sqlite_path("sqlite:////var/db.sqlite"), "/var/db.sqlite")
+        self.assertEqual(sqlite_path("sqlite:///"), ":memory:")
+        with self.assertRaises(ValueError):
+            sqlite_path("postgresql://localhost/db")
+
+
+if __name__ == "__main__":
+    unittest.main()
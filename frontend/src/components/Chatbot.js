@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 
 /**
  * A simple chatbot component.
@@ -11,6 +11,9 @@ function Chatbot() {
   // State to store the user's input
   const [inputValue, setInputValue] = useState('');
 
+  // Onboarding session id issued by the backend; sent with every message
+  const sessionIdRef = useRef(null);
+
   /**
    * Sends an initial message to the backend to start the conversation.
    */
@@ -25,6 +28,7 @@ function Chatbot() {
           body: JSON.stringify({ text: '' }), // Send an empty message to start
         });
         const data = await response.json();
+        sessionIdRef.current = data.session_id;
         setMessages([data]);
       } catch (error) {
         console.error('Error starting conversation:', error);
@@ -63,9 +67,10 @@ function Chatbot() {
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ text: inputValue }),
+        body: JSON.stringify({ text: inputValue, session_id: sessionIdRef.current }),
       });
       const data = await response.json();
+      sessionIdRef.current = data.session_id;
 
       // Add the bot's response to the chat
       setMessages([...newMessages, data]);
@@ -42,7 +42,7 @@ const ChatScreen = () => {
     setLoading(true);
 
     try {
-      const response = await apiService.chat(userMessage.content, messages);
+      const response = await apiService.chat(userMessage.content);
       
       const assistantMessage = {
         id: (Date.now() + 1).toString(),
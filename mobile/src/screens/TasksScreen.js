@@ -20,9 +20,7 @@ const TasksScreen = () => {
   const loadTasks = async () => {
     setLoading(true);
     try {
-      const response = await apiService.chat('/task list');
-      // Parse task list from assistant response
-      setTasks(parseTasks(response.reply));
+      setTasks(await apiService.syncTasks());
     } catch (error) {
       Alert.alert('Error', 'Failed to load tasks');
     } finally {
@@ -30,20 +28,6 @@ const TasksScreen = () => {
     }
   };
 
-  const parseTasks = (taskText) => {
-    // Simple parser for task list format
-    const lines = taskText.split('\n').filter(line => line.trim());
-    return lines.map((line, index) => {
-      const isCompleted = line.startsWith('✔');
-      const title = line.replace(/^[•✔]\s*/, '').split('[')[0].trim();
-      return {
-        id: index.toString(),
-        title,
-        completed: isCompleted,
-      };
-    });
-  };
-
   const toggleTask = async (taskId) => {
     try {
       await apiService.chat(`/task done ${taskId}`);
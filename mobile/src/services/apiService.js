@@ -10,9 +10,61 @@ const API_BASE_URL = __DEV__
 class ApiService {
   constructor() {
     this.baseURL = API_BASE_URL;
+    // The server keeps the conversation's history; we only send its id back.
+    this.conversationId = null;
+    // Local copy of the task list, kept current with deltas from /tasks/changes.
+    this.tasks = new Map();
+    this.tasksVersion = null;
   }
 
-  async chat(message, history = []) {
+  async getJson(path) {
+    const response = await fetch(`${this.baseURL}/api${path}`);
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    return response.json();
+  }
+
+  /**
+   * Bring the local task list up to date and return it. After the first call
+   * only tasks that changed since the last sync are downloaded.
+   */
+  async syncTasks() {
+    let since = this.tasksVersion ?? 0;
+    for (;;) {
+      const { data } = await this.getJson(`/tasks/changes?since=${since}`);
+      if (data.reset) {
+        // First sync, or too far behind for a delta: list everything, then follow data.version.
+        await this.loadAllTasks();
+        this.tasksVersion = data.version;
+        break;
+      }
+      for (const change of data.changes) {
+        if (change.deleted) {
+          this.tasks.delete(change.id);
+        } else {
+          this.tasks.set(change.id, change.task);
+        }
+      }
+      since = this.tasksVersion = data.version;
+      if (!data.has_more) break;
+    }
+    return Array.from(this.tasks.values());
+  }
+
+  async loadAllTasks() {
+    const tasks = new Map();
+    let cursor = null;
+    do {
+      const query = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+      const page = await this.getJson(`/tasks/?limit=1000${query}`);
+      page.data.forEach((task) => tasks.set(task.id, task));
+      cursor = page.pagination.next_cursor;
+    } while (cursor);
+    this.tasks = tasks;
+  }
+
+  async chat(message) {
     try {
       const response = await fetch(`${this.baseURL}/api/assistant/chat`, {
         method: 'POST',
@@ -21,7 +73,7 @@ class ApiService {
         },
         body: JSON.stringify({
           message,
-          history: history.slice(-10), // Keep last 10 messages for context
+          conversation_id: this.conversationId,
         }),
       });
 
@@ -29,7 +81,11 @@ class ApiService {
         throw new Error(`HTTP error! status: ${response.status}`);
       }
 
-      return await response.json();
+      const data = await response.json();
+      if (data.conversation_id) {
+        this.conversationId = data.conversation_id;
+      }
+      return data;
     } catch (error) {
       console.error('API Error:', error);
       throw error;